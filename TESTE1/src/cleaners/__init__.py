@@ -1,21 +1,41 @@
 import logging
+import numpy as np
 import pandas as pd
 from typing import List, Dict
 
+from pipeline.instrumentation import instrumented
+
+from .deduplicator import RowDeduplicator
+
 logger = logging.getLogger(__name__)
 
 
 class DataCleaner:
-    def __init__(self):
+    def __init__(self, fused: bool = False):
+        self.fused = fused
         self.inconsistencies_log: List[Dict] = []
+        self._stream_counts: Dict[str, int] = {
+            'valores_negativos': 0,
+            'valores_zero': 0,
+            'duplicatas_exatas': 0,
+            'trimestre_invalido': 0
+        }
+        self._stream_razao_pairs: List[pd.DataFrame] = []
+        # Linhas vistas valem só dentro de uma execução do modo streaming
+        self._stream_deduplicator = RowDeduplicator()
 
+    @instrumented("cleaner")
     def clean(self, df: pd.DataFrame) -> pd.DataFrame:
-        df_clean = df.copy()
-        original_count = len(df_clean)
-        df_clean = self._remove_negative_values(df_clean)
-        df_clean = self._remove_exact_duplicates(df_clean)
-        self._detect_razao_social_inconsistencies(df_clean)
-        df_clean = self._standardize_quarters(df_clean)
+        # Nenhuma etapa altera o DataFrame recebido, então não há cópia inicial
+        original_count = len(df)
+
+        if self.fused:
+            df_clean = self._clean_fused(df)
+        else:
+            df_clean = self._remove_negative_values(df)
+            df_clean = self._remove_exact_duplicates(df_clean)
+            self._detect_razao_social_inconsistencies(df_clean)
+            df_clean = self._standardize_quarters(df_clean)
 
         cleaned_count = len(df_clean)
         removed = original_count - cleaned_count
@@ -25,13 +45,106 @@ class DataCleaner:
 
         return df_clean
 
+    def _clean_fused(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Todas as máscaras são calculadas sobre as colunas do DataFrame original
+        # e as linhas mantidas são copiadas uma única vez, no final. As contagens
+        # seguem a ordem das etapas separadas: duplicatas só entre as linhas não
+        # negativas, razão social e trimestre só entre as linhas que sobraram
+        keep = np.ones(len(df), dtype=bool)
+
+        if 'ValorDespesas' in df.columns:
+            valores = df['ValorDespesas']
+            keep = ~(valores < 0).to_numpy()
+            self._report_negative_values(
+                int((~keep).sum()), int((valores == 0).sum()))
+
+        hashes = RowDeduplicator.hash_rows(df)
+        duplicated = RowDeduplicator().duplicated(hashes[keep])
+        self._report_duplicates(int(duplicated.sum()))
+        keep[np.flatnonzero(keep)[duplicated]] = False
+
+        if 'CNPJ' in df.columns and 'RazaoSocial' in df.columns:
+            # nunique ignora nulos: mascarar a razão social equivale a filtrar as linhas
+            self._report_razao_social_inconsistencies(
+                df['CNPJ'], df['RazaoSocial'].where(keep))
+
+        if 'Trimestre' not in df.columns:
+            return df[keep]
+
+        trimestre = df['Trimestre']
+        # Trimestre textual é convertido só nas linhas mantidas, para o tipo
+        # resultante ser o mesmo das etapas separadas; numérico fica como está
+        converted = not pd.api.types.is_numeric_dtype(trimestre)
+        if converted:
+            trimestre = pd.to_numeric(trimestre[keep], errors='coerce')
+        else:
+            trimestre = trimestre[keep]
+
+        invalid_mask = ((trimestre < 1) | (trimestre > 4)).to_numpy()
+        self._report_invalid_quarters(int(invalid_mask.sum()))
+        keep[np.flatnonzero(keep)[invalid_mask]] = False
+
+        if converted:
+            return df[keep].assign(Trimestre=trimestre[~invalid_mask])
+
+        return df[keep]
+
+    @instrumented("cleaner")
+    def clean_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
+        if 'ValorDespesas' in df.columns:
+            negative_mask = df['ValorDespesas'] < 0
+            self._stream_counts['valores_negativos'] += int(negative_mask.sum())
+            self._stream_counts['valores_zero'] += int(
+                (df['ValorDespesas'] == 0).sum())
+            df = df[~negative_mask]
+
+        # Duplicatas entre blocos são detectadas pelo hash de cada linha
+        df, duplicates_count = self._stream_deduplicator.drop_duplicates(df)
+        self._stream_counts['duplicatas_exatas'] += duplicates_count
+
+        if 'CNPJ' in df.columns and 'RazaoSocial' in df.columns:
+            self._stream_razao_pairs.append(
+                df[['CNPJ', 'RazaoSocial']].drop_duplicates())
+
+        if 'Trimestre' in df.columns:
+            trimestre = pd.to_numeric(df['Trimestre'], errors='coerce')
+            invalid_mask = (trimestre < 1) | (trimestre > 4)
+            self._stream_counts['trimestre_invalido'] += int(invalid_mask.sum())
+            df = df.assign(Trimestre=trimestre)[~invalid_mask]
+
+        return df
+
+    def finish_stream(self):
+        counts = self._stream_counts
+
+        self._report_negative_values(
+            counts['valores_negativos'], counts['valores_zero'])
+        self._report_duplicates(counts['duplicatas_exatas'])
+
+        if self._stream_razao_pairs:
+            pairs = pd.concat(
+                self._stream_razao_pairs, ignore_index=True).drop_duplicates()
+            self._detect_razao_social_inconsistencies(pairs)
+
+        self._report_invalid_quarters(counts['trimestre_invalido'])
+
+        for key in counts:
+            counts[key] = 0
+        self._stream_razao_pairs = []
+
+        self._stream_deduplicator.reset()
+
     def _remove_negative_values(self, df: pd.DataFrame) -> pd.DataFrame:
         if 'ValorDespesas' not in df.columns:
             return df
 
         negative_mask = df['ValorDespesas'] < 0
-        negative_count = negative_mask.sum()
+        zero_count = (df['ValorDespesas'] == 0).sum()
+        self._report_negative_values(negative_mask.sum(), zero_count)
+
+        return df[~negative_mask]
 
+    def _report_negative_values(self, negative_count: int, zero_count: int):
         if negative_count > 0:
             logger.info(
                 f"  └─ Removidos {negative_count} registros com valores negativos")
@@ -41,7 +154,6 @@ class DataCleaner:
                 'acao': 'removidos'
             })
 
-        zero_count = (df['ValorDespesas'] == 0).sum()
         if zero_count > 0:
             logger.info(f"  └─ Mantidos {zero_count} registros com valor zero")
             self.inconsistencies_log.append({
@@ -50,11 +162,14 @@ class DataCleaner:
                 'acao': 'mantidos'
             })
 
-        return df[~negative_mask]
-
     def _remove_exact_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
-        duplicates_count = df.duplicated().sum()
+        # Um único hash por linha serve para contar e para remover
+        df, duplicates_count = RowDeduplicator().drop_duplicates(df)
+        self._report_duplicates(duplicates_count)
+
+        return df
 
+    def _report_duplicates(self, duplicates_count: int):
         if duplicates_count > 0:
             logger.info(f"  └─ Removidas {duplicates_count} linhas duplicadas")
             self.inconsistencies_log.append({
@@ -63,13 +178,14 @@ class DataCleaner:
                 'acao': 'removidas'
             })
 
-        return df.drop_duplicates()
-
     def _detect_razao_social_inconsistencies(self, df: pd.DataFrame):
         if 'CNPJ' not in df.columns or 'RazaoSocial' not in df.columns:
             return
 
-        cnpj_razao = df.groupby('CNPJ')['RazaoSocial'].nunique()
+        self._report_razao_social_inconsistencies(df['CNPJ'], df['RazaoSocial'])
+
+    def _report_razao_social_inconsistencies(self, cnpj: pd.Series, razao_social: pd.Series):
+        cnpj_razao = razao_social.groupby(cnpj, observed=True).nunique()
         inconsistent_cnpjs = cnpj_razao[cnpj_razao > 1]
 
         if len(inconsistent_cnpjs) > 0:
@@ -88,11 +204,14 @@ class DataCleaner:
         if 'Trimestre' not in df.columns:
             return df
 
-        df['Trimestre'] = pd.to_numeric(df['Trimestre'], errors='coerce')
+        trimestre = pd.to_numeric(df['Trimestre'], errors='coerce')
 
-        invalid_mask = (df['Trimestre'] < 1) | (df['Trimestre'] > 4)
-        invalid_count = invalid_mask.sum()
+        invalid_mask = (trimestre < 1) | (trimestre > 4)
+        self._report_invalid_quarters(invalid_mask.sum())
 
+        return df.assign(Trimestre=trimestre)[~invalid_mask]
+
+    def _report_invalid_quarters(self, invalid_count: int):
         if invalid_count > 0:
             logger.warning(
                 f"  └─ {invalid_count} registros com trimestre inválido removidos")
@@ -102,8 +221,6 @@ class DataCleaner:
                 'acao': 'removidos'
             })
 
-        return df[~invalid_mask]
-
     def get_cleaning_report(self) -> Dict:
         return {
             'total_inconsistencies': len(self.inconsistencies_log),
@@ -0,0 +1,59 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class RowDeduplicator:
+    def __init__(self):
+        # Hashes já vistos em blocos ordenados; blocos de tamanho parecido são
+        # fundidos, então há no máximo log2(n) blocos para consultar
+        self._runs: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+    @staticmethod
+    def hash_rows(df: pd.DataFrame) -> np.ndarray:
+        # Um hash de 64 bits por linha, calculado uma única vez sobre todas as colunas
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    def duplicated(self, hashes: np.ndarray) -> np.ndarray:
+        mask = pd.Series(hashes).duplicated().to_numpy() | self._contains(hashes)
+        self._add(np.sort(hashes[~mask]))
+        return mask
+
+    def drop_duplicates(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+        mask = self.duplicated(self.hash_rows(df))
+        duplicates_count = int(mask.sum())
+
+        if duplicates_count == 0:
+            return df, 0
+
+        return df[~mask], duplicates_count
+
+    def reset(self):
+        self._runs = []
+
+    def _contains(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+
+        for run in self._runs:
+            positions = np.searchsorted(run, hashes)
+            positions[positions == len(run)] = len(run) - 1
+            found |= run[positions] == hashes
+
+        return found
+
+    def _add(self, sorted_hashes: np.ndarray):
+        if len(sorted_hashes) == 0:
+            return
+
+        self._runs.append(sorted_hashes)
+
+        while len(self._runs) > 1 and len(self._runs[-1]) >= len(self._runs[-2]):
+            newer = self._runs.pop()
+            older = self._runs.pop()
+            merged = np.concatenate([older, newer])
+            merged.sort(kind='stable')
+            self._runs.append(merged)
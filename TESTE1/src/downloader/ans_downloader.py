@@ -1,64 +1,89 @@
 from config import get_settings, consts
+from pipeline.instrumentation import instrumented
+import json
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 import sys
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 
 settings = get_settings()
 
+logger = logging.getLogger(__name__)
+
 
 class ANSDownloader:
-    def __init__(self):
-        self.base_url = settings.ans_base_url
-        self.output_dir = settings.teste1_raw_dir
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        output_dir: Optional[Path] = None,
+        max_workers: int = consts.DEFAULT_MAX_WORKERS,
+        listing_cache_file: Optional[Path] = None
+    ):
+        self.base_url = (base_url or settings.ans_base_url).rstrip("/")
+        self.output_dir = output_dir or settings.teste1_raw_dir
+        self.max_workers = max_workers
+        self.listing_cache_file = listing_cache_file or settings.teste1_listing_cache_file
+        self.session = self._create_session()
+        self._listing_cache: Dict[str, Dict[str, str]] = self._load_listing_cache()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_workers,
+            pool_maxsize=self.max_workers,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=1,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=["HEAD", "GET"]
+            )
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
+    @instrumented("downloader")
     def download_latest_trimesters(self) -> List[Path]:
-        zip_infos = self._discover_all_zips()
-        latest_zips = zip_infos[:len(consts.TRIMESTRES_TO_PROCESS)]
+        needed = len(consts.TRIMESTRES_TO_PROCESS)
+        zip_infos = self._discover_all_zips(limit=needed)
+        latest_zips = zip_infos[:needed]
 
-        downloaded_files: List[Path] = []
+        self.output_dir.mkdir(parents=True, exist_ok=True)
 
-        for filename, year_url in latest_zips:
-            downloaded_files.append(
-                self._download_file(year_url, filename)
-            )
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            downloaded_files: List[Path] = list(executor.map(
+                lambda zip_info: self._download_file(zip_info[1], zip_info[0]),
+                latest_zips
+            ))
 
         return downloaded_files
 
-    def _discover_all_zips(self) -> List[Tuple[str, str]]:
-        response = requests.get(self.base_url, timeout=30)
-        response.raise_for_status()
+    def _discover_all_zips(self, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        listing = self._fetch_listing(self.base_url)
 
-        years = re.findall(r'href="(\d{4})/"', response.text)
+        years = re.findall(r'href="(\d{4})/"', listing)
         years = sorted(set(years), reverse=True)
 
         zip_entries: List[Tuple[str, str, int, int]] = []
 
+        # Anos mais recentes primeiro: ao completar um ano com ZIPs suficientes,
+        # nenhum ano anterior pode conter trimestres mais novos
         for year in years:
-            year_url = f"{self.base_url}/{year}/"
-
-            year_response = requests.get(year_url, timeout=30)
-            year_response.raise_for_status()
+            zip_entries.extend(self._list_year_zips(year))
 
-            zip_files = re.findall(r'href="([^"]+\.zip)"', year_response.text)
+            if limit is not None and len(zip_entries) >= limit:
+                break
 
-            for zip_name in zip_files:
-                match = re.match(r'([1-4])T(\d{4})\.zip', zip_name)
-                if not match:
-                    continue
-
-                quarter = int(match.group(1))
-                year_num = int(match.group(2))
-
-                zip_entries.append(
-                    (zip_name, year_url, year_num, quarter)
-                )
+        self._save_listing_cache()
 
         zip_entries.sort(
             key=lambda x: (x[2], x[3]),
@@ -67,18 +92,173 @@ class ANSDownloader:
 
         return [(z[0], z[1]) for z in zip_entries]
 
+    def _list_year_zips(self, year: str) -> List[Tuple[str, str, int, int]]:
+        year_url = f"{self.base_url}/{year}/"
+        listing = self._fetch_listing(year_url)
+
+        zip_files = re.findall(r'href="([^"]+\.zip)"', listing)
+        zip_entries: List[Tuple[str, str, int, int]] = []
+
+        for zip_name in zip_files:
+            match = re.match(r'([1-4])T(\d{4})\.zip', zip_name)
+            if not match:
+                continue
+
+            quarter = int(match.group(1))
+            year_num = int(match.group(2))
+
+            zip_entries.append(
+                (zip_name, year_url, year_num, quarter)
+            )
+
+        return zip_entries
+
+    def _fetch_listing(self, url: str) -> str:
+        cached = self._listing_cache.get(url)
+        headers = {}
+
+        if cached is not None:
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+
+        response = self.session.get(url, headers=headers, timeout=30)
+
+        if response.status_code == 304 and cached is not None:
+            logger.debug(f"  └─ Índice inalterado: {url}")
+            return cached["body"]
+
+        response.raise_for_status()
+
+        self._listing_cache[url] = {
+            "last_modified": response.headers.get("Last-Modified", ""),
+            "etag": response.headers.get("ETag", ""),
+            "body": response.text
+        }
+
+        return response.text
+
+    def _load_listing_cache(self) -> Dict[str, Dict[str, str]]:
+        if not self.listing_cache_file.exists():
+            return {}
+
+        try:
+            with open(self.listing_cache_file, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache de índices ignorado: {e}")
+            return {}
+
+    def _save_listing_cache(self):
+        self.listing_cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.listing_cache_file.with_name(
+            self.listing_cache_file.name + ".tmp")
+
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(self._listing_cache, file)
+
+        tmp_file.replace(self.listing_cache_file)
+
     def _download_file(self, base_url: str, filename: str) -> Path:
         file_url = f"{base_url}{filename}"
         output_path = self.output_dir / filename
+        part_path = output_path.with_name(
+            output_path.name + consts.PARTIAL_DOWNLOAD_SUFFIX)
+        etag_path = part_path.with_name(part_path.name + ".etag")
+
+        remote_size, remote_etag = self._fetch_remote_metadata(file_url)
 
         if output_path.exists():
-            return output_path
+            if remote_size is None or output_path.stat().st_size == remote_size:
+                return output_path
+
+            logger.warning(
+                f"Tamanho de {filename} difere do servidor, baixando novamente")
+            output_path.unlink()
+
+        resume_from = 0
+        if part_path.exists():
+            stored_etag = etag_path.read_text().strip() if etag_path.exists() else None
+            if remote_etag is not None and stored_etag == remote_etag:
+                resume_from = part_path.stat().st_size
+            else:
+                part_path.unlink()
+
+        if remote_size is not None and resume_from > remote_size:
+            part_path.unlink()
+            resume_from = 0
+
+        if remote_size is None or resume_from < remote_size:
+            self._fetch_to_part(
+                file_url, part_path, etag_path, resume_from, remote_etag)
+
+        self._verify_download(part_path, filename, remote_size)
+
+        part_path.replace(output_path)
+        etag_path.unlink(missing_ok=True)
+
+        return output_path
 
-        with requests.get(file_url, stream=True, timeout=30) as response:
+    def _fetch_remote_metadata(self, file_url: str) -> Tuple[Optional[int], Optional[str]]:
+        try:
+            response = self.session.head(
+                file_url,
+                headers={"Accept-Encoding": "identity"},
+                allow_redirects=True,
+                timeout=30
+            )
             response.raise_for_status()
-            with open(output_path, "wb") as file:
-                for chunk in response.iter_content(chunk_size=8192):
+        except requests.RequestException as e:
+            logger.debug(f"  └─ HEAD indisponível para {file_url}: {e}")
+            return None, None
+
+        content_length = response.headers.get("Content-Length")
+        remote_size = int(content_length) if content_length else None
+
+        return remote_size, response.headers.get("ETag")
+
+    def _fetch_to_part(
+        self,
+        file_url: str,
+        part_path: Path,
+        etag_path: Path,
+        resume_from: int,
+        remote_etag: Optional[str]
+    ):
+        headers = {"Accept-Encoding": "identity"}
+        if resume_from > 0:
+            headers["Range"] = f"bytes={resume_from}-"
+            headers["If-Range"] = remote_etag
+            logger.info(
+                f"  └─ Retomando {part_path.name} a partir de {resume_from} bytes")
+
+        with self.session.get(file_url, headers=headers, stream=True, timeout=30) as response:
+            response.raise_for_status()
+
+            response_etag = response.headers.get("ETag")
+            if remote_etag is not None and response_etag is not None and response_etag != remote_etag:
+                raise IOError(
+                    f"ETag de {file_url} mudou durante o download")
+
+            # Sem 206 o servidor ignorou o Range e reenviou o arquivo inteiro
+            append = resume_from > 0 and response.status_code == 206
+
+            if not append and response_etag is not None:
+                etag_path.write_text(response_etag)
+
+            with open(part_path, "ab" if append else "wb") as file:
+                for chunk in response.iter_content(chunk_size=consts.DOWNLOAD_CHUNK_SIZE):
                     if chunk:
                         file.write(chunk)
 
-        return output_path
+    def _verify_download(self, part_path: Path, filename: str, remote_size: Optional[int]):
+        if remote_size is None:
+            return
+
+        downloaded_size = part_path.stat().st_size
+        if downloaded_size != remote_size:
+            raise IOError(
+                f"Download incompleto de {filename}: "
+                f"{downloaded_size} de {remote_size} bytes"
+            )
@@ -1,4 +1,5 @@
 from config import get_settings
+from pipeline.instrumentation import instrumented
 import logging
 import zipfile
 from pathlib import Path
@@ -12,6 +13,7 @@ settings = get_settings()
 
 
 class ZipExtractor:
+    @instrumented("extractor")
     def extract(self, zip_files: List[Path]) -> List[Path]:
         extracted_files: List[Path] = []
 
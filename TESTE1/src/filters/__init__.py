@@ -1,7 +1,10 @@
 import logging
+import re
 import pandas as pd
 from typing import Optional
 
+from pipeline.instrumentation import instrumented
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,13 +20,18 @@ class AccountFilter:
         self.target_account = target_account
         self.TARGET_ACCOUNT_CODES = [target_account, target_account[:2]]
 
+        # Uma única regex com todas as palavras-chave; as mais longas primeiro
+        keywords = sorted(self.DESCRIPTION_KEYWORDS, key=len, reverse=True)
+        self._keyword_pattern = re.compile(
+            '|'.join(re.escape(keyword) for keyword in keywords),
+            re.IGNORECASE
+        )
+
+    @instrumented("filter")
     def filter(self, df: pd.DataFrame) -> pd.DataFrame:
         if df.empty:
             return df
 
-        df = df.copy()
-        df.columns = df.columns.str.upper().str.strip()
-
         col_mapping = self._identify_columns(df)
 
         if not col_mapping:
@@ -31,24 +39,24 @@ class AccountFilter:
                 "Não foi possível identificar as colunas necessárias para filtro")
             return pd.DataFrame()
 
-        filter_mask = pd.Series([False] * len(df))
+        filter_mask = pd.Series(False, index=df.index)
 
         if 'conta' in col_mapping:
             conta_col = col_mapping['conta']
-            for code in self.TARGET_ACCOUNT_CODES:
-                filter_mask |= df[conta_col].astype(
-                    str).str.startswith(code, na=False)
+            filter_mask |= df[conta_col].astype(str).str.startswith(
+                tuple(self.TARGET_ACCOUNT_CODES), na=False)
 
         if 'descricao' in col_mapping:
+            # Descrição só é avaliada nas linhas que a conta não selecionou. Um
+            # pré-filtro só pela conta não descartaria nada: com o OU entre os
+            # critérios, qualquer linha ainda pode entrar pela descrição
+            pending = ~filter_mask
             desc_col = col_mapping['descricao']
-            description_upper = df[desc_col].astype(str).str.upper()
-
-            for keyword in self.DESCRIPTION_KEYWORDS:
-                filter_mask |= description_upper.str.contains(
-                    keyword, na=False, regex=False
-                )
+            filter_mask[pending] = df.loc[pending, desc_col].astype(str).str.contains(
+                self._keyword_pattern, na=False)
 
-        filtered_df = df[filter_mask].copy()
+        filtered_df = df[filter_mask]
+        filtered_df.columns = filtered_df.columns.str.upper().str.strip()
 
         if not filtered_df.empty:
             logger.debug(
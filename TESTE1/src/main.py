@@ -2,7 +2,9 @@ from utils.zip_utils import zip_csv
 from processor.expenses_processor import ExpensesProcessor
 from extractor.zip_extractor import ZipExtractor
 from downloader.ans_downloader import ANSDownloader
+from manifest import QuarterManifest
 from config import get_settings, consts
+from pipeline.instrumentation import stage, start_run
 import logging
 from pathlib import Path
 import sys
@@ -29,23 +31,49 @@ def create_directories():
 def main():
     logging.info("TESTE 1 - INTEGRAÇÃO COM API ANS")
 
+    run = start_run(
+        "teste1",
+        trace_memory=settings.trace_memory,
+        context=settings.model_dump(mode='json')
+    )
+
     try:
         create_directories()
 
         downloader = ANSDownloader()
         zip_files = downloader.download_latest_trimesters()
 
-        extractor = ZipExtractor()
-        extractor.extract(zip_files)
-
         processor = ExpensesProcessor(
             extracted_dir=settings.teste1_extracted_dir,
-            output_file=settings.teste1_consolidated_file
+            output_file=settings.teste1_consolidated_file,
+            streaming=settings.teste1_streaming,
+            chunk_size=consts.DEFAULT_CHUNK_SIZE,
+            max_workers=settings.teste1_max_workers if settings.teste1_parallel else 1,
+            dialect_cache_file=settings.teste1_dialect_cache_file,
+            parquet_dir=(
+                settings.teste1_consolidated_parquet_dir
+                if settings.output_format == consts.OUTPUT_FORMAT_PARQUET else None
+            ),
+            compact_dtypes=settings.compact_dtypes,
+            centavos=settings.integer_centavos,
+            fused_cleaning=settings.teste1_fused_cleaning
         )
-        processor.run()
 
-        output_zip_path = settings.teste1_output_path / "consolidado_despesas.zip"
-        zip_csv(settings.teste1_consolidated_file, output_zip_path)
+        with stage("processor", zip_files):
+            if settings.teste1_incremental:
+                manifest = QuarterManifest(
+                    settings.teste1_manifest_file, settings.teste1_partitions_dir)
+                processor.run_incremental(zip_files, manifest)
+            elif settings.teste1_read_from_zip:
+                processor.run(zip_files=zip_files)
+            else:
+                extractor = ZipExtractor()
+                extractor.extract(zip_files)
+                processor.run()
+
+        with stage("export"):
+            output_zip_path = settings.teste1_output_path / consts.CONSOLIDADO_ZIP_FILENAME
+            zip_csv(settings.teste1_consolidated_file, output_zip_path)
 
         logging.info("TESTE 1 FINALIZADO COM SUCESSO")
 
@@ -53,6 +81,9 @@ def main():
         logging.exception("Erro durante a execução do pipeline")
         raise
 
+    finally:
+        run.write_report(settings.run_reports_dir)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, TypedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestEntry(TypedDict):
+    source_zip: str
+    source_hash: str
+    processing_key: str
+    row_count: int
+    partition_path: str
+    trimestre: int
+    ano: int
+
+
+class QuarterManifest:
+    HASH_BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, manifest_file: Path, partitions_dir: Path):
+        self.manifest_file = manifest_file
+        self.partitions_dir = partitions_dir
+        self.entries: Dict[str, ManifestEntry] = self._load()
+
+    @classmethod
+    def hash_file(cls, path: Path) -> str:
+        digest = hashlib.sha256()
+
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(cls.HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def partition_path(self, quarter: str) -> Path:
+        return self.partitions_dir / f"{quarter}.csv"
+
+    def is_current(self, quarter: str, source_hash: str, processing_key: str) -> bool:
+        entry = self.entries.get(quarter)
+
+        if entry is None:
+            return False
+
+        # Entradas de manifestos antigos, sem a chave, são reprocessadas
+        return (
+            entry['source_hash'] == source_hash
+            and entry.get('processing_key') == processing_key
+            and self._resolve(entry['partition_path']).exists()
+        )
+
+    def update(
+        self,
+        quarter: str,
+        source_zip: Path,
+        source_hash: str,
+        processing_key: str,
+        row_count: int,
+        trimestre: int,
+        ano: int
+    ):
+        partition_path = self.partition_path(quarter)
+
+        self.entries[quarter] = {
+            'source_zip': source_zip.name,
+            'source_hash': source_hash,
+            'processing_key': processing_key,
+            'row_count': row_count,
+            'partition_path': self._relativize(partition_path),
+            'trimestre': trimestre,
+            'ano': ano
+        }
+
+    def save(self):
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file, indent=2, ensure_ascii=False)
+
+        tmp_file.replace(self.manifest_file)
+
+    def _load(self) -> Dict[str, ManifestEntry]:
+        if not self.manifest_file.exists():
+            return {}
+
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifesto ignorado, todos os trimestres serão reprocessados: {e}")
+            return {}
+
+    def _relativize(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.manifest_file.parent).as_posix()
+        except ValueError:
+            return str(path)
+
+    def _resolve(self, stored_path: str) -> Path:
+        return self.manifest_file.parent / stored_path
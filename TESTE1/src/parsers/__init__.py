@@ -0,0 +1,167 @@
+import logging
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+DIGIT_ZERO = ord('0')
+DIGIT_NINE = ord('9')
+COMMA = ord(',')
+MINUS = ord('-')
+
+
+class AmountParser:
+    # Com até 15 dígitos a mantissa é exata em float64, e mantissa / 10^k
+    # arredonda igual à conversão do texto
+    MAX_FAST_DIGITS = 15
+    # Linhas mais longas que isso vão para a conversão original; o limite
+    # também garante que os contadores por linha caibam em uint8
+    MAX_FAST_WIDTH = 32
+    POWERS_OF_TEN = 10 ** np.arange(MAX_FAST_DIGITS + 1, dtype=np.int64)
+
+    def __init__(self, centavos: bool = False):
+        self.centavos = centavos
+
+    def parse(self, values: pd.Series) -> pd.Series:
+        # Formato da ANS: ponto de milhar, vírgula decimal, símbolo de moeda e
+        # sinal opcionais. Só dígitos, vírgula e '-' contam; o resto é ignorado
+        if not isinstance(values.dtype, pd.StringDtype):
+            values = values.astype(str)
+
+        mantissa, scale, negative, valid, slow, has_comma = self._scan(values)
+
+        if self.centavos:
+            parsed = self._to_centavos(mantissa, scale, negative, valid)
+            if slow.any():
+                self._parse_slow_centavos(values, slow, parsed)
+            return pd.Series(parsed, index=values.index, name=values.name)
+
+        if slow.any():
+            return self._parse_slow(values)
+
+        # Mesmo tipo que pd.to_numeric daria: int64 se nenhum valor tem decimais
+        if valid.all() and not has_comma.any():
+            parsed = np.where(negative, -mantissa, mantissa)
+        else:
+            parsed = mantissa / self.POWERS_OF_TEN[scale].astype(np.float64)
+            parsed = np.where(negative, -parsed, parsed)
+            parsed[~valid] = np.nan
+
+        return pd.Series(parsed, index=values.index, name=values.name)
+
+    def _scan(self, values: pd.Series) -> Tuple[np.ndarray, ...]:
+        arrow_values = pa.array(values)
+        chunks = (
+            arrow_values.chunks if isinstance(arrow_values, pa.ChunkedArray)
+            else [arrow_values]
+        )
+
+        parts = [self._scan_chunk(chunk.cast(pa.large_string())) for chunk in chunks]
+        if not parts:
+            return self._scan_chunk(pa.array([], type=pa.large_string()))
+
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def _scan_chunk(self, chunk: pa.Array) -> Tuple[np.ndarray, ...]:
+        n = len(chunk)
+        _, offsets_buffer, data_buffer = chunk.buffers()
+
+        offsets = (
+            np.frombuffer(offsets_buffer, dtype=np.int64)[chunk.offset:chunk.offset + n + 1]
+            if n else np.zeros(1, dtype=np.int64)
+        )
+        data = (
+            np.frombuffer(data_buffer, dtype=np.uint8)[offsets[0]:offsets[-1]]
+            if data_buffer is not None else np.empty(0, dtype=np.uint8)
+        )
+        starts = offsets[:-1] - offsets[0]
+        lengths = np.diff(offsets)
+
+        mantissa = np.zeros(n, dtype=np.int64)
+        scale = np.zeros(n, dtype=np.uint8)
+        digit_count = np.zeros(n, dtype=np.uint8)
+        comma_count = np.zeros(n, dtype=np.uint8)
+        kept_count = np.zeros(n, dtype=np.uint8)
+        negative = np.zeros(n, dtype=bool)
+        misplaced_minus = np.zeros(n, dtype=bool)
+
+        # Uma passada por posição de caractere, sobre todas as linhas de uma vez.
+        # Bytes não ASCII de UTF-8 são >= 0x80 e, como na regex original, são ignorados
+        width = min(int(lengths.max(initial=0)), self.MAX_FAST_WIDTH)
+        for position in range(width):
+            byte = data[np.minimum(starts + position, len(data) - 1)]
+            byte[lengths <= position] = 0
+
+            digit = byte - DIGIT_ZERO
+            is_digit = digit <= 9
+            is_comma = byte == COMMA
+            is_minus = byte == MINUS
+
+            np.copyto(mantissa, mantissa * 10 + digit, where=is_digit)
+            scale += is_digit & (comma_count > 0)
+            # '-' só é aceito como primeiro caractere
+            misplaced_minus |= is_minus & (kept_count > 0)
+            negative |= is_minus
+            digit_count += is_digit
+            comma_count += is_comma
+            kept_count += is_digit | is_comma | is_minus
+
+        valid = (digit_count > 0) & (comma_count <= 1) & ~misplaced_minus
+        if chunk.null_count:
+            valid &= ~chunk.is_null().to_numpy(zero_copy_only=False)
+
+        slow = (lengths > self.MAX_FAST_WIDTH) | (valid & (digit_count > self.MAX_FAST_DIGITS))
+        valid |= slow
+
+        mantissa[slow | ~valid] = 0
+        scale[slow | ~valid] = 0
+        return mantissa, scale.astype(np.intp), negative, valid, slow, valid & (comma_count > 0)
+
+    def _to_centavos(self, mantissa: np.ndarray, scale: np.ndarray, negative: np.ndarray, valid: np.ndarray) -> pd.arrays.IntegerArray:
+        centavos = mantissa * self.POWERS_OF_TEN[np.clip(2 - scale, 0, 2)]
+
+        # Mais de duas casas decimais: arredondamento bancário, como Decimal
+        extra = scale > 2
+        if extra.any():
+            divisor = self.POWERS_OF_TEN[scale[extra] - 2]
+            quotient, remainder = np.divmod(mantissa[extra], divisor)
+            half = divisor // 2
+            round_up = (remainder > half) | ((remainder == half) & (quotient % 2 == 1))
+            centavos[extra] = quotient + round_up
+
+        centavos = np.where(negative, -centavos, centavos)
+        return pd.arrays.IntegerArray(centavos, ~valid)
+
+    def _parse_slow(self, values: pd.Series) -> pd.Series:
+        # Valores com mais de 15 dígitos: conversão original, coluna inteira
+        return pd.to_numeric(self._clean_text(values), errors='coerce')
+
+    def _parse_slow_centavos(self, values: pd.Series, slow: np.ndarray, parsed: pd.arrays.IntegerArray):
+        texts: List[str] = self._clean_text(values[slow]).tolist()
+        positions = np.flatnonzero(slow)
+
+        for position, text in zip(positions, texts):
+            try:
+                centavos = int(Decimal(text).scaleb(2).quantize(
+                    Decimal(1), rounding=ROUND_HALF_EVEN))
+            except InvalidOperation:
+                centavos = None
+
+            if centavos is not None and abs(centavos) >= 2 ** 63:
+                logger.warning(f"  └─ Valor fora do intervalo em centavos: {text}")
+                centavos = None
+
+            parsed[position] = pd.NA if centavos is None else centavos
+
+    @staticmethod
+    def _clean_text(values: pd.Series) -> pd.Series:
+        return (
+            values
+            .str.replace('.', '', regex=False)
+            .str.replace(',', '.', regex=False)
+            .str.replace(r'[^0-9.\-]', '', regex=True)
+        )
@@ -1,68 +1,385 @@
+import json
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
 import re
-from typing import Tuple
+import shutil
+from typing import List, Optional, Set, Tuple
 
-from readers import FileReader
+from readers import DataSource, FileReader, ZipMember
 from filters import AccountFilter
 from cleaners import DataCleaner
+from parsers import AmountParser
+from manifest import QuarterManifest
+from config import consts
+from pipeline.centavos import format_centavos, to_reais
+from pipeline.compact import concat_compact, to_compact
+from pipeline.instrumentation import active_run, call_measured, init_worker
 
 logger = logging.getLogger(__name__)
 
 
 class ExpensesProcessor:
-    def __init__(self, extracted_dir: Path, output_file: Path, target_account: str = "411"):
+    # Incrementar sempre que a leitura, o filtro, a limpeza ou a conversão de
+    # valores mudarem os bytes das partições: versões anteriores são reprocessadas
+    PROCESSOR_VERSION = "2"
+    FINAL_COLUMNS = ['CNPJ', 'RazaoSocial', 'Trimestre', 'Ano', 'ValorDespesas']
+
+    def __init__(
+        self,
+        extracted_dir: Path,
+        output_file: Path,
+        target_account: str = "411",
+        streaming: bool = False,
+        chunk_size: int = 10000,
+        max_workers: int = 1,
+        dialect_cache_file: Optional[Path] = None,
+        parquet_dir: Optional[Path] = None,
+        compact_dtypes: bool = False,
+        centavos: bool = False,
+        fused_cleaning: bool = False
+    ):
         self.extracted_dir = extracted_dir
         self.output_file = output_file
-
-        self.reader = FileReader()
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.parquet_dir = parquet_dir
+        self.compact_dtypes = compact_dtypes
+        self.centavos = centavos
+        self._parquet_parts = 0
+        self._failed_files = 0
+
+        self.reader = FileReader(dialect_cache_file=dialect_cache_file)
         self.filter = AccountFilter(target_account=target_account)
-        self.cleaner = DataCleaner()
+        self.cleaner = DataCleaner(fused=fused_cleaning)
+        self.amount_parser = AmountParser(centavos=centavos)
+
+    def run(self, zip_files: Optional[List[Path]] = None):
+        if self.streaming:
+            data_files = self._find_data_files(zip_files)
+            if self._run_streaming(data_files) > 0:
+                self._log_cleaning_report()
+            return
+
+        final_df = self.build(zip_files)
+
+        if final_df is None:
+            self._reset_output()
+            logger.warning(
+                f"Nenhuma linha consolidada; {self.output_file.name} gravado só com o cabeçalho")
+            return
+
+        self.export(final_df)
 
-    def run(self):
-        data_files = self.reader.find_files(self.extracted_dir)
+    def build(self, zip_files: Optional[List[Path]] = None) -> Optional[pd.DataFrame]:
+        # Consolida em memória, sem gravar nada; usado também pelo pipeline unificado
+        data_files = self._find_data_files(zip_files)
 
         if not data_files:
+            return None
+
+        final_df = self.consolidate(data_files)
+
+        if final_df is not None:
+            self._log_cleaning_report()
+
+        return final_df
+
+    def export(self, df: pd.DataFrame):
+        self._export(df)
+
+    def _find_data_files(self, zip_files: Optional[List[Path]]) -> List[DataSource]:
+        if zip_files is not None:
+            return self.reader.find_zip_members(zip_files)
+        return self.reader.find_files(self.extracted_dir)
+
+    def processing_key(self) -> str:
+        # Só o que muda os bytes das partições CSV. Streaming, tipos compactos,
+        # limpeza fundida e Parquet geram o mesmo CSV; centavos muda o
+        # arredondamento de valores com mais de duas casas (meio para o par)
+        options = {
+            'versao': self.PROCESSOR_VERSION,
+            'conta': self.filter.target_account,
+            'centavos': self.centavos
+        }
+        return json.dumps(options, sort_keys=True)
+
+    def run_incremental(self, zip_files: List[Path], manifest: QuarterManifest):
+        processing_key = self.processing_key()
+        partitions = []
+        reprocessed: Set[Tuple[int, int]] = set()
+
+        for zip_path in sorted(zip_files):
+            quarter = zip_path.stem
+            trimestre, ano = self._extract_trimester_and_year(quarter)
+            partition_path = manifest.partition_path(quarter)
+            partitions.append(((ano, trimestre), partition_path))
+            source_hash = QuarterManifest.hash_file(zip_path)
+
+            if manifest.is_current(quarter, source_hash, processing_key):
+                logger.info(f"  └─ {quarter} sem alterações, partição reaproveitada")
+                continue
+
+            logger.info(f"  └─ Processando {quarter}")
+            self._failed_files = 0
+            row_count = self._process_partition(zip_path, partition_path)
+            reprocessed.add((ano, trimestre))
+
+            # Trimestre vazio ou com falha de leitura não entra no manifesto e
+            # é tentado de novo na próxima execução
+            if row_count == 0 or self._failed_files > 0:
+                logger.warning(
+                    f"  └─ {quarter}: {row_count} linhas, {self._failed_files} arquivos com erro; "
+                    f"partição não registrada no manifesto")
+                continue
+
+            manifest.update(
+                quarter, zip_path, source_hash, processing_key,
+                row_count, trimestre, ano
+            )
+            manifest.save()
+
+        self._merge_partitions(sorted(partitions), reprocessed, processing_key)
+        self._log_cleaning_report()
+
+    def consolidate(self, data_files: List[DataSource]) -> Optional[pd.DataFrame]:
+        if self.max_workers > 1:
+            all_expenses = self._process_files_parallel(data_files)
+        else:
+            all_expenses = self._process_files_serial(data_files)
+
+        if not all_expenses:
+            return None
+
+        # Cada arquivo já chega compacto: a concatenação não passa por object
+        if self.compact_dtypes:
+            consolidated = concat_compact(all_expenses)
+        else:
+            consolidated = pd.concat(all_expenses, ignore_index=True)
+
+        logger.info("TRATAMENTO DE INCONSISTÊNCIAS")
+        cleaned = self.cleaner.clean(consolidated)
+
+        return self._normalize_to_final_format(cleaned)
+
+    def _process_partition(self, zip_path: Path, partition_path: Path) -> int:
+        data_files = self.reader.find_zip_members([zip_path])
+        row_count = 0
+
+        if data_files and self.streaming:
+            row_count = self._run_streaming(data_files, partition_path)
+        elif data_files:
+            final_df = self.consolidate(data_files)
+            if final_df is not None:
+                self._export(final_df, output_file=partition_path)
+                row_count = len(final_df)
+
+        if row_count == 0:
+            self._reset_output(partition_path)
+
+        return row_count
+
+    def _merge_partitions(
+        self,
+        partitions: List[Tuple[Tuple[int, int], Path]],
+        reprocessed: Set[Tuple[int, int]],
+        processing_key: str
+    ):
+        if not partitions:
             return
 
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Concatena as partições como texto: o cabeçalho vem só da primeira
+        with open(self.output_file, "wb") as output:
+            for index, (_, partition_path) in enumerate(partitions):
+                with open(partition_path, "rb") as partition:
+                    header = partition.readline()
+                    if index == 0:
+                        output.write(header)
+                    shutil.copyfileobj(partition, output)
+
+        if self.parquet_dir is not None:
+            self._sync_parquet_partitions(partitions, reprocessed, processing_key)
+
+    def _sync_parquet_partitions(
+        self,
+        partitions: List[Tuple[Tuple[int, int], Path]],
+        reprocessed: Set[Tuple[int, int]],
+        processing_key: str
+    ):
+        # O dataset já é particionado por Ano=/Trimestre=: só os trimestres
+        # reprocessados (ou ausentes) são regravados. Um dataset gravado por
+        # outra chave ou pelo modo completo é refeito do zero
+        state_file = self.parquet_dir / consts.PARQUET_STATE_FILENAME
+        if self._read_parquet_state(state_file) != processing_key:
+            shutil.rmtree(self.parquet_dir, ignore_errors=True)
+
+        quarters = dict(partitions)
+
+        # Trimestres que saíram do histórico
+        for quarter_dir in self.parquet_dir.glob("*=*/*=*"):
+            if self._parquet_quarter(quarter_dir) not in quarters:
+                shutil.rmtree(quarter_dir, ignore_errors=True)
+                if not any(quarter_dir.parent.iterdir()):
+                    quarter_dir.parent.rmdir()
+
+        for quarter, partition_path in partitions:
+            quarter_dir = self._parquet_quarter_dir(quarter)
+            if quarter not in reprocessed and quarter_dir.exists():
+                continue
+
+            shutil.rmtree(quarter_dir, ignore_errors=True)
+            partition_df = pd.read_csv(
+                partition_path, dtype=consts.CONSOLIDADO_DTYPES)
+            # As partições voltam do CSV já em reais
+            if not partition_df.empty:
+                self._export_parquet(partition_df, append=True, reais=True)
+
+        self.parquet_dir.mkdir(parents=True, exist_ok=True)
+        with open(state_file, "w", encoding="utf-8") as file:
+            json.dump({'processing_key': processing_key}, file)
+
+    def _parquet_quarter_dir(self, quarter: Tuple[int, int]) -> Path:
+        ano, trimestre = quarter
+        return self.parquet_dir / f"Ano={ano}" / f"Trimestre={trimestre}"
+
+    def _parquet_quarter(self, quarter_dir: Path) -> Optional[Tuple[int, int]]:
+        try:
+            return (
+                int(quarter_dir.parent.name.split("=", 1)[1]),
+                int(quarter_dir.name.split("=", 1)[1])
+            )
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _read_parquet_state(state_file: Path) -> Optional[str]:
+        try:
+            with open(state_file, "r", encoding="utf-8") as file:
+                return json.load(file).get('processing_key')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _process_files_serial(self, data_files: List[DataSource]) -> List[pd.DataFrame]:
         all_expenses = []
 
         for data_file in data_files:
             try:
-                df = self.reader.read(data_file)
-                if df is None:
-                    continue
+                normalized_df = self._process_file(data_file)
+            except Exception as e:
+                logger.error(f"Erro ao processar {data_file.name}: {e}")
+                self._failed_files += 1
+                continue
 
-                expenses_df = self.filter.filter(df)
+            if normalized_df is not None:
+                all_expenses.append(normalized_df)
 
-                if expenses_df.empty:
+        return all_expenses
+
+    def _process_files_parallel(self, data_files: List[DataSource]) -> List[pd.DataFrame]:
+        all_expenses = []
+        workers = min(self.max_workers, len(data_files))
+
+        # Leitura e filtro são medidos nos processos do pool e somados ao relatório daqui
+        run = active_run()
+        trace_memory = run.trace_memory if run is not None else None
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            futures = [
+                executor.submit(call_measured, trace_memory, self._process_file, data_file)
+                for data_file in data_files
+            ]
+
+            for data_file, future in zip(data_files, futures):
+                try:
+                    normalized_df, worker_stages = future.result()
+                except Exception as e:
+                    logger.error(f"Erro ao processar {data_file.name}: {e}")
+                    self._failed_files += 1
                     continue
 
-                trimestre, ano = self._extract_trimester_and_year(
-                    data_file.parent.name)
-                normalized_df = self._extract_fields(
-                    expenses_df, trimestre, ano)
+                if run is not None:
+                    run.merge_stages(worker_stages)
 
-                if not normalized_df.empty:
+                if normalized_df is not None:
                     all_expenses.append(normalized_df)
 
-            except Exception as e:
-                logger.error(f"Erro ao processar {data_file.name}: {e}")
-                continue
+        return all_expenses
 
-        if not all_expenses:
-            return
+    def _process_file(self, data_file: DataSource) -> Optional[pd.DataFrame]:
+        df = self.reader.read(data_file)
+        if df is None:
+            raise ValueError("arquivo não pôde ser lido")
 
-        consolidated = pd.concat(all_expenses, ignore_index=True)
+        expenses_df = self.filter.filter(df)
 
-        logger.info("TRATAMENTO DE INCONSISTÊNCIAS")
-        cleaned = self.cleaner.clean(consolidated)
+        if expenses_df.empty:
+            return None
 
-        final_df = self._normalize_to_final_format(cleaned)
+        trimestre, ano = self._extract_trimester_and_year(
+            self._trimester_source_name(data_file))
+        normalized_df = self._extract_fields(expenses_df, trimestre, ano)
 
-        self._export(final_df)
-        self._log_cleaning_report()
+        if normalized_df.empty:
+            return None
+
+        if self.compact_dtypes:
+            return to_compact(normalized_df)
+
+        return normalized_df
+
+    def _run_streaming(self, data_files: List[DataSource], output_file: Optional[Path] = None) -> int:
+        # Os blocos são sempre anexados a uma saída recriada aqui: mesmo sem
+        # nenhuma linha, o resultado da execução anterior não fica para trás
+        self._reset_output(output_file)
+        rows_written = 0
+
+        for data_file in data_files:
+            try:
+                trimestre, ano = self._extract_trimester_and_year(
+                    self._trimester_source_name(data_file))
+
+                for chunk in self.reader.read_chunks(data_file, self.chunk_size):
+                    expenses_df = self.filter.filter(chunk)
+
+                    if expenses_df.empty:
+                        continue
+
+                    normalized_df = self._extract_fields(
+                        expenses_df, trimestre, ano)
+
+                    if normalized_df.empty:
+                        continue
+
+                    if self.compact_dtypes:
+                        normalized_df = to_compact(normalized_df)
+
+                    cleaned = self.cleaner.clean_chunk(normalized_df)
+                    final_df = self._normalize_to_final_format(cleaned)
+
+                    if final_df.empty:
+                        continue
+
+                    self._export(final_df, append=True, output_file=output_file)
+                    rows_written += len(final_df)
+
+            except Exception as e:
+                logger.error(f"Erro ao processar {data_file.name}: {e}")
+                self._failed_files += 1
+                continue
+
+        if rows_written > 0:
+            logger.info("TRATAMENTO DE INCONSISTÊNCIAS")
+            self.cleaner.finish_stream()
+        else:
+            target = output_file or self.output_file
+            logger.warning(
+                f"Nenhuma linha consolidada; {target.name} gravado só com o cabeçalho")
+
+        return rows_written
 
     def _extract_fields(self, df: pd.DataFrame, trimestre: int, ano: int) -> pd.DataFrame:
         result = pd.DataFrame()
@@ -86,20 +403,18 @@ class ExpensesProcessor:
         result['Ano'] = ano
 
         if 'valor' in col_mapping:
-            valor_col = col_mapping['valor']
-            result['ValorDespesas'] = (
-                df[valor_col]
-                .astype(str)
-                .str.replace('.', '', regex=False)
-                .str.replace(',', '.', regex=False)
-                .str.replace(r'[^0-9.\-]', '', regex=True)
-            )
-            result['ValorDespesas'] = pd.to_numeric(
-                result['ValorDespesas'], errors='coerce')
+            result['ValorDespesas'] = self.amount_parser.parse(
+                df[col_mapping['valor']])
         else:
-            result['ValorDespesas'] = 0.0
+            result['ValorDespesas'] = 0 if self.centavos else 0.0
+
+        result = result.dropna(subset=['ValorDespesas'])
 
-        return result.dropna(subset=['ValorDespesas'])
+        # Sem valores ausentes, os centavos ficam em int64 comum
+        if self.centavos:
+            return result.astype({'ValorDespesas': 'int64'})
+
+        return result
 
     def _identify_columns(self, df: pd.DataFrame) -> dict:
         mapping = {}
@@ -118,6 +433,11 @@ class ExpensesProcessor:
 
         return mapping
 
+    def _trimester_source_name(self, data_file: DataSource) -> str:
+        if isinstance(data_file, ZipMember):
+            return data_file.zip_path.stem
+        return data_file.parent.name
+
     def _extract_trimester_and_year(self, folder_name: str) -> Tuple[int, int]:
         match = re.search(r'(\d)T(\d{4})', folder_name)
         if match:
@@ -128,23 +448,64 @@ class ExpensesProcessor:
 
         df['CNPJ'] = df['REG_ANS'] if 'REG_ANS' in df.columns else ''
         df = df[df['CNPJ'].notna() & (df['CNPJ'] != '')]
-        df['RazaoSocial'] = df['RazaoSocial'].fillna('NÃO INFORMADO')
+        razao_social = df['RazaoSocial']
+        if isinstance(razao_social.dtype, pd.CategoricalDtype) and \
+                'NÃO INFORMADO' not in razao_social.cat.categories:
+            razao_social = razao_social.cat.add_categories('NÃO INFORMADO')
+        df['RazaoSocial'] = razao_social.fillna('NÃO INFORMADO')
 
-        final_columns = ['CNPJ', 'RazaoSocial',
-                         'Trimestre', 'Ano', 'ValorDespesas']
-        return df[final_columns].copy()
+        return df[self.FINAL_COLUMNS].copy()
 
-    def _export(self, df: pd.DataFrame):
-        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+    def _reset_output(self, output_file: Optional[Path] = None):
+        if output_file is None and self.parquet_dir is not None:
+            shutil.rmtree(self.parquet_dir, ignore_errors=True)
+            self._parquet_parts = 0
+
+        output_file = output_file or self.output_file
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(columns=self.FINAL_COLUMNS).to_csv(
+            output_file, index=False, sep=',', encoding='utf-8')
+
+    def _export(self, df: pd.DataFrame, append: bool = False, output_file: Optional[Path] = None):
+        # Partições do modo incremental são sempre CSV; só a saída final vira Parquet
+        if output_file is None and self.parquet_dir is not None:
+            self._export_parquet(df, append)
+
+        output_file = output_file or self.output_file
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Os arquivos continuam em reais com duas casas, formatados sem passar por float
+        if self.centavos:
+            df = df.assign(ValorDespesas=format_centavos(df['ValorDespesas']))
 
         df.to_csv(
-            self.output_file,
+            output_file,
+            mode='a' if append else 'w',
+            header=not append,
             index=False,
             sep=',',
             encoding='utf-8',
             float_format='%.2f'
         )
 
+    def _export_parquet(self, df: pd.DataFrame, append: bool = False, reais: bool = False):
+        if not append:
+            shutil.rmtree(self.parquet_dir, ignore_errors=True)
+            self._parquet_parts = 0
+
+        if self.centavos and not reais:
+            df = df.assign(ValorDespesas=to_reais(df['ValorDespesas']))
+
+        # Nome sequencial mantém a ordem dos blocos na leitura do dataset
+        df.astype(consts.CONSOLIDADO_DTYPES).to_parquet(
+            self.parquet_dir,
+            engine='pyarrow',
+            index=False,
+            partition_cols=consts.PARQUET_PARTITION_COLS,
+            basename_template=f"part-{self._parquet_parts:05d}-{{i}}.parquet"
+        )
+        self._parquet_parts += 1
+
     def _log_cleaning_report(self):
         report = self.cleaner.get_cleaning_report()
 
@@ -1,16 +1,68 @@
+import codecs
+import csv
+import hashlib
+import io
+import json
 import logging
-from pathlib import Path
+import os
+import zipfile
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
 import pandas as pd
-from typing import Optional
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from pipeline.instrumentation import instrumented, instrumented_chunks
 
 logger = logging.getLogger(__name__)
 
 
+class ZipMember(NamedTuple):
+    zip_path: Path
+    member: str
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.member).name
+
+    @property
+    def suffix(self) -> str:
+        return PurePosixPath(self.member).suffix
+
+
+DataSource = Union[Path, ZipMember]
+
+
+def _latin1_fallback(error: UnicodeError) -> Tuple[str, int]:
+    # Bytes inválidos no encoding detectado são lidos como latin1, que aceita
+    # qualquer byte; o resto do arquivo continua no encoding detectado
+    return bytes(error.object[error.start:error.end]).decode("latin1"), error.end
+
+
+codecs.register_error("latin1_fallback", _latin1_fallback)
+
+
 class FileReader:
     SUPPORTED_SEPARATORS = [";", ",", "\t", "|"]
-    SUPPORTED_ENCODINGS = ["latin1", "utf-8", "cp1252"]
+    # latin1 aceita qualquer sequência de bytes, por isso é testado por último
+    SUPPORTED_ENCODINGS = ["utf-8", "cp1252", "latin1"]
+    BOM_ENCODINGS = [
+        (codecs.BOM_UTF8, "utf-8-sig"),
+        (codecs.BOM_UTF16_LE, "utf-16"),
+        (codecs.BOM_UTF16_BE, "utf-16"),
+    ]
+    SNIFF_SAMPLE_BYTES = 64 * 1024
+    # A amostra só cobre o início do arquivo; um byte inválido depois dela não
+    # interrompe a leitura, inteira ou em blocos
+    DECODE_ERRORS = "latin1_fallback"
+    SNIFF_MAX_LINES = 50
+
+    def __init__(self, dialect_cache_file: Optional[Path] = None):
+        self.dialect_cache_file = dialect_cache_file
+        self._dialect_cache: Dict[str, Dict[str, str]] = self._load_dialect_cache()
 
-    def read(self, path: Path) -> Optional[pd.DataFrame]:
+    @instrumented("reader")
+    def read(self, path: DataSource) -> Optional[pd.DataFrame]:
         extension = path.suffix.lower()
 
         if extension in [".csv", ".txt"]:
@@ -21,32 +73,178 @@ class FileReader:
             logger.warning(f"Formato não suportado: {extension}")
             return None
 
-    def _read_text_file(self, path: Path) -> Optional[pd.DataFrame]:
-        for sep in self.SUPPORTED_SEPARATORS:
-            for encoding in self.SUPPORTED_ENCODINGS:
-                try:
-                    df = pd.read_csv(
-                        path,
-                        sep=sep,
-                        encoding=encoding,
-                        dtype=str,
-                        on_bad_lines='skip'
-                    )
-
-                    if len(df.columns) > 1:
-                        logger.debug(
-                            f"  └─ Detectado separador: '{sep}', encoding: {encoding}")
-                        return df
-
-                except Exception:
-                    continue
-
-        logger.error(f"Não foi possível ler o arquivo: {path}")
+    def _read_text_file(self, path: DataSource) -> Optional[pd.DataFrame]:
+        dialect = self._detect_dialect(path)
+
+        if dialect is None:
+            logger.error(f"Não foi possível ler o arquivo: {path}")
+            return None
+
+        sep, encoding = dialect
+
+        with self._open_source(path) as file:
+            return pd.read_csv(
+                file,
+                sep=sep,
+                encoding=encoding,
+                encoding_errors=self.DECODE_ERRORS,
+                dtype=str,
+                on_bad_lines='skip'
+            )
+
+    @instrumented_chunks("reader")
+    def read_chunks(self, path: DataSource, chunk_size: int) -> Iterator[pd.DataFrame]:
+        extension = path.suffix.lower()
+
+        if extension in [".csv", ".txt"]:
+            yield from self._read_text_file_chunks(path, chunk_size)
+        elif extension == ".xlsx":
+            df = self._read_excel_file(path)
+            if df is None:
+                return
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size]
+        else:
+            logger.warning(f"Formato não suportado: {extension}")
+
+    def _read_text_file_chunks(self, path: DataSource, chunk_size: int) -> Iterator[pd.DataFrame]:
+        dialect = self._detect_dialect(path)
+
+        # Um gerador vazio seria indistinguível de um arquivo sem linhas
+        if dialect is None:
+            raise ValueError(f"Não foi possível ler o arquivo: {path}")
+
+        sep, encoding = dialect
+        with self._open_source(path) as file, pd.read_csv(
+            file,
+            sep=sep,
+            encoding=encoding,
+            encoding_errors=self.DECODE_ERRORS,
+            dtype=str,
+            on_bad_lines='skip',
+            chunksize=chunk_size
+        ) as chunks:
+            yield from chunks
+
+    @contextmanager
+    def _open_source(self, path: DataSource) -> Iterator[BinaryIO]:
+        if isinstance(path, ZipMember):
+            with zipfile.ZipFile(path.zip_path, "r") as zip_ref, zip_ref.open(path.member) as file:
+                yield file
+        else:
+            with open(path, "rb") as file:
+                yield file
+
+    def _source_size(self, path: DataSource) -> int:
+        if isinstance(path, ZipMember):
+            with zipfile.ZipFile(path.zip_path, "r") as zip_ref:
+                return zip_ref.getinfo(path.member).file_size
+        return path.stat().st_size
+
+    def _detect_dialect(self, path: DataSource) -> Optional[Tuple[str, str]]:
+        with self._open_source(path) as file:
+            sample = file.read(self.SNIFF_SAMPLE_BYTES)
+            truncated = bool(file.read(1))
+
+        cache_key = self._dialect_cache_key(path, sample)
+        cached = self._dialect_cache.get(cache_key)
+        if cached is not None:
+            return cached["sep"], cached["encoding"]
+
+        decoded = self._decode_sample(sample, truncated)
+        if decoded is None:
+            return None
+
+        text, encoding = decoded
+        lines = text.splitlines()
+        if truncated and len(lines) > 1:
+            lines = lines[:-1]
+
+        sep = self._sniff_separator(lines[:self.SNIFF_MAX_LINES])
+        if sep is None:
+            return None
+
+        logger.debug(
+            f"  └─ Detectado separador: '{sep}', encoding: {encoding}")
+        self._store_dialect(cache_key, sep, encoding)
+
+        return sep, encoding
+
+    def _decode_sample(self, sample: bytes, truncated: bool) -> Optional[Tuple[str, str]]:
+        for bom, encoding in self.BOM_ENCODINGS:
+            if sample.startswith(bom):
+                decoder = codecs.getincrementaldecoder(encoding)()
+                return decoder.decode(sample, final=not truncated), encoding
+
+        for encoding in self.SUPPORTED_ENCODINGS:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+            try:
+                return decoder.decode(sample, final=not truncated), encoding
+            except UnicodeDecodeError:
+                continue
+
         return None
 
-    def _read_excel_file(self, path: Path) -> Optional[pd.DataFrame]:
+    def _sniff_separator(self, lines: List[str]) -> Optional[str]:
+        best_sep = None
+        best_score = (0.0, 1)
+
+        for sep in self.SUPPORTED_SEPARATORS:
+            field_counts = [len(row) for row in csv.reader(lines, delimiter=sep) if row]
+            if not field_counts:
+                continue
+
+            modal_count, frequency = Counter(field_counts).most_common(1)[0]
+            if modal_count < 2:
+                continue
+
+            score = (frequency / len(field_counts), modal_count)
+            if score > best_score:
+                best_sep, best_score = sep, score
+
+        return best_sep
+
+    def _dialect_cache_key(self, path: DataSource, sample: bytes) -> str:
+        digest = hashlib.blake2b(sample, digest_size=16).hexdigest()
+        return f"{digest}-{self._source_size(path)}"
+
+    def _store_dialect(self, cache_key: str, sep: str, encoding: str):
+        self._dialect_cache[cache_key] = {"sep": sep, "encoding": encoding}
+        self._save_dialect_cache()
+
+    def _load_dialect_cache(self) -> Dict[str, Dict[str, str]]:
+        if self.dialect_cache_file is None or not self.dialect_cache_file.exists():
+            return {}
+
         try:
-            df = pd.read_excel(path, dtype=str)
+            with open(self.dialect_cache_file, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache de formatos ignorado: {e}")
+            return {}
+
+    def _save_dialect_cache(self):
+        if self.dialect_cache_file is None:
+            return
+
+        # Outros processos podem ter gravado entradas desde a leitura inicial
+        merged = self._load_dialect_cache()
+        merged.update(self._dialect_cache)
+        self._dialect_cache = merged
+
+        self.dialect_cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.dialect_cache_file.with_name(
+            f"{self.dialect_cache_file.name}.{os.getpid()}.tmp")
+
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(merged, file, indent=2)
+
+        tmp_file.replace(self.dialect_cache_file)
+
+    def _read_excel_file(self, path: DataSource) -> Optional[pd.DataFrame]:
+        try:
+            with self._open_source(path) as file:
+                df = pd.read_excel(io.BytesIO(file.read()), dtype=str)
             logger.debug(f"  └─ Arquivo Excel lido com sucesso")
             return df
         except Exception as e:
@@ -62,3 +260,17 @@ class FileReader:
             files.extend(directory.rglob(f"*{ext}"))
 
         return sorted(files)
+
+    def find_zip_members(self, zip_files: List[Path], extensions: list[str] = None) -> List[ZipMember]:
+        if extensions is None:
+            extensions = ['.csv', '.txt', '.xlsx']
+
+        members = []
+        for zip_path in zip_files:
+            with zipfile.ZipFile(zip_path, "r") as zip_ref:
+                for info in zip_ref.infolist():
+                    member = ZipMember(zip_path, info.filename)
+                    if not info.is_dir() and member.suffix.lower() in extensions:
+                        members.append(member)
+
+        return sorted(members)
@@ -2,6 +2,11 @@ import logging
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from typing import Optional, Tuple
+
+from config import consts
+from pipeline.centavos import CENTAVOS_POR_REAL, format_brl_centavos, format_centavos, to_reais
+from pipeline.instrumentation import instrumented
 
 from utils.aggregation import (
     AggregationStats,
@@ -13,16 +18,25 @@ logger = logging.getLogger(__name__)
 
 
 class DataAggregator:
-    def __init__(self) -> None:
+    def __init__(self, centavos: bool = False) -> None:
+        # Com centavos, ValorDespesas e TotalDespesas são int64 e os totais são exatos
+        self.centavos = centavos
         self.aggregation_stats: AggregationStats = {
             'original_records': 0,
             'aggregated_groups': 0,
             'trimestres_por_grupo': {}
         }
 
-    def aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
-        self.aggregation_stats['original_records'] = len(df)
+    @instrumented("aggregator")
+    def aggregate(self, df: pd.DataFrame, top_n: Optional[int] = None) -> pd.DataFrame:
+        self.aggregation_stats['original_records'] += len(df)
+
+        df_clean = self._select_groupable(df)
+        grouped = self._aggregate_groups(df_clean)
+
+        return self._finish(grouped, top_n)
 
+    def _select_groupable(self, df: pd.DataFrame) -> pd.DataFrame:
         if 'UF' not in df.columns:
             logger.error("ERRO: Coluna 'UF' não encontrada no DataFrame.")
             logger.error(
@@ -32,47 +46,17 @@ class DataAggregator:
                 "Coluna 'UF' não encontrada. Verifique se o enriquecimento foi bem-sucedido.")
 
         df_clean = df.dropna(subset=['RazaoSocial', 'UF'])
-        df_clean = df_clean[(df_clean['RazaoSocial'] != '')
-                            & (df_clean['UF'] != '')]
-
-        grouped = df_clean.groupby(['RazaoSocial', 'UF'], as_index=False).agg({
-            'ValorDespesas': [
-                ('TotalDespesas', 'sum'),
-                ('MediaDespesasTrimestre', 'mean'),
-                ('DesvioPadraoDespesas', 'std'),
-                ('NumeroRegistros', 'count')
-            ]
-        })
-
-        grouped.columns = ['_'.join(col).strip('_') if col[1] else col[0]
-                           for col in grouped.columns.values]
-
-        grouped = grouped.rename(columns={
-            'ValorDespesas_TotalDespesas': 'TotalDespesas',
-            'ValorDespesas_MediaDespesasTrimestre': 'MediaDespesasTrimestre',
-            'ValorDespesas_DesvioPadraoDespesas': 'DesvioPadraoDespesas',
-            'ValorDespesas_NumeroRegistros': 'NumeroRegistros'
-        })
-
-        grouped['DesvioPadraoDespesas'] = grouped['DesvioPadraoDespesas'].fillna(
-            0)
-
-        trimestres_por_grupo = df_clean.groupby(['RazaoSocial', 'UF'])[
-            'Trimestre'].nunique().reset_index()
-        trimestres_por_grupo = trimestres_por_grupo.rename(
-            columns={'Trimestre': 'NumeroTrimestres'})
-
-        grouped = grouped.merge(trimestres_por_grupo, on=[
-                                'RazaoSocial', 'UF'], how='left')
+        return df_clean[(df_clean['RazaoSocial'] != '')
+                        & (df_clean['UF'] != '')]
 
+    def _finish(self, grouped: pd.DataFrame, top_n: Optional[int]) -> pd.DataFrame:
         grouped['CoeficienteVariacao'] = (
             grouped['DesvioPadraoDespesas'] / grouped['MediaDespesasTrimestre']
         ).replace([np.inf, -np.inf], 0).fillna(0)
 
         self.aggregation_stats['aggregated_groups'] = len(grouped)
 
-        grouped_sorted = grouped.sort_values(
-            'TotalDespesas', ascending=False).reset_index(drop=True)
+        grouped_sorted = self._sort_by_total(grouped, top_n)
 
         self._print_aggregation_report(grouped_sorted)
         self._print_top_operadoras(grouped_sorted)
@@ -80,14 +64,101 @@ class DataAggregator:
 
         return grouped_sorted
 
+    def _aggregate_groups(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Códigos ordenados por (RazaoSocial, UF): mesma ordem do groupby
+        razao_codes, razao_values = pd.factorize(df['RazaoSocial'], sort=True)
+        uf_codes, uf_values = pd.factorize(df['UF'], sort=True)
+        n_ufs = max(len(uf_values), 1)
+        pair_codes = razao_codes.astype(np.int64) * n_ufs + uf_codes
+        group_pairs, group_ids = np.unique(pair_codes, return_inverse=True)
+        n_groups = len(group_pairs)
+
+        values, present, counts, totals = self._sum_by_group(df, group_ids, n_groups)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = totals / counts
+            deviations = np.where(present, values - means[group_ids], 0.0)
+            m2 = np.bincount(group_ids, weights=deviations ** 2, minlength=n_groups)
+            std = np.where(counts > 1, np.sqrt(m2 / (counts - 1)), 0.0)
+
+        trimestre_codes, trimestre_values = pd.factorize(df['Trimestre'])
+        n_quarters = max(len(trimestre_values), 1)
+        observed = trimestre_codes >= 0
+        group_quarters = np.unique(
+            group_ids[observed] * n_quarters + trimestre_codes[observed])
+        num_trimestres = np.bincount(
+            group_quarters // n_quarters, minlength=n_groups)
+
+        grouped = pd.DataFrame({
+            'RazaoSocial': razao_values.take(group_pairs // n_ufs),
+            'UF': uf_values.take(group_pairs % n_ufs),
+            'TotalDespesas': totals,
+            'MediaDespesasTrimestre': means,
+            'DesvioPadraoDespesas': std,
+            'NumeroRegistros': counts,
+            'NumeroTrimestres': num_trimestres.astype(np.int64)
+        })
+
+        return grouped
+
+    def _sum_by_group(self, df: pd.DataFrame, group_ids: np.ndarray, n_groups: int) -> Tuple[np.ndarray, ...]:
+        column = df['ValorDespesas']
+
+        if not self.centavos:
+            values = column.to_numpy(dtype=np.float64)
+            present = ~np.isnan(values)
+            totals = np.bincount(
+                group_ids, weights=np.where(present, values, 0.0),
+                minlength=n_groups).astype(np.float64, copy=False)
+        else:
+            # Soma inteira: sem acúmulo de erro de float no total de cada grupo
+            present = column.notna().to_numpy()
+            centavos = column.to_numpy(dtype=np.int64, na_value=0)
+            totals = np.zeros(n_groups, dtype=np.int64)
+            np.add.at(totals, group_ids, centavos)
+            values = np.where(present, centavos, np.nan)
+
+        counts = np.bincount(
+            group_ids, weights=present, minlength=n_groups).astype(np.int64)
+
+        return values, present, counts, totals
+
+    def _sort_by_total(self, grouped: pd.DataFrame, top_n: Optional[int]) -> pd.DataFrame:
+        # Para top-N, argpartition seleciona os candidatos sem ordenar todos os grupos
+        if top_n is not None and top_n < len(grouped):
+            totals = grouped['TotalDespesas'].to_numpy()
+            grouped = grouped.iloc[np.argpartition(-totals, top_n)[:top_n]]
+
+        return grouped.sort_values(
+            'TotalDespesas', ascending=False).reset_index(drop=True)
+
     def _print_aggregation_report(self, df: pd.DataFrame):
-        pass
+        original = self.aggregation_stats['original_records']
+        groups = self.aggregation_stats['aggregated_groups']
 
-    def _print_top_operadoras(self, df: pd.DataFrame):
-        pass
+        logger.info(f"  └─ {original} registros agregados em {groups} grupos")
+        if groups > 0:
+            logger.info(f"  └─ Taxa de compressão: {original / groups:.1f}x")
+            logger.info(
+                f"  └─ Total de despesas: {self._format_brl(df['TotalDespesas'].sum())}")
+
+    def _print_top_operadoras(self, df: pd.DataFrame, top: int = 3):
+        for position, row in enumerate(df.head(top).itertuples(index=False), start=1):
+            logger.info(
+                f"  └─ {position}. {row.RazaoSocial} ({row.UF}): {self._format_brl(row.TotalDespesas)}")
 
     def _print_variability_analysis(self, df: pd.DataFrame):
-        pass
+        high_variability = int(
+            (df['CoeficienteVariacao'] > HIGH_VARIABILITY_THRESHOLD).sum())
+        logger.info(
+            f"  └─ {high_variability} grupos com alta variabilidade (CV > {HIGH_VARIABILITY_THRESHOLD})")
+
+    def _format_brl(self, value: float) -> str:
+        if self.centavos:
+            return format_brl_centavos(value)
+
+        formatted = f"{value:,.2f}"
+        return "R$ " + formatted.translate(str.maketrans(",.", ".,"))
 
     def export(self, df: pd.DataFrame, output_file) -> None:
         output_file.parent.mkdir(parents=True, exist_ok=True)
@@ -102,6 +173,24 @@ class DataAggregator:
 
         df_export = df[final_columns].copy()
 
+        # Os arquivos continuam em reais; o total sai exato, sem passar por float
+        if self.centavos:
+            for column in ['MediaDespesasTrimestre', 'DesvioPadraoDespesas']:
+                df_export[column] = df_export[column] / CENTAVOS_POR_REAL
+
+            df_export['TotalDespesas'] = (
+                to_reais(df_export['TotalDespesas']) if output_file.suffix == '.parquet'
+                else format_centavos(df_export['TotalDespesas'])
+            )
+
+        if output_file.suffix == '.parquet':
+            df_export.astype(consts.AGREGADO_DTYPES).to_parquet(
+                output_file,
+                engine='pyarrow',
+                index=False
+            )
+            return
+
         df_export.to_csv(
             output_file,
             index=False,
@@ -0,0 +1,129 @@
+import logging
+import pandas as pd
+import numpy as np
+from typing import Optional
+
+from config import consts
+from pipeline.instrumentation import instrumented
+
+from aggregators.data_aggregator import DataAggregator
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingAggregator(DataAggregator):
+    GROUP_KEYS = ['RazaoSocial', 'UF']
+
+    def __init__(self, centavos: bool = False) -> None:
+        super().__init__(centavos)
+        # Estado por grupo: contagem, soma, M2 (soma dos quadrados dos desvios)
+        # e bitset dos trimestres observados; combinável entre blocos e processos
+        self.state: Optional[pd.DataFrame] = None
+
+    @instrumented("aggregator")
+    def update(self, df: pd.DataFrame) -> None:
+        self.aggregation_stats['original_records'] += len(df)
+
+        df_clean = self._select_groupable(df)
+        if df_clean.empty:
+            return
+
+        self.merge_state(self._partial_state(df_clean))
+
+    def merge(self, other: "StreamingAggregator") -> None:
+        self.aggregation_stats['original_records'] += other.aggregation_stats['original_records']
+
+        if other.state is not None:
+            self.merge_state(other.state)
+
+    def merge_state(self, partial: pd.DataFrame) -> None:
+        if self.state is None:
+            self.state = partial
+            return
+
+        left, right = self.state.align(partial, join='outer', fill_value=0)
+
+        count_a = left['count'].to_numpy()
+        count_b = right['count'].to_numpy()
+        total_a = left['total'].to_numpy()
+        total_b = right['total'].to_numpy()
+        count = count_a + count_b
+
+        # Combinação de variâncias de Chan et al.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = total_b / count_b - total_a / count_a
+            correction = np.where(
+                (count_a > 0) & (count_b > 0),
+                delta ** 2 * count_a * count_b / count,
+                0.0
+            )
+
+        self.state = pd.DataFrame({
+            'count': count,
+            'total': total_a + total_b,
+            'm2': left['m2'].to_numpy() + right['m2'].to_numpy() + correction,
+            'quarters': left['quarters'].to_numpy(dtype=np.int64)
+            | right['quarters'].to_numpy(dtype=np.int64)
+        }, index=left.index)
+
+    @instrumented("aggregator")
+    def result(self, top_n: Optional[int] = None) -> pd.DataFrame:
+        if self.state is None:
+            return self.aggregate(pd.DataFrame(
+                columns=self.GROUP_KEYS + ['ValorDespesas', 'Trimestre']), top_n)
+
+        state = self.state.sort_index()
+        counts = state['count'].to_numpy()
+        totals = state['total'].to_numpy()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = totals / counts
+            std = np.where(counts > 1, np.sqrt(state['m2'].to_numpy() / (counts - 1)), 0.0)
+
+        quarters = state['quarters'].to_numpy()
+        num_trimestres = sum((quarters >> q) & 1 for q in consts.VALID_QUARTERS)
+
+        grouped = pd.DataFrame({
+            'RazaoSocial': state.index.get_level_values('RazaoSocial'),
+            'UF': state.index.get_level_values('UF'),
+            'TotalDespesas': totals,
+            'MediaDespesasTrimestre': means,
+            'DesvioPadraoDespesas': std,
+            'NumeroRegistros': counts.astype(np.int64),
+            'NumeroTrimestres': num_trimestres.astype(np.int64)
+        })
+
+        return self._finish(grouped, top_n)
+
+    def _partial_state(self, df: pd.DataFrame) -> pd.DataFrame:
+        razao_codes, razao_values = pd.factorize(df['RazaoSocial'])
+        uf_codes, uf_values = pd.factorize(df['UF'])
+        n_ufs = max(len(uf_values), 1)
+        group_pairs, group_ids = np.unique(
+            razao_codes.astype(np.int64) * n_ufs + uf_codes, return_inverse=True)
+        n_groups = len(group_pairs)
+
+        values, present, counts, totals = self._sum_by_group(df, group_ids, n_groups)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviations = np.where(present, values - (totals / counts)[group_ids], 0.0)
+        m2 = np.bincount(group_ids, weights=deviations ** 2, minlength=n_groups)
+
+        # Trimestres fora de VALID_QUARTERS não entram no bitset
+        trimestres = pd.to_numeric(df['Trimestre'], errors='coerce').to_numpy(dtype=np.float64)
+        valid = np.isin(trimestres, list(consts.VALID_QUARTERS))
+        quarters = np.zeros(n_groups, dtype=np.int64)
+        np.bitwise_or.at(
+            quarters, group_ids[valid], np.left_shift(1, trimestres[valid].astype(np.int64)))
+
+        index = pd.MultiIndex.from_arrays([
+            np.asarray(razao_values.take(group_pairs // n_ufs), dtype=object),
+            np.asarray(uf_values.take(group_pairs % n_ufs), dtype=object)
+        ], names=self.GROUP_KEYS)
+
+        return pd.DataFrame({
+            'count': counts,
+            'total': totals,
+            'm2': m2,
+            'quarters': quarters
+        }, index=index)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+from typing import Dict, Optional
+
+from utils.enrichment import CadastroColumnMapping
+
+CNPJ_LENGTH = 14
+
+
+class CadastroIndex:
+    KEY_COLUMN = 'Chave'
+    CNPJ_KEY_COLUMN = 'ChaveCNPJ'
+
+    def __init__(
+        self,
+        cadastro_df: pd.DataFrame,
+        col_mapping: CadastroColumnMapping,
+        razao_col: Optional[str] = None
+    ):
+        # Chave principal: REGISTRO_OPERADORA normalizado; vale a primeira ocorrência
+        keys = cadastro_df[col_mapping['registro_ans']].astype(str).str.strip()
+        first_mask = ~keys.duplicated(keep='first').to_numpy()
+        self.duplicate_keys = int((~first_mask).sum())
+
+        unique_rows = cadastro_df[first_mask]
+        self._keys = pd.Index(keys[first_mask])
+
+        self._fields: Dict[str, np.ndarray] = {
+            'RegistroANS': unique_rows[col_mapping['registro_ans']].to_numpy(),
+            'Modalidade': unique_rows[col_mapping['modalidade']].to_numpy(),
+            'UF': unique_rows[col_mapping['uf']].to_numpy()
+        }
+        if razao_col:
+            self._fields['RazaoSocial'] = unique_rows[razao_col].to_numpy()
+
+        # Fallback: CNPJ do cadastro (só dígitos), apontando para a mesma linha
+        self._cnpj_keys: Optional[pd.Index] = None
+        self._cnpj_positions = np.empty(0, dtype=np.intp)
+
+        if 'cnpj' in col_mapping:
+            cnpjs = self._digits(unique_rows[col_mapping['cnpj']])
+            cnpj_mask = (
+                (cnpjs.str.len() == CNPJ_LENGTH) & ~cnpjs.duplicated(keep='first')
+            ).to_numpy()
+            if cnpj_mask.any():
+                self._cnpj_keys = pd.Index(cnpjs[cnpj_mask])
+                self._cnpj_positions = np.flatnonzero(cnpj_mask)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, duplicate_keys: int) -> "CadastroIndex":
+        # Remonta o índice já compilado (snapshot), sem repetir a normalização
+        index = cls.__new__(cls)
+        index.duplicate_keys = duplicate_keys
+        index._keys = pd.Index(frame[cls.KEY_COLUMN])
+        index._fields = {
+            field: frame[field].to_numpy()
+            for field in frame.columns
+            if field not in (cls.KEY_COLUMN, cls.CNPJ_KEY_COLUMN)
+        }
+
+        cnpj_keys = frame[cls.CNPJ_KEY_COLUMN]
+        cnpj_mask = cnpj_keys.notna().to_numpy()
+        index._cnpj_keys = pd.Index(cnpj_keys[cnpj_mask]) if cnpj_mask.any() else None
+        index._cnpj_positions = np.flatnonzero(cnpj_mask)
+
+        return index
+
+    def to_frame(self) -> pd.DataFrame:
+        # Uma linha por chave; o CNPJ de fallback fica na linha para a qual aponta
+        cnpj_keys = np.full(len(self._keys), None, dtype=object)
+        if self._cnpj_keys is not None:
+            cnpj_keys[self._cnpj_positions] = self._cnpj_keys.to_numpy()
+
+        return pd.DataFrame({
+            self.KEY_COLUMN: self._keys.to_numpy(),
+            **self._fields,
+            self.CNPJ_KEY_COLUMN: pd.Series(cnpj_keys, dtype='str')
+        })
+
+    def has_field(self, field: str) -> bool:
+        return field in self._fields
+
+    def lookup(self, identifiers: pd.Series) -> np.ndarray:
+        positions = self._keys.get_indexer(identifiers.astype(str).str.strip())
+
+        missing = positions < 0
+        if self._cnpj_keys is not None and missing.any():
+            cnpj_positions = self._cnpj_keys.get_indexer(
+                self._digits(identifiers[missing]))
+            positions[missing] = np.where(
+                cnpj_positions >= 0,
+                self._cnpj_positions[cnpj_positions],
+                -1
+            )
+
+        return positions
+
+    def take(self, field: str, positions: np.ndarray) -> np.ndarray:
+        # Posição -1 (sem correspondência) vira nulo, como no LEFT JOIN
+        return take(self._fields[field], positions, allow_fill=True)
+
+    @staticmethod
+    def _digits(values: pd.Series) -> pd.Series:
+        return (
+            values.astype(str)
+            .str.replace(r'[^0-9]', '', regex=True)
+            .fillna('')
+        )
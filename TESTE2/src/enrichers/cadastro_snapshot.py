@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Optional, TypedDict
+
+from enrichers.cadastro_index import CadastroIndex
+
+logger = logging.getLogger(__name__)
+
+
+class SourceFingerprint(TypedDict):
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+class SnapshotMetadata(TypedDict):
+    version: int
+    source: SourceFingerprint
+    duplicate_keys: int
+
+
+class CadastroSnapshot:
+    # Incrementar quando o formato do snapshot mudar
+    SNAPSHOT_VERSION = 2
+    HASH_BLOCK_SIZE = 1024 * 1024
+    METADATA_KEY = b'cadastro_snapshot'
+
+    def __init__(self, snapshot_file: Path):
+        self.snapshot_file = snapshot_file
+
+    def load(self, source_file: Path) -> Optional[CadastroIndex]:
+        if not self.snapshot_file.exists():
+            return None
+
+        try:
+            table = pq.read_table(self.snapshot_file)
+            metadata: SnapshotMetadata = json.loads(
+                table.schema.metadata[self.METADATA_KEY])
+        except (OSError, KeyError, TypeError, ValueError, pa.ArrowException) as e:
+            logger.warning(f"Snapshot do cadastro ignorado: {e}")
+            return None
+
+        if metadata.get('version') != self.SNAPSHOT_VERSION:
+            return None
+
+        stat = source_file.stat()
+        source = metadata['source']
+
+        if source['size'] != stat.st_size:
+            return None
+
+        # mtime diferente com o mesmo conteúdo (ex.: arquivo copiado) só atualiza a chave
+        if source['mtime_ns'] != stat.st_mtime_ns:
+            if self.hash_file(source_file) != source['sha256']:
+                return None
+            source['mtime_ns'] = stat.st_mtime_ns
+            self._write(table, metadata)
+
+        return CadastroIndex.from_frame(table.to_pandas(), metadata['duplicate_keys'])
+
+    def save(self, source_file: Path, index: CadastroIndex):
+        stat = source_file.stat()
+
+        self._write(
+            pa.Table.from_pandas(index.to_frame(), preserve_index=False),
+            {
+                'version': self.SNAPSHOT_VERSION,
+                'source': {
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'sha256': self.hash_file(source_file)
+                },
+                'duplicate_keys': index.duplicate_keys
+            }
+        )
+
+    @classmethod
+    def hash_file(cls, path: Path) -> str:
+        digest = hashlib.sha256()
+
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(cls.HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+    def _write(self, table: pa.Table, metadata: SnapshotMetadata):
+        self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.snapshot_file.with_name(self.snapshot_file.name + ".tmp")
+
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            self.METADATA_KEY: json.dumps(metadata).encode()
+        })
+        pq.write_table(table, tmp_file)
+
+        tmp_file.replace(self.snapshot_file)
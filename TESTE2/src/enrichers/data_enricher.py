@@ -1,33 +1,56 @@
+import json
 import logging
+import numpy as np
 import pandas as pd
 import requests
 from pathlib import Path
 import re
+from typing import Dict, Optional
+
+from config import consts
+from pipeline.instrumentation import instrumented
+
 from utils.enrichment import EnrichmentStats, CadastroColumnMapping
+from enrichers.cadastro_index import CadastroIndex
+from enrichers.cadastro_snapshot import CadastroSnapshot
 
 logger = logging.getLogger(__name__)
 
 
 class DataEnricher:
-    def __init__(self, cadastro_dir: Path, ans_url: str):
+    def __init__(self, cadastro_dir: Path, ans_url: str, refresh_cadastro: bool = False):
         self.cadastro_dir = cadastro_dir
         self.ans_url = ans_url
+        self.refresh_cadastro = refresh_cadastro
+        self.snapshot = CadastroSnapshot(
+            cadastro_dir / consts.CADASTRO_SNAPSHOT_FILENAME)
         self.cadastro_df = None
+        self.cadastro_index: Optional[CadastroIndex] = None
         self.enrichment_stats: EnrichmentStats = {
             'total_records': 0,
             'matched': 0,
             'not_matched': 0,
             'multiple_matches': 0
         }
+        self.unmatched_counts = pd.Series(dtype='int64')
 
+    @instrumented("cadastro")
     def load_cadastro(self) -> bool:
-        cadastro_file = self.cadastro_dir / "Relatorio_cadop.csv"
+        cadastro_file = self.cadastro_dir / consts.CADASTRO_FILENAME
+        self.cadastro_index = None
 
-        if not cadastro_file.exists():
-            if not self._download_cadastro(cadastro_file):
+        if not cadastro_file.exists() or self.refresh_cadastro:
+            if not self._download_cadastro(cadastro_file) and not cadastro_file.exists():
                 return False
 
         try:
+            snapshot_index = self.snapshot.load(cadastro_file)
+            if snapshot_index is not None:
+                logger.debug("  └─ Cadastro carregado do snapshot")
+                self.cadastro_df = None
+                self._use_cadastro_index(snapshot_index)
+                return True
+
             for sep in [';', ',', '\t']:
                 for encoding in ['latin1', 'utf-8', 'iso-8859-1']:
                     try:
@@ -37,11 +60,16 @@ class DataEnricher:
                             encoding=encoding,
                             dtype=str
                         )
-                        if len(self.cadastro_df.columns) > 3:
-                            return True
-                    except:
+                    except (UnicodeDecodeError, pd.errors.ParserError):
                         continue
 
+                    if len(self.cadastro_df.columns) > 3:
+                        index = self._build_cadastro_index()
+                        if index is not None:
+                            self._use_cadastro_index(index)
+                            self.snapshot.save(cadastro_file, index)
+                        return True
+
             logger.error("Não foi possível ler o arquivo cadastral")
             return False
 
@@ -66,28 +94,133 @@ class DataEnricher:
                 matches[0] if not matches[0].startswith('http') else matches[0]
 
             output_path.parent.mkdir(parents=True, exist_ok=True)
+            part_path = output_path.with_name(
+                output_path.name + consts.PARTIAL_DOWNLOAD_SUFFIX)
+
+            headers = self._conditional_headers(output_path, file_url)
+
+            with requests.get(file_url, headers=headers, stream=True, timeout=60) as r:
+                if r.status_code == 304:
+                    logger.info("  └─ Cadastro inalterado no servidor")
+                    return True
 
-            with requests.get(file_url, stream=True, timeout=60) as r:
                 r.raise_for_status()
-                with open(output_path, 'wb') as f:
+                with open(part_path, 'wb') as f:
                     for chunk in r.iter_content(chunk_size=8192):
                         if chunk:
                             f.write(chunk)
 
+                part_path.replace(output_path)
+                self._save_http_metadata(output_path, file_url, r.headers)
+
             return True
 
         except Exception as e:
             logger.error(f"Erro ao baixar cadastro: {e}")
             return False
 
+    def _http_metadata_file(self, output_path: Path) -> Path:
+        return output_path.with_name(output_path.name + ".http.json")
+
+    def _conditional_headers(self, output_path: Path, file_url: str) -> Dict[str, str]:
+        metadata_file = self._http_metadata_file(output_path)
+
+        if not output_path.exists() or not metadata_file.exists():
+            return {}
+
+        try:
+            with open(metadata_file, "r", encoding="utf-8") as file:
+                metadata = json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+        if metadata.get("url") != file_url:
+            return {}
+
+        headers = {}
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+
+        return headers
+
+    def _save_http_metadata(self, output_path: Path, file_url: str, response_headers):
+        with open(self._http_metadata_file(output_path), "w", encoding="utf-8") as file:
+            json.dump({
+                "url": file_url,
+                "etag": response_headers.get("ETag", ""),
+                "last_modified": response_headers.get("Last-Modified", "")
+            }, file)
+
+    @instrumented("enricher")
     def enrich(self, df: pd.DataFrame) -> pd.DataFrame:
-        if self.cadastro_df is None:
+        if self.cadastro_df is None and self.cadastro_index is None:
             logger.error(
                 "Cadastro não carregado. Execute load_cadastro() primeiro.")
             return df
 
-        self.enrichment_stats['total_records'] = len(df)
+        self.enrichment_stats['total_records'] += len(df)
+
+        # Sem índice (colunas do cadastro não identificadas) não há o que juntar
+        if self.cadastro_index is None:
+            return df
+
+        index = self.cadastro_index
+        positions = index.lookup(df['CNPJ'])
+        self._count_matches(df['CNPJ'], positions)
+
+        df_enriched = df.assign(
+            RegistroANS=index.take('RegistroANS', positions),
+            Modalidade=index.take('Modalidade', positions),
+            UF=index.take('UF', positions)
+        )
+
+        if index.has_field('RazaoSocial'):
+            razao_social = df_enriched['RazaoSocial']
+            mask_empty = (razao_social.isna()) | (
+                razao_social == '') | (razao_social == 'NÃO INFORMADO')
+            razao_cadastro = pd.Series(
+                index.take('RazaoSocial', positions), index=df_enriched.index
+            ).fillna('NÃO INFORMADO')
+            df_enriched['RazaoSocial'] = razao_social.astype(str).mask(
+                mask_empty, razao_cadastro)
+
+        return df_enriched
+
+    def _count_matches(self, identifiers: pd.Series, positions: np.ndarray):
+        # Estatísticas derivadas das posições do próprio join, sem nova passada
+        unmatched = positions < 0
+        not_matched = int(unmatched.sum())
 
+        self.enrichment_stats['matched'] += len(positions) - not_matched
+        self.enrichment_stats['not_matched'] += not_matched
+
+        if not_matched == 0:
+            return
+
+        counts = identifiers[unmatched].astype(str).str.strip().value_counts()
+        self.unmatched_counts = self.unmatched_counts.add(
+            counts, fill_value=0).astype('int64')
+
+    def export_unmatched_keys(self, output_file: Path):
+        # Chamado uma vez ao final, também no modo em blocos
+        self._print_enrichment_report()
+
+        unmatched = (
+            self.unmatched_counts
+            .sort_values(ascending=False, kind='stable')
+            .rename_axis('Identificador')
+            .reset_index(name='Ocorrencias')
+        )
+
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        unmatched.to_csv(output_file, index=False, encoding='utf-8')
+
+        logger.info(
+            f"  └─ {len(unmatched)} identificadores sem correspondência no cadastro: {output_file.name}")
+
+    def _build_cadastro_index(self) -> Optional[CadastroIndex]:
         cadastro_cols = self.cadastro_df.columns.str.upper().str.strip()
         self.cadastro_df.columns = cadastro_cols
 
@@ -96,7 +229,7 @@ class DataEnricher:
         if not col_mapping:
             logger.error(
                 "Não foi possível identificar as colunas no cadastro da ANS")
-            return df
+            return None
 
         razao_col = None
         for col in self.cadastro_df.columns:
@@ -104,65 +237,12 @@ class DataEnricher:
                 razao_col = col
                 break
 
-        cols_to_join = [
-            col_mapping['registro_ans'],
-            col_mapping.get('cnpj', col_mapping['registro_ans']),
-            col_mapping['modalidade'],
-            col_mapping['uf']
-        ]
-        if razao_col:
-            cols_to_join.append(razao_col)
-
-        cadastro_for_join = self.cadastro_df[cols_to_join].copy()
-
-        df['CNPJ_JOIN'] = df['CNPJ'].astype(str).str.strip()
-        # Usa REGISTRO_OPERADORA para fazer o join (não CNPJ)
-        cadastro_for_join['CNPJ_JOIN'] = cadastro_for_join[col_mapping['registro_ans']].astype(
-            str).str.strip()
-
-        duplicates = cadastro_for_join[cadastro_for_join.duplicated(
-            'CNPJ_JOIN', keep='first')]
-        if len(duplicates) > 0:
-            self.enrichment_stats['multiple_matches'] = len(duplicates)
-            cadastro_for_join = cadastro_for_join.drop_duplicates(
-                'CNPJ_JOIN', keep='first')
-
-        df_enriched = df.merge(
-            cadastro_for_join,
-            on='CNPJ_JOIN',
-            how='left',
-            suffixes=('', '_CADASTRO')
-        )
-
-        df_enriched['RegistroANS'] = df_enriched[col_mapping['registro_ans']]
-        df_enriched['Modalidade'] = df_enriched[col_mapping['modalidade']]
-        df_enriched['UF'] = df_enriched[col_mapping['uf']]
+        return CadastroIndex(self.cadastro_df, col_mapping, razao_col)
 
-        razao_col = None
-        for col in cadastro_for_join.columns:
-            if 'RAZAO' in col or 'NOME' in col:
-                razao_col = col
-                break
-
-        if razao_col and razao_col in df_enriched.columns:
-            mask_empty = (df_enriched['RazaoSocial'].isna()) | (
-                df_enriched['RazaoSocial'] == '') | (df_enriched['RazaoSocial'] == 'NÃO INFORMADO')
-            df_enriched['RazaoSocial'] = df_enriched['RazaoSocial'].astype(str)
-            df_enriched.loc[mask_empty, 'RazaoSocial'] = df_enriched.loc[mask_empty, razao_col].fillna(
-                'NÃO INFORMADO')
-
-        cols_to_drop = ['CNPJ_JOIN']
-        for orig_col in [col_mapping['registro_ans'], col_mapping['modalidade'], col_mapping['uf']]:
-            if orig_col not in ['RegistroANS', 'Modalidade', 'UF']:
-                cols_to_drop.append(orig_col)
-        if col_mapping.get('cnpj'):
-            cols_to_drop.append(col_mapping['cnpj'])
-        if razao_col:
-            cols_to_drop.append(razao_col)
-        df_enriched = df_enriched.drop(columns=cols_to_drop, errors='ignore')
-        self._print_enrichment_report()
-
-        return df_enriched
+    def _use_cadastro_index(self, index: CadastroIndex):
+        self.cadastro_index = index
+        if index.duplicate_keys > 0:
+            self.enrichment_stats['multiple_matches'] = index.duplicate_keys
 
     def _identify_cadastro_columns(self) -> CadastroColumnMapping:
         mapping: CadastroColumnMapping = {}
@@ -186,4 +266,13 @@ class DataEnricher:
         return mapping
 
     def _print_enrichment_report(self):
-        pass
+        stats = self.enrichment_stats
+        total = stats['total_records']
+        match_rate = stats['matched'] / total * 100 if total else 0.0
+
+        logger.info(
+            f"  └─ Correspondências: {stats['matched']} de {total} ({match_rate:.2f}%)")
+        logger.info(f"  └─ Sem correspondência: {stats['not_matched']}")
+        if stats['multiple_matches'] > 0:
+            logger.info(
+                f"  └─ Registros duplicados no cadastro: {stats['multiple_matches']}")
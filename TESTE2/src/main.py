@@ -1,7 +1,11 @@
 from validators.data_validator import DataValidator
 from enrichers.data_enricher import DataEnricher
 from aggregators.data_aggregator import DataAggregator
+from aggregators.streaming_aggregator import StreamingAggregator
 from config import get_settings, consts
+from pipeline.centavos import to_centavos
+from pipeline.compact import compact_dtypes, to_compact
+from pipeline.instrumentation import stage, start_run
 import pandas as pd
 import logging
 import zipfile
@@ -43,43 +47,171 @@ def copy_teste1_output():
         return False
 
 
+def teste1_parquet_available():
+    dataset_dir = settings.teste1_consolidated_parquet_dir
+
+    if not dataset_dir.exists():
+        logging.error(f"ERRO: Dataset Parquet não encontrado em {dataset_dir}")
+        logging.error("Execute o TESTE 1 com OUTPUT_FORMAT=parquet primeiro")
+        return False
+
+    return True
+
+
+def load_teste1_parquet():
+    # Ano e Trimestre voltam como categorias das partições
+    df = pd.read_parquet(
+        settings.teste1_consolidated_parquet_dir, engine='pyarrow')
+    return df[list(consts.CONSOLIDADO_DTYPES)].astype(input_dtypes())
+
+
+def iter_teste1_chunks(chunk_size: int):
+    if settings.output_format == consts.OUTPUT_FORMAT_PARQUET:
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(
+            settings.teste1_consolidated_parquet_dir,
+            format='parquet',
+            partitioning='hive'
+        )
+        for batch in dataset.to_batches(batch_size=chunk_size):
+            df = batch.to_pandas()
+            yield df[list(consts.CONSOLIDADO_DTYPES)].astype(input_dtypes())
+    else:
+        with pd.read_csv(
+            settings.teste2_input_file, chunksize=chunk_size,
+            dtype=csv_input_dtypes()
+        ) as reader:
+            yield from reader
+
+
+def input_dtypes():
+    if not settings.compact_dtypes:
+        return consts.CONSOLIDADO_DTYPES
+
+    return {**consts.CONSOLIDADO_DTYPES, **compact_dtypes(consts.CONSOLIDADO_DTYPES)}
+
+
+def csv_input_dtypes():
+    # Sem o modo compacto, o CSV mantém a inferência de tipos original
+    if not settings.compact_dtypes:
+        return None
+
+    # Tipos compactos já na leitura: o frame nunca existe com colunas object
+    return input_dtypes()
+
+
+def run_streaming(validator: DataValidator, enricher: DataEnricher, cadastro_loaded: bool):
+    aggregator = StreamingAggregator(settings.integer_centavos)
+
+    # Memória proporcional ao bloco e ao número de grupos, não ao volume total
+    for chunk in iter_teste1_chunks(consts.DEFAULT_CHUNK_SIZE):
+        df_validated = validator.validate(apply_compact_dtypes(apply_centavos(chunk)))
+        df_valid = validator.get_valid_records(df_validated)
+
+        if cadastro_loaded:
+            df_valid = apply_compact_dtypes(enricher.enrich(df_valid))
+
+        aggregator.update(df_valid)
+
+    return aggregator
+
+
+def apply_centavos(df: pd.DataFrame) -> pd.DataFrame:
+    if not settings.integer_centavos:
+        return df
+
+    return df.assign(ValorDespesas=to_centavos(df['ValorDespesas']))
+
+
+def apply_compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    if not settings.compact_dtypes:
+        return df
+
+    return to_compact(df)
+
+
 def main():
     logging.info("TESTE 2 - TRANSFORMAÇÃO E VALIDAÇÃO DE DADOS")
 
+    run = start_run(
+        "teste2",
+        trace_memory=settings.trace_memory,
+        context=settings.model_dump(mode='json')
+    )
+
     try:
         create_directories()
 
-        if not copy_teste1_output():
+        if settings.output_format == consts.OUTPUT_FORMAT_PARQUET:
+            if not teste1_parquet_available():
+                return
+        elif not copy_teste1_output():
             return
 
-        input_file = settings.teste2_input_file
-        df = pd.read_csv(input_file)
+        if settings.teste2_streaming:
+            validator = DataValidator()
+            enricher = DataEnricher(
+                settings.teste2_cadastro_path, settings.ans_cadastro_url,
+                settings.teste2_refresh_cadastro)
 
-        logging.info("2.1 VALIDAÇÃO DE DADOS")
-        validator = DataValidator()
-        df_validated = validator.validate(df)
-        df_valid = validator.get_valid_records(df_validated)
+            cadastro_loaded = enricher.load_cadastro()
+            if not cadastro_loaded:
+                logging.error("Falha ao carregar cadastro")
 
-        logging.info("2.2 ENRIQUECIMENTO COM DADOS CADASTRAIS")
-        enricher = DataEnricher(
-            settings.teste2_cadastro_path, settings.ans_cadastro_url)
+            logging.info("2.1-2.3 VALIDAÇÃO, ENRIQUECIMENTO E AGREGAÇÃO EM BLOCOS")
+            aggregator = run_streaming(validator, enricher, cadastro_loaded)
+            df_aggregated = aggregator.result()
+            validator.print_validation_report()
 
-        if not enricher.load_cadastro():
-            logging.error("Falha ao carregar cadastro")
-            df_enriched = df_valid
+            if cadastro_loaded:
+                enricher.export_unmatched_keys(
+                    settings.teste2_unmatched_keys_file)
         else:
-            df_enriched = enricher.enrich(df_valid)
-
-        logging.info("2.3 AGREGAÇÃO E ANÁLISE ESTATÍSTICA")
-        aggregator = DataAggregator()
-        df_aggregated = aggregator.aggregate(df_enriched)
-
-        output_file = settings.teste2_aggregated_file
-        aggregator.export(df_aggregated, output_file)
-
-        zip_path = settings.teste2_output_path / consts.FINAL_ZIP_NAME
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            zipf.write(output_file, arcname=output_file.name)
+            with stage("loader") as probe:
+                if settings.output_format == consts.OUTPUT_FORMAT_PARQUET:
+                    df = load_teste1_parquet()
+                else:
+                    df = pd.read_csv(
+                        settings.teste2_input_file, dtype=csv_input_dtypes())
+                probe.set_rows_out(df)
+
+            df = apply_compact_dtypes(apply_centavos(df))
+
+            logging.info("2.1 VALIDAÇÃO DE DADOS")
+            validator = DataValidator()
+            df_validated = validator.validate(df)
+            df_valid = validator.get_valid_records(df_validated)
+            validator.print_validation_report()
+
+            logging.info("2.2 ENRIQUECIMENTO COM DADOS CADASTRAIS")
+            enricher = DataEnricher(
+                settings.teste2_cadastro_path, settings.ans_cadastro_url,
+                settings.teste2_refresh_cadastro)
+
+            if not enricher.load_cadastro():
+                logging.error("Falha ao carregar cadastro")
+                df_enriched = df_valid
+            else:
+                df_enriched = apply_compact_dtypes(enricher.enrich(df_valid))
+                enricher.export_unmatched_keys(
+                    settings.teste2_unmatched_keys_file)
+
+            logging.info("2.3 AGREGAÇÃO E ANÁLISE ESTATÍSTICA")
+            aggregator = DataAggregator(settings.integer_centavos)
+            df_aggregated = aggregator.aggregate(df_enriched)
+
+        with stage("export", df_aggregated):
+            output_file = settings.teste2_aggregated_file
+            aggregator.export(df_aggregated, output_file)
+
+            if settings.output_format == consts.OUTPUT_FORMAT_PARQUET:
+                aggregator.export(
+                    df_aggregated, settings.teste2_aggregated_parquet_file)
+
+            zip_path = settings.teste2_output_path / consts.FINAL_ZIP_NAME
+            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                zipf.write(output_file, arcname=output_file.name)
 
         logging.info("TESTE 2 FINALIZADO COM SUCESSO")
 
@@ -87,6 +219,9 @@ def main():
         logging.exception("Erro durante a execução do TESTE 2")
         raise
 
+    finally:
+        run.write_report(settings.run_reports_dir)
+
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,8 @@
 from .validation import (
     ValidationReport,
     ValidationResult,
-    InvalidReason
+    InvalidReason,
+    INVALID_REASON_BITS
 )
 
 from .enrichment import (
@@ -20,6 +21,7 @@ __all__ = [
     'ValidationReport',
     'ValidationResult',
     'InvalidReason',
+    'INVALID_REASON_BITS',
 
     'EnrichmentStats',
     'CadastroColumnMapping',
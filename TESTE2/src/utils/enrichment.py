@@ -26,4 +26,4 @@ class EnrichedRecord(TypedDict):
     Modalidade: str
     UF: str
     VALIDO: bool
-    MOTIVO_INVALIDACAO: str
+    MOTIVO_INVALIDACAO: int
@@ -10,6 +10,12 @@ class InvalidReason(str, Enum):
     RAZAO_SOCIAL_VAZIA = "RAZAO_SOCIAL_VAZIA"
 
 
+# Um bit por motivo, na ordem de declaração de InvalidReason
+INVALID_REASON_BITS: dict[InvalidReason, int] = {
+    reason: 1 << position for position, reason in enumerate(InvalidReason)
+}
+
+
 class ValidationReport(TypedDict):
     total_records: int
     cnpj_invalid: int
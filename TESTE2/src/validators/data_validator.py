@@ -1,11 +1,14 @@
 import logging
+import numpy as np
 import pandas as pd
-import re
 from typing import Tuple
 
+from pipeline.instrumentation import instrumented
+
 from utils.validation import (
     ValidationReport,
     InvalidReason,
+    INVALID_REASON_BITS,
     IdentifierType,
     REG_ANS_LENGTH,
     CNPJ_LENGTH
@@ -15,6 +18,9 @@ logger = logging.getLogger(__name__)
 
 
 class DataValidator:
+    CNPJ_WEIGHTS_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+    CNPJ_WEIGHTS_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
     def __init__(self) -> None:
         self.validation_report: ValidationReport = {
             'total_records': 0,
@@ -25,79 +31,108 @@ class DataValidator:
             'razao_empty': 0
         }
 
+    @instrumented("validator")
     def validate(self, df: pd.DataFrame) -> pd.DataFrame:
-        self.validation_report['total_records'] = len(df)
+        self.validation_report['total_records'] += len(df)
 
         df = df.copy()
         df['VALIDO'] = True
-        df['MOTIVO_INVALIDACAO'] = ''
+        df['MOTIVO_INVALIDACAO'] = np.uint8(0)
 
         df = self._validate_cnpj(df)
         df = self._validate_valores(df)
         df = self._validate_razao_social(df)
 
-        self._print_validation_report(df)
-
         return df
 
     def _validate_cnpj(self, df: pd.DataFrame) -> pd.DataFrame:
-        for idx, row in df.iterrows():
-            identificador = str(row['CNPJ']).strip()
-            id_numbers = re.sub(r'[^0-9]', '', identificador)
-            id_type = self._identify_type(id_numbers)
-
-            if id_type == "REG_ANS":
-                continue
-            elif id_type == "CNPJ":
-                if not self._validate_cnpj_digits(id_numbers):
-                    df.at[idx, 'VALIDO'] = False
-                    df.at[idx,
-                          'MOTIVO_INVALIDACAO'] += f'{InvalidReason.CNPJ_DIGITO_VERIFICADOR_INVALIDO.value}; '
-                    self.validation_report['cnpj_digit_error'] += 1
-            else:
-                df.at[idx, 'VALIDO'] = False
-                df.at[idx,
-                      'MOTIVO_INVALIDACAO'] += f'{InvalidReason.IDENTIFICADOR_FORMATO_INVALIDO.value}; '
-                self.validation_report['cnpj_format_error'] += 1
+        identifiers = df['CNPJ']
+
+        if isinstance(identifiers.dtype, pd.CategoricalDtype):
+            # Cada categoria é validada uma vez, no seu tipo original: anexar um
+            # NaN às categorias inteiras as tornaria float ('300016.0')
+            digit_errors, format_errors = self._classify_identifiers(
+                pd.Series(identifiers.cat.categories))
+            codes = identifiers.cat.codes.to_numpy()
+            known = codes >= 0
+
+            # Nulos (código -1) têm formato inválido, como no caminho sem categorias
+            digit_error_mask = np.zeros(len(codes), dtype=bool)
+            digit_error_mask[known] = digit_errors[codes[known]]
+            format_error_mask = ~known
+            format_error_mask[known] = format_errors[codes[known]]
+        else:
+            digit_error_mask, format_error_mask = self._classify_identifiers(
+                identifiers)
+
+        self._flag_invalid(
+            df, digit_error_mask, InvalidReason.CNPJ_DIGITO_VERIFICADOR_INVALIDO)
+        self.validation_report['cnpj_digit_error'] += int(digit_error_mask.sum())
+
+        self._flag_invalid(
+            df, format_error_mask, InvalidReason.IDENTIFICADOR_FORMATO_INVALIDO)
+        self.validation_report['cnpj_format_error'] += int(format_error_mask.sum())
 
         return df
 
-    def _identify_type(self, id_numbers: str) -> IdentifierType:
-        if len(id_numbers) == REG_ANS_LENGTH:
-            return "REG_ANS"
-        elif len(id_numbers) == CNPJ_LENGTH:
-            return "CNPJ"
-        else:
-            return "INVALID"
+    def _classify_identifiers(self, identifiers: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        id_numbers = (
+            identifiers.astype(str).str.strip()
+            .str.replace(r'[^0-9]', '', regex=True)
+            .fillna('')
+        )
+        id_types = self._identify_type(id_numbers)
+
+        cnpj_mask = (id_types == "CNPJ").to_numpy()
+        digit_error_mask = np.zeros(len(identifiers), dtype=bool)
+        digit_error_mask[cnpj_mask] = ~self._validate_cnpj_digits(
+            id_numbers.to_numpy()[cnpj_mask])
+        format_error_mask = (id_types == "INVALID").to_numpy()
+
+        return digit_error_mask, format_error_mask
+
+    def _identify_type(self, id_numbers: pd.Series) -> pd.Series:
+        lengths = id_numbers.str.len()
+        id_types: list[IdentifierType] = ["REG_ANS", "CNPJ"]
+
+        return pd.Series(
+            np.select(
+                [lengths == REG_ANS_LENGTH, lengths == CNPJ_LENGTH],
+                id_types,
+                default="INVALID"
+            ),
+            index=id_numbers.index
+        )
 
-    def _validate_cnpj_digits(self, cnpj: str) -> bool:
-        if len(cnpj) != 14:
-            return False
+    def _validate_cnpj_digits(self, cnpjs: np.ndarray) -> np.ndarray:
+        if len(cnpjs) == 0:
+            return np.zeros(0, dtype=bool)
 
-        if len(set(cnpj)) == 1:
-            return False
+        # Cada CNPJ vira uma linha de 14 dígitos, lidos dos bytes ASCII (uint8)
+        digits = (
+            np.frombuffer(''.join(cnpjs).encode('ascii'), dtype=np.uint8)
+            .reshape(-1, CNPJ_LENGTH) - ord('0')
+        ).astype(np.int64)
 
-        weights1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        sum1 = sum(int(cnpj[i]) * weights1[i] for i in range(12))
-        digit1 = 0 if sum1 % 11 < 2 else 11 - (sum1 % 11)
+        repeated = (digits == digits[:, :1]).all(axis=1)
 
-        if int(cnpj[12]) != digit1:
-            return False
+        remainder1 = (digits[:, :12] @ self.CNPJ_WEIGHTS_1) % 11
+        digit1 = np.where(remainder1 < 2, 0, 11 - remainder1)
 
-        weights2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        sum2 = sum(int(cnpj[i]) * weights2[i] for i in range(13))
-        digit2 = 0 if sum2 % 11 < 2 else 11 - (sum2 % 11)
+        remainder2 = (digits[:, :13] @ self.CNPJ_WEIGHTS_2) % 11
+        digit2 = np.where(remainder2 < 2, 0, 11 - remainder2)
 
-        return int(cnpj[13]) == digit2
+        return ~repeated & (digits[:, 12] == digit1) & (digits[:, 13] == digit2)
 
     def _validate_valores(self, df: pd.DataFrame) -> pd.DataFrame:
         negative_mask = df['ValorDespesas'] < 0
         negative_count = negative_mask.sum()
 
         if negative_count > 0:
-            df.loc[negative_mask, 'VALIDO'] = False
-            df.loc[negative_mask, 'MOTIVO_INVALIDACAO'] += 'VALOR_NEGATIVO; '
-            self.validation_report['valor_negative'] = negative_count
+            self._flag_invalid(
+                df, negative_mask.to_numpy(dtype=bool, na_value=False),
+                InvalidReason.VALOR_NEGATIVO)
+            self.validation_report['valor_negative'] += int(negative_count)
 
         return df
 
@@ -107,15 +142,47 @@ class DataValidator:
         empty_count = empty_mask.sum()
 
         if empty_count > 0:
-            self.validation_report['razao_empty'] = empty_count
+            self.validation_report['razao_empty'] += int(empty_count)
 
         return df
 
-    def _print_validation_report(self, df: pd.DataFrame):
-        pass
+    def _flag_invalid(self, df: pd.DataFrame, mask: np.ndarray, reason: InvalidReason):
+        flags = df['MOTIVO_INVALIDACAO'].to_numpy()
+        df['MOTIVO_INVALIDACAO'] = np.where(
+            mask, flags | INVALID_REASON_BITS[reason], flags).astype(np.uint8)
+        df['VALIDO'] = df['VALIDO'].to_numpy() & ~mask
+
+    def decode_reasons(self, flags: pd.Series) -> pd.Series:
+        # Decodifica cada combinação distinta uma única vez
+        unique_flags, inverse = np.unique(flags.to_numpy(), return_inverse=True)
+        decoded = np.array([
+            ''.join(
+                f'{reason.value}; '
+                for reason, bit in INVALID_REASON_BITS.items()
+                if flag & bit
+            )
+            for flag in unique_flags
+        ], dtype=str)
+
+        return pd.Series(decoded[inverse], index=flags.index)
+
+    def print_validation_report(self):
+        # Acumulado de todas as chamadas a validate, inclusive no modo em blocos
+        report = self.validation_report
+
+        logger.info(f"  └─ Registros validados: {report['total_records']}")
+        logger.info(
+            f"  └─ Identificadores com formato inválido: {report['cnpj_format_error']}")
+        logger.info(
+            f"  └─ CNPJs com dígito verificador inválido: {report['cnpj_digit_error']}")
+        logger.info(f"  └─ Valores negativos: {report['valor_negative']}")
+        logger.info(f"  └─ Razão social vazia: {report['razao_empty']}")
 
     def get_valid_records(self, df: pd.DataFrame) -> pd.DataFrame:
         return df[df['VALIDO']].copy()
 
     def get_invalid_records(self, df: pd.DataFrame) -> pd.DataFrame:
-        return df[~df['VALIDO']].copy()
+        invalid = df[~df['VALIDO']].copy()
+        invalid['MOTIVO_INVALIDACAO'] = self.decode_reasons(
+            invalid['MOTIVO_INVALIDACAO'])
+        return invalid
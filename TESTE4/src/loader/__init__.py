@@ -0,0 +1,3 @@
+from loader.bulk_loader import BulkLoader
+
+__all__ = ['BulkLoader']
@@ -0,0 +1,62 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from config import consts, get_settings
+from database import engine
+from loader import BulkLoader
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(
+        description="Carrega as saídas dos TESTES 1 e 2 no PostgreSQL via COPY")
+    parser.add_argument(
+        '--cadastro', type=Path,
+        default=settings.teste2_cadastro_path / consts.CADASTRO_FILENAME)
+    parser.add_argument('--consolidado', type=Path, default=settings.teste1_consolidated_file)
+    parser.add_argument('--agregado', type=Path, default=settings.teste2_aggregated_file)
+    parser.add_argument(
+        '--truncate', action='store_true',
+        help="Limpa as tabelas de despesas antes da carga")
+    parser.add_argument(
+        '--keep-indexes', action='store_true',
+        help="Não remove os índices secundários durante a carga")
+    return parser.parse_args()
+
+
+def main():
+    settings = get_settings()
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level),
+        format=consts.DEFAULT_LOG_FORMAT
+    )
+    args = parse_args()
+
+    sources = {
+        'cadastro': args.cadastro,
+        'consolidado': args.consolidado,
+        'agregado': args.agregado
+    }
+    for name, path in sources.items():
+        if not path.exists():
+            logger.warning(f"  └─ Arquivo de {name} não encontrado, ignorado: {path}")
+            sources[name] = None
+
+    logger.info("CARGA EM MASSA NO POSTGRESQL")
+    loader = BulkLoader(engine, truncate=args.truncate, drop_indexes=not args.keep_indexes)
+    loader.load(
+        cadastro_file=sources['cadastro'],
+        consolidado_file=sources['consolidado'],
+        agregado_file=sources['agregado']
+    )
+
+
+if __name__ == "__main__":
+    main()
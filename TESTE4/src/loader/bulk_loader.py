@@ -0,0 +1,361 @@
+import csv
+import io
+import logging
+import re
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 1024 * 1024
+COPY_BATCH_ROWS = 5000
+
+NON_DIGITS = re.compile(r'[^0-9]')
+UF_PATTERN = re.compile(r'^[A-Z]{2}$')
+CENTAVOS = Decimal('0.01')
+RAZAO_NAO_INFORMADA = 'NÃO INFORMADO'
+OPERADORA_NAO_CADASTRADA = 'OPERADORA NÃO CADASTRADA'
+
+OPERADORA_COLUMNS = ['registro_ans', 'cnpj', 'razao_social', 'modalidade', 'uf']
+DESPESA_COLUMNS = ['registro_ans', 'razao_social', 'trimestre', 'ano', 'valor_despesas']
+AGREGADO_COLUMNS = [
+    'razao_social', 'uf', 'total_despesas',
+    'media_despesas_trimestre', 'desvio_padrao_despesas'
+]
+
+Row = Tuple[Optional[str], ...]
+
+
+class CopyStream:
+    # Arquivo somente leitura que gera o CSV sob demanda: o COPY consome as
+    # linhas conforme são normalizadas, sem montar o arquivo inteiro em memória
+    def __init__(self, rows: Iterable[Sequence]):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+        self._pending = ''
+        self.rows_written = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            batch = list(islice(self._rows, COPY_BATCH_ROWS))
+            if not batch:
+                break
+
+            self._writer.writerows(batch)
+            self.rows_written += len(batch)
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+        if size < 0:
+            chunk, self._pending = self._pending, ''
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+
+        return chunk
+
+    def readline(self, size: int = -1) -> str:
+        return self.read(size)
+
+
+class BulkLoader:
+    def __init__(self, engine: Engine, truncate: bool = False, drop_indexes: bool = True):
+        self.engine = engine
+        self.truncate = truncate
+        self.drop_indexes = drop_indexes
+        self.skipped: Dict[str, int] = {}
+
+    def load(
+        self,
+        cadastro_file: Optional[Path] = None,
+        consolidado_file: Optional[Path] = None,
+        agregado_file: Optional[Path] = None
+    ) -> Dict[str, int]:
+        tables = [
+            table for table, source in [
+                ('operadoras', cadastro_file),
+                ('despesas_consolidadas', consolidado_file),
+                ('despesas_agregadas', agregado_file)
+            ] if source is not None
+        ]
+        loaded: Dict[str, int] = {}
+        self.skipped = {}
+
+        # Uma transação: se algo falhar, tabelas e índices voltam ao estado anterior
+        with self.engine.begin() as connection:
+            if self.truncate:
+                self._truncate(connection, [t for t in tables if t != 'operadoras'])
+
+            dropped = self._drop_secondary_indexes(connection, tables) if self.drop_indexes else []
+
+            if cadastro_file is not None:
+                loaded['operadoras'] = self._load_operadoras(connection, cadastro_file)
+            if consolidado_file is not None:
+                loaded['despesas_consolidadas'] = self._load_despesas(connection, consolidado_file)
+            if agregado_file is not None:
+                loaded['despesas_agregadas'] = self._load_agregadas(connection, agregado_file)
+
+            self._recreate_indexes(connection, dropped)
+
+            for table in tables:
+                connection.execute(text(f"ANALYZE {table}"))
+
+        for table, count in loaded.items():
+            logger.info(
+                f"  └─ {table}: {count} linhas carregadas, "
+                f"{self.skipped.get(table, 0)} descartadas")
+
+        return loaded
+
+    def _load_operadoras(self, connection: Connection, cadastro_file: Path) -> int:
+        # Última ocorrência de cada registro, como o ON CONFLICT DO UPDATE faria em sequência
+        operadoras = {row[0]: row for row in self._read_cadastro(cadastro_file)}
+
+        self._create_temp_table(connection, 'tmp_operadoras', 'operadoras', OPERADORA_COLUMNS)
+        self._copy(connection, 'tmp_operadoras', OPERADORA_COLUMNS, operadoras.values())
+
+        connection.execute(text("""
+            INSERT INTO operadoras (registro_ans, cnpj, razao_social, modalidade, uf)
+            SELECT registro_ans, cnpj, razao_social, modalidade, uf FROM tmp_operadoras
+            ON CONFLICT (registro_ans) DO UPDATE
+            SET cnpj = EXCLUDED.cnpj,
+                razao_social = EXCLUDED.razao_social,
+                modalidade = EXCLUDED.modalidade,
+                uf = EXCLUDED.uf
+        """))
+
+        return len(operadoras)
+
+    def _load_despesas(self, connection: Connection, consolidado_file: Path) -> int:
+        # Primeira passada: operadoras referenciadas, para a chave estrangeira do COPY
+        referenced: Dict[str, Optional[str]] = {}
+        for row in self._read_consolidado(consolidado_file, count_skipped=False):
+            referenced.setdefault(row[0], row[1])
+
+        columns = ['registro_ans', 'razao_social']
+        self._create_temp_table(connection, 'tmp_operadoras_despesas', 'operadoras', columns)
+        self._copy(
+            connection, 'tmp_operadoras_despesas', columns,
+            ((registro, razao or OPERADORA_NAO_CADASTRADA) for registro, razao in referenced.items())
+        )
+        connection.execute(text("""
+            INSERT INTO operadoras (registro_ans, razao_social)
+            SELECT registro_ans, razao_social FROM tmp_operadoras_despesas
+            ON CONFLICT (registro_ans) DO NOTHING
+        """))
+
+        # Segunda passada: COPY direto na tabela final, sem tabela intermediária
+        return self._copy(
+            connection, 'despesas_consolidadas', DESPESA_COLUMNS,
+            self._read_consolidado(consolidado_file))
+
+    def _load_agregadas(self, connection: Connection, agregado_file: Path) -> int:
+        # (razao_social, uf) é único na tabela; a última linha do arquivo prevalece
+        agregadas = {row[:2]: row for row in self._read_agregado(agregado_file)}
+
+        self._create_temp_table(connection, 'tmp_despesas_agregadas', 'despesas_agregadas', AGREGADO_COLUMNS)
+        self._copy(connection, 'tmp_despesas_agregadas', AGREGADO_COLUMNS, agregadas.values())
+
+        connection.execute(text("""
+            INSERT INTO despesas_agregadas (
+                razao_social, uf, total_despesas, media_despesas_trimestre, desvio_padrao_despesas
+            )
+            SELECT razao_social, uf, total_despesas, media_despesas_trimestre, desvio_padrao_despesas
+            FROM tmp_despesas_agregadas
+            ON CONFLICT (razao_social, uf) DO UPDATE
+            SET total_despesas = EXCLUDED.total_despesas,
+                media_despesas_trimestre = EXCLUDED.media_despesas_trimestre,
+                desvio_padrao_despesas = EXCLUDED.desvio_padrao_despesas,
+                data_importacao = CURRENT_TIMESTAMP
+        """))
+
+        return len(agregadas)
+
+    def _read_cadastro(self, cadastro_file: Path) -> Iterator[Row]:
+        with open(cadastro_file, 'r', encoding='latin1', newline='') as file:
+            reader = csv.DictReader(file, delimiter=';')
+            columns = self._cadastro_columns(reader.fieldnames or [])
+
+            for record in reader:
+                registro = self._digits(record.get(columns.get('registro_ans')))
+                razao = self._upper(record.get(columns.get('razao_social')))
+
+                if len(registro) != 6 or razao is None or razao == RAZAO_NAO_INFORMADA:
+                    self._skip('operadoras')
+                    continue
+
+                yield (
+                    registro,
+                    self._digits(record.get(columns.get('cnpj'))) or None,
+                    razao,
+                    self._strip(record.get(columns.get('modalidade'))),
+                    self._uf(record.get(columns.get('uf')))
+                )
+
+    def _read_consolidado(self, consolidado_file: Path, count_skipped: bool = True) -> Iterator[Row]:
+        with open(consolidado_file, 'r', encoding='utf-8', newline='') as file:
+            for record in csv.DictReader(file):
+                registro = self._digits(record.get('CNPJ'))
+                trimestre = self._integer(record.get('Trimestre'), 1, 4)
+                ano = self._integer(record.get('Ano'), 2000, 2100)
+                valor = self._amount(record.get('ValorDespesas'))
+
+                # Mesmas restrições do schema: registro com 6 dígitos, trimestre,
+                # ano e valor não negativo; a linha inválida não derruba o COPY
+                if len(registro) != 6 or trimestre is None or ano is None or valor is None:
+                    if count_skipped:
+                        self._skip('despesas_consolidadas')
+                    continue
+
+                yield registro, self._upper(record.get('RazaoSocial')), trimestre, ano, valor
+
+    def _read_agregado(self, agregado_file: Path) -> Iterator[Row]:
+        with open(agregado_file, 'r', encoding='utf-8', newline='') as file:
+            for record in csv.DictReader(file):
+                razao = self._upper(record.get('RazaoSocial'))
+                uf = self._uf(record.get('UF'))
+                valores = [
+                    self._amount(record.get(column)) for column in
+                    ['TotalDespesas', 'MediaDespesasTrimestre', 'DesvioPadraoDespesas']
+                ]
+
+                if razao is None or uf is None or None in valores:
+                    self._skip('despesas_agregadas')
+                    continue
+
+                yield (razao, uf, *valores)
+
+    def _copy(self, connection: Connection, table: str, columns: List[str], rows: Iterable[Sequence]) -> int:
+        stream = CopyStream(rows)
+        # Campo vazio sem aspas é NULL no formato CSV do COPY
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+
+        cursor = connection.connection.cursor()
+        try:
+            if hasattr(cursor, 'copy_expert'):
+                # psycopg2
+                cursor.copy_expert(sql, stream, size=COPY_BUFFER_SIZE)
+            else:
+                # psycopg 3: o COPY recebe os blocos pelo objeto de cópia
+                with cursor.copy(sql) as copy:
+                    for chunk in iter(lambda: stream.read(COPY_BUFFER_SIZE), ''):
+                        copy.write(chunk)
+        finally:
+            cursor.close()
+
+        return stream.rows_written
+
+    def _create_temp_table(self, connection: Connection, name: str, like: str, columns: List[str]):
+        # Só os tipos das colunas: sem id serial, restrições ou índices
+        connection.execute(text(
+            f"CREATE TEMP TABLE {name} ON COMMIT DROP AS "
+            f"SELECT {', '.join(columns)} FROM {like} WITH NO DATA"))
+
+    def _truncate(self, connection: Connection, tables: List[str]):
+        if tables:
+            logger.info(f"  └─ Limpando {', '.join(tables)}")
+            connection.execute(text(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY"))
+
+    def _drop_secondary_indexes(self, connection: Connection, tables: List[str]) -> List[str]:
+        # Índices de chave primária e UNIQUE ficam: o ON CONFLICT depende deles.
+        # O vínculo com as restrições é feito pelo OID do índice, sem passar por nomes
+        indexes = connection.execute(text("""
+            SELECT format('%I.%I', n.nspname, ic.relname), pg_get_indexdef(ix.indexrelid)
+            FROM pg_index ix
+            JOIN pg_class ic ON ic.oid = ix.indexrelid
+            JOIN pg_class tc ON tc.oid = ix.indrelid
+            JOIN pg_namespace n ON n.oid = tc.relnamespace
+            WHERE n.nspname = current_schema()
+              AND tc.relname = ANY(:tables)
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_constraint c WHERE c.conindid = ix.indexrelid
+              )
+            ORDER BY tc.relname, ic.relname
+        """), {'tables': tables}).all()
+
+        for name, _ in indexes:
+            connection.execute(text(f"DROP INDEX {name}"))
+
+        if indexes:
+            logger.info(f"  └─ {len(indexes)} índices secundários removidos durante a carga")
+
+        return [definition for _, definition in indexes]
+
+    def _recreate_indexes(self, connection: Connection, definitions: List[str]):
+        for definition in definitions:
+            connection.execute(text(definition))
+
+        if definitions:
+            logger.info(f"  └─ {len(definitions)} índices secundários recriados")
+
+    def _cadastro_columns(self, fieldnames: List[str]) -> Dict[str, str]:
+        # Mesmos nomes aceitos pelo enriquecimento do TESTE 2
+        mapping: Dict[str, str] = {}
+
+        for col in fieldnames:
+            col_clean = col.upper().strip()
+
+            if 'REGISTRO_OPERADORA' in col_clean:
+                mapping['registro_ans'] = col
+            elif 'REGISTRO_ANS' in col_clean and 'DATA' not in col_clean and 'registro_ans' not in mapping:
+                mapping['registro_ans'] = col
+            elif 'CNPJ' in col_clean:
+                mapping['cnpj'] = col
+            elif 'RAZAO' in col_clean or 'RAZÃO' in col_clean:
+                mapping['razao_social'] = col
+            elif 'MODALIDADE' in col_clean:
+                mapping['modalidade'] = col
+            elif col_clean == 'UF':
+                mapping['uf'] = col
+
+        return mapping
+
+    def _skip(self, table: str):
+        self.skipped[table] = self.skipped.get(table, 0) + 1
+
+    @staticmethod
+    def _strip(value: Optional[str]) -> Optional[str]:
+        value = (value or '').strip()
+        return value or None
+
+    @classmethod
+    def _upper(cls, value: Optional[str]) -> Optional[str]:
+        value = cls._strip(value)
+        return value.upper() if value else None
+
+    @staticmethod
+    def _digits(value: Optional[str]) -> str:
+        return NON_DIGITS.sub('', value or '')
+
+    @classmethod
+    def _uf(cls, value: Optional[str]) -> Optional[str]:
+        uf = cls._upper(value)
+        return uf if uf and UF_PATTERN.match(uf) else None
+
+    @staticmethod
+    def _integer(value: Optional[str], minimum: int, maximum: int) -> Optional[int]:
+        value = (value or '').strip()
+        if not value.isdigit():
+            return None
+
+        number = int(value)
+        return number if minimum <= number <= maximum else None
+
+    @staticmethod
+    def _amount(value: Optional[str]) -> Optional[str]:
+        # Os arquivos do pipeline já vêm em reais com ponto decimal
+        try:
+            amount = Decimal((value or '').strip())
+        except InvalidOperation:
+            return None
+
+        if not amount.is_finite() or amount < 0:
+            return None
+
+        return str(amount.quantize(CENTAVOS))
@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, cast, func
+
+CENTAVOS_POR_REAL = 100
+
+
+def em_centavos(coluna):
+    # Numeric(15, 2) * 100 é sempre inteiro: o driver devolve int, não Decimal
+    return cast(coluna * CENTAVOS_POR_REAL, BigInteger)
+
+
+def soma_em_centavos(coluna):
+    # SUM de bigint é numeric no PostgreSQL; o cast mantém o resultado como int
+    return cast(func.sum(em_centavos(coluna)), BigInteger)
+
+
+def centavos_para_reais(centavos: int) -> float:
+    # Divisão de inteiros do Python é arredondada corretamente: igual a float(Decimal)
+    return centavos / CENTAVOS_POR_REAL
@@ -3,6 +3,7 @@ from sqlalchemy import func, desc, case, and_, or_
 from typing import Optional, Dict, List
 from decimal import Decimal
 from models import Operadora, DespesaConsolidada, DespesaAgregada
+from services.centavos import em_centavos, centavos_para_reais
 
 
 class DespesaService:
@@ -18,7 +19,13 @@ class DespesaService:
         if not operadora:
             return None
 
-        despesas = db.query(DespesaConsolidada).filter(
+        # Só as colunas usadas, com o valor já em centavos inteiros
+        despesas = db.query(
+            DespesaConsolidada.trimestre,
+            DespesaConsolidada.ano,
+            em_centavos(DespesaConsolidada.valor_despesas).label('valor_centavos'),
+            DespesaConsolidada.data_importacao
+        ).filter(
             DespesaConsolidada.registro_ans == operadora.registro_ans
         ).order_by(
             DespesaConsolidada.ano.desc(),
@@ -36,12 +43,12 @@ class DespesaService:
                 {
                     "trimestre": d.trimestre,
                     "ano": d.ano,
-                    "valor_despesas": float(d.valor_despesas),
+                    "valor_despesas": centavos_para_reais(d.valor_centavos),
                     "data_importacao": d.data_importacao.isoformat() if d.data_importacao else None
                 }
                 for d in despesas
             ],
-            "total_despesas": sum(float(d.valor_despesas) for d in despesas),
+            "total_despesas": centavos_para_reais(sum(d.valor_centavos for d in despesas)),
             "num_trimestres": len(despesas)
         }
 
@@ -1,11 +1,11 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from typing import Dict
-from decimal import Decimal
 from datetime import datetime
 import time
 
 from models import Operadora, DespesaConsolidada
+from services.centavos import CENTAVOS_POR_REAL, centavos_para_reais, soma_em_centavos
 
 
 class EstatisticaService:
@@ -30,13 +30,12 @@ class EstatisticaService:
     @staticmethod
     def _calcular_estatisticas(db: Session) -> Dict:
 
-        total_despesas = db.query(
-            func.sum(DespesaConsolidada.valor_despesas)
-        ).scalar() or Decimal(0)
-
-        media_despesas = db.query(
-            func.avg(DespesaConsolidada.valor_despesas)
-        ).scalar() or Decimal(0)
+        # Total, média e contagem saem de uma consulta, com soma inteira em centavos
+        total_centavos, total_registros = db.query(
+            soma_em_centavos(DespesaConsolidada.valor_despesas),
+            func.count(DespesaConsolidada.id)
+        ).one()
+        total_centavos = total_centavos or 0
 
         total_operadoras = db.query(
             func.count(Operadora.registro_ans)
@@ -48,7 +47,7 @@ class EstatisticaService:
             Operadora.razao_social,
             Operadora.uf,
             Operadora.modalidade,
-            func.sum(DespesaConsolidada.valor_despesas).label('total')
+            soma_em_centavos(DespesaConsolidada.valor_despesas).label('total')
         ).join(
             DespesaConsolidada,
             Operadora.registro_ans == DespesaConsolidada.registro_ans
@@ -64,7 +63,7 @@ class EstatisticaService:
 
         despesas_por_uf = db.query(
             Operadora.uf,
-            func.sum(DespesaConsolidada.valor_despesas).label('total'),
+            soma_em_centavos(DespesaConsolidada.valor_despesas).label('total'),
             func.count(func.distinct(DespesaConsolidada.registro_ans)).label(
                 'num_operadoras')
         ).join(
@@ -79,10 +78,12 @@ class EstatisticaService:
         ).all()
 
         return {
-            "total_despesas": float(total_despesas),
-            "media_despesas": float(media_despesas),
+            "total_despesas": centavos_para_reais(total_centavos),
+            "media_despesas": (
+                total_centavos / (total_registros * CENTAVOS_POR_REAL) if total_registros else 0.0
+            ),
             "total_operadoras": total_operadoras,
-            "total_registros": db.query(func.count(DespesaConsolidada.id)).scalar(),
+            "total_registros": total_registros,
             "top_5_operadoras": [
                 {
                     "registro_ans": op.registro_ans,
@@ -90,16 +91,16 @@ class EstatisticaService:
                     "razao_social": op.razao_social,
                     "uf": op.uf,
                     "modalidade": op.modalidade,
-                    "total_despesas": float(op.total)
+                    "total_despesas": centavos_para_reais(op.total)
                 }
                 for op in top_operadoras
             ],
             "despesas_por_uf": [
                 {
                     "uf": row.uf,
-                    "total_despesas": float(row.total),
+                    "total_despesas": centavos_para_reais(row.total),
                     "num_operadoras": row.num_operadoras,
-                    "percentual": float(row.total / total_despesas * 100) if total_despesas > 0 else 0
+                    "percentual": row.total / total_centavos * 100 if total_centavos > 0 else 0
                 }
                 for row in despesas_por_uf
             ],
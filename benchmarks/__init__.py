@@ -0,0 +1,3 @@
+from .generator import DatasetSpec, generate_cadastro, generate_demonstracoes
+
+__all__ = ['DatasetSpec', 'generate_cadastro', 'generate_demonstracoes']
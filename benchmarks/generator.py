@@ -0,0 +1,135 @@
+import csv
+from pathlib import Path
+from typing import List, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from config import consts
+
+ACCOUNT_CODES = ['411111', '41121', '4111', '311111', '2121', '121', '46111']
+ACCOUNT_WEIGHTS = [0.25, 0.15, 0.1, 0.2, 0.1, 0.1, 0.1]
+DESCRIPTIONS = [
+    'EVENTOS/ SINISTROS CONHECIDOS OU AVISADOS',
+    'DESPESA COM EVENTOS / SINISTROS',
+    'CONSULTA MÉDICA',
+    'INTERNAÇÃO HOSPITALAR',
+    'CONTRAPRESTAÇÕES EFETIVAS',
+    'PROVISÕES TÉCNICAS',
+    'APLICAÇÕES FINANCEIRAS',
+    'DESPESAS ADMINISTRATIVAS'
+]
+MODALIDADES = [
+    'Medicina de Grupo', 'Cooperativa Médica', 'Autogestão',
+    'Seguradora Especializada em Saúde', 'Odontologia de Grupo', 'Filantropia'
+]
+UFS = ['SP', 'RJ', 'MG', 'RS', 'PR', 'BA', 'SC', 'PE', 'CE', 'GO', 'DF']
+CNPJ_WEIGHTS_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+CNPJ_WEIGHTS_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+FIRST_REG_ANS = 300000
+
+
+class DatasetSpec(NamedTuple):
+    rows: int
+    operators: int = consts.BENCHMARK_OPERATORS
+    quarters: int = consts.BENCHMARK_QUARTERS
+    separator: str = ';'
+    encoding: str = 'utf-8'
+    negative_ratio: float = 0.05
+    duplicate_ratio: float = 0.02
+    missing_cadastro_ratio: float = 0.05
+    seed: int = 42
+
+
+def quarter_names(quarters: int) -> List[str]:
+    # Trimestres consecutivos a partir de 1T2024 (1T2024, 2T2024, ...)
+    return [f"{index % 4 + 1}T{2024 + index // 4}" for index in range(quarters)]
+
+
+def generate_demonstracoes(output_dir: Path, spec: DatasetSpec) -> List[Path]:
+    rng = np.random.default_rng(spec.seed)
+    files = []
+
+    # Uma pasta por trimestre, como no ZIP extraído da ANS
+    for name in quarter_names(spec.quarters):
+        quarter_dir = output_dir / name
+        quarter_dir.mkdir(parents=True, exist_ok=True)
+
+        file_path = quarter_dir / f"{name}.csv"
+        _quarter_frame(rng, spec, name).to_csv(
+            file_path,
+            sep=spec.separator,
+            encoding=spec.encoding,
+            index=False,
+            quoting=csv.QUOTE_ALL
+        )
+        files.append(file_path)
+
+    return files
+
+
+def generate_cadastro(output_file: Path, spec: DatasetSpec) -> Path:
+    rng = np.random.default_rng(spec.seed + 1)
+
+    # Parte das operadoras fica fora do cadastro, como registros cancelados
+    present = rng.random(spec.operators) >= spec.missing_cadastro_ratio
+    reg_ans = FIRST_REG_ANS + np.flatnonzero(present)
+
+    cadastro = pd.DataFrame({
+        'REGISTRO_OPERADORA': reg_ans.astype(str),
+        'CNPJ': valid_cnpjs(rng, len(reg_ans)),
+        'Razao_Social': [f"OPERADORA SINTÉTICA {reg} S.A." for reg in reg_ans],
+        'Modalidade': rng.choice(MODALIDADES, len(reg_ans)),
+        'UF': rng.choice(UFS, len(reg_ans))
+    })
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    cadastro.to_csv(
+        output_file, sep=';', encoding='latin1', index=False, quoting=csv.QUOTE_ALL)
+
+    return output_file
+
+
+def valid_cnpjs(rng: np.random.Generator, count: int) -> np.ndarray:
+    base = rng.integers(0, 10, size=(count, 12))
+    # Evita bases com todos os dígitos iguais, rejeitadas pelo validador
+    base[:, 8:12] = [0, 0, 0, 1]
+
+    remainder1 = (base @ CNPJ_WEIGHTS_1) % 11
+    digit1 = np.where(remainder1 < 2, 0, 11 - remainder1)
+
+    with_digit1 = np.column_stack([base, digit1])
+    remainder2 = (with_digit1 @ CNPJ_WEIGHTS_2) % 11
+    digit2 = np.where(remainder2 < 2, 0, 11 - remainder2)
+
+    digits = np.column_stack([with_digit1, digit2]).astype(np.uint8) + ord('0')
+    return digits.view(f'S{consts.CNPJ_LENGTH}').ravel().astype(str)
+
+
+def _quarter_frame(rng: np.random.Generator, spec: DatasetSpec, quarter: str) -> pd.DataFrame:
+    unique_rows = spec.rows - int(spec.rows * spec.duplicate_ratio)
+    quarter_number, year = int(quarter[0]), int(quarter[2:])
+    month = quarter_number * 3
+
+    centavos = rng.integers(0, 5_000_000_000, unique_rows)
+    negative = rng.random(unique_rows) < spec.negative_ratio
+    centavos[negative] *= -1
+
+    df = pd.DataFrame({
+        'DATA': f"{year}-{month:02d}-01",
+        'REG_ANS': (FIRST_REG_ANS + rng.integers(0, spec.operators, unique_rows)).astype(str),
+        'CD_CONTA_CONTABIL': rng.choice(ACCOUNT_CODES, unique_rows, p=ACCOUNT_WEIGHTS),
+        'DESCRICAO': rng.choice(DESCRIPTIONS, unique_rows),
+        'VL_SALDO_INICIAL': format_brl(rng.integers(0, 1_000_000_000, unique_rows)),
+        'VL_SALDO_FINAL': format_brl(centavos)
+    })
+
+    # Duplicatas exatas, tratadas pelo DataCleaner
+    duplicates = df.iloc[rng.integers(0, unique_rows, spec.rows - unique_rows)]
+    return pd.concat([df, duplicates], ignore_index=True)
+
+
+def format_brl(centavos: np.ndarray) -> List[str]:
+    # Formato da ANS: ponto como separador de milhar e vírgula decimal
+    table = str.maketrans(",.", ".,")
+    return [f"{value / 100:,.2f}".translate(table) for value in centavos.tolist()]
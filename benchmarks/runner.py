@@ -0,0 +1,247 @@
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, TypedDict
+
+import numpy as np
+import pandas as pd
+
+from pipeline.paths import PROJECT_ROOT, add_source_paths
+
+add_source_paths()
+
+from config import consts  # noqa: E402
+from readers import FileReader  # noqa: E402
+from filters import AccountFilter  # noqa: E402
+from processor.expenses_processor import ExpensesProcessor  # noqa: E402
+from validators.data_validator import DataValidator  # noqa: E402
+from enrichers.data_enricher import DataEnricher  # noqa: E402
+from aggregators.data_aggregator import DataAggregator  # noqa: E402
+from benchmarks.generator import DatasetSpec, generate_cadastro, generate_demonstracoes  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkResult(TypedDict):
+    benchmark: str
+    rows: int
+    rows_in: int
+    repeat: int
+    min_s: float
+    median_s: float
+    rows_per_s: float
+
+
+def time_call(func: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> List[float]:
+    timings = []
+
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def run_scale(spec: DatasetSpec, repeat: int, work_dir: Path) -> List[BenchmarkResult]:
+    extracted_dir = work_dir / "extracted"
+    cadastro_dir = work_dir / "cadastro"
+    output_file = work_dir / "output" / consts.CONSOLIDADO_FILENAME
+
+    files = generate_demonstracoes(extracted_dir, spec)
+    generate_cadastro(cadastro_dir / consts.CADASTRO_FILENAME, spec)
+
+    reader = FileReader()
+    raw_df = reader.read(files[0])
+    account_filter = AccountFilter(target_account=consts.CONTA_CONTABIL_TARGET)
+    processor = ExpensesProcessor(extracted_dir=extracted_dir, output_file=output_file)
+
+    results = [
+        _result("FileReader.read", spec, len(raw_df), time_call(
+            lambda: FileReader().read(files[0]), repeat)),
+        _result("AccountFilter.filter", spec, len(raw_df), time_call(
+            lambda: account_filter.filter(raw_df), repeat)),
+        _result("ExpensesProcessor.run", spec, spec.rows * spec.quarters, time_call(
+            processor.run, repeat)),
+    ]
+
+    # Mesmo caminho do TESTE 2: o consolidado é relido do CSV
+    consolidated = pd.read_csv(output_file)
+    validator = DataValidator()
+    df_valid = validator.get_valid_records(validator.validate(consolidated))
+
+    enrichers: List[DataEnricher] = []
+
+    def new_enricher():
+        # Cada repetição monta o índice do cadastro do zero; o CSV é lido fora da medição
+        enricher = DataEnricher(cadastro_dir, ans_url="")
+        enricher.load_cadastro()
+        enrichers.append(enricher)
+
+    df_enriched = None
+
+    def enrich():
+        nonlocal df_enriched
+        df_enriched = enrichers[-1].enrich(df_valid)
+
+    results.append(_result("DataValidator.validate", spec, len(consolidated), time_call(
+        lambda: DataValidator().validate(consolidated), repeat)))
+    results.append(_result("DataEnricher.enrich", spec, len(df_valid), time_call(
+        enrich, repeat, setup=new_enricher)))
+    results.append(_result("DataAggregator.aggregate", spec, len(df_enriched), time_call(
+        lambda: DataAggregator().aggregate(df_enriched), repeat)))
+
+    return results
+
+
+def run_benchmarks(scales: List[int], repeat: int, spec_defaults: Dict) -> Dict:
+    results: List[BenchmarkResult] = []
+
+    for rows in scales:
+        spec = DatasetSpec(rows=rows, **spec_defaults)
+        logger.info(f"  └─ Escala: {rows} linhas por trimestre, {spec.quarters} trimestres")
+
+        with tempfile.TemporaryDirectory(prefix="ans_bench_") as tmp_dir:
+            results.extend(run_scale(spec, repeat, Path(tmp_dir)))
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'spec': {**DatasetSpec(rows=0, **spec_defaults)._asdict(), 'scales': scales},
+        'results': results
+    }
+
+
+def compare(current: Dict, baseline: Dict, max_slowdown: float) -> bool:
+    current_spec = {k: v for k, v in current['spec'].items() if k != 'scales'}
+    baseline_spec = {k: v for k, v in baseline.get('spec', {}).items() if k != 'scales'}
+    if current_spec != baseline_spec:
+        logger.warning("Parâmetros dos dados sintéticos diferem da baseline")
+
+    baseline_index = {
+        (result['benchmark'], result['rows']): result
+        for result in baseline['results']
+    }
+    passed = True
+
+    for result in current['results']:
+        reference = baseline_index.get((result['benchmark'], result['rows']))
+        if reference is None:
+            continue
+
+        # Mediana é menos sensível a ruído do que o mínimo em máquinas compartilhadas
+        ratio = result['median_s'] / reference['median_s'] if reference['median_s'] else 1.0
+        status = "OK" if ratio <= max_slowdown else "REGRESSÃO"
+        logger.info(
+            f"  └─ {result['benchmark']} ({result['rows']} linhas): {ratio:.2f}x {status}")
+
+        if ratio > max_slowdown:
+            passed = False
+
+    return passed
+
+
+def _result(name: str, spec: DatasetSpec, rows_in: int, timings: List[float]) -> BenchmarkResult:
+    median = statistics.median(timings)
+
+    return {
+        'benchmark': name,
+        'rows': spec.rows,
+        'rows_in': int(rows_in),
+        'repeat': len(timings),
+        'min_s': round(min(timings), 6),
+        'median_s': round(median, 6),
+        'rows_per_s': round(rows_in / median, 1) if median > 0 else 0.0
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks com dados sintéticos no formato da ANS")
+    parser.add_argument("--scales", type=int, nargs="+", default=consts.BENCHMARK_SCALES,
+                        help="Linhas por arquivo trimestral em cada escala")
+    parser.add_argument("--repeat", type=int, default=consts.BENCHMARK_REPEAT)
+    parser.add_argument("--operators", type=int, default=consts.BENCHMARK_OPERATORS)
+    parser.add_argument("--quarters", type=int, default=consts.BENCHMARK_QUARTERS)
+    parser.add_argument("--separator", default=";")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path,
+                        help="Arquivo de resultados (padrão: benchmarks/results/<data>.json)")
+    parser.add_argument("--baseline", type=Path,
+                        help="Resultados anteriores para comparação")
+    parser.add_argument("--max-slowdown", type=float, default=consts.BENCHMARK_MAX_SLOWDOWN,
+                        help="Razão máxima aceita entre a mediana atual e a da baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format=consts.DEFAULT_LOG_FORMAT)
+    # Logs das etapas do pipeline distorcem as medições
+    for name in ["readers", "filters", "cleaners", "processor", "validators", "enrichers", "aggregators"]:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    logging.info("BENCHMARKS")
+
+    report = run_benchmarks(args.scales, args.repeat, {
+        'operators': args.operators,
+        'quarters': args.quarters,
+        'separator': args.separator,
+        'encoding': args.encoding,
+        'seed': args.seed
+    })
+
+    output_file = args.output or (
+        PROJECT_ROOT / consts.BENCHMARK_RESULTS_DIR /
+        f"{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
+    for result in report['results']:
+        logging.info(
+            f"  └─ {result['benchmark']} ({result['rows']} linhas): "
+            f"{result['median_s']:.4f}s, {result['rows_per_s']:.0f} linhas/s")
+    logging.info(f"  └─ Resultados: {output_file}")
+
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+
+        if not compare(report, baseline, args.max_slowdown):
+            logging.error("Regressão de desempenho acima do limite")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,9 @@ from .filenames import *
 from .performance import *
 from .file_formats import *
 from .logging_config import *
+from .schemas import *
+from .pipeline import *
+from .benchmarks import *
 
 __all__ = [
     'REG_ANS_LENGTH',
@@ -22,14 +25,44 @@ __all__ = [
     'TESTE2_INPUT_DIR',
     'TESTE2_CADASTRO_DIR',
     'TESTE2_OUTPUT_DIR',
+    'RUN_REPORTS_DIR',
     'CONSOLIDADO_FILENAME',
+    'CONSOLIDADO_ZIP_FILENAME',
     'AGREGADO_FILENAME',
     'FINAL_ZIP_NAME',
     'CADASTRO_FILENAME',
+    'CADASTRO_SNAPSHOT_FILENAME',
+    'UNMATCHED_KEYS_FILENAME',
+    'DIALECT_CACHE_FILENAME',
+    'PARTIAL_DOWNLOAD_SUFFIX',
+    'LISTING_CACHE_FILENAME',
+    'MANIFEST_FILENAME',
+    'PARTITIONS_DIRNAME',
+    'CONSOLIDADO_PARQUET_DIRNAME',
+    'PARQUET_STATE_FILENAME',
+    'AGREGADO_PARQUET_FILENAME',
     'DEFAULT_CHUNK_SIZE',
     'DEFAULT_MAX_WORKERS',
+    'DOWNLOAD_CHUNK_SIZE',
     'SUPPORTED_SEPARATORS',
     'SUPPORTED_ENCODINGS',
     'SUPPORTED_EXTENSIONS',
+    'OUTPUT_FORMAT_CSV',
+    'OUTPUT_FORMAT_PARQUET',
     'DEFAULT_LOG_FORMAT',
+    'PARQUET_PARTITION_COLS',
+    'CONSOLIDADO_DTYPES',
+    'CENTAVOS_DTYPE',
+    'AGREGADO_DTYPES',
+    'COMPACT_DTYPES',
+    'PIPELINE_OUTPUT_CONSOLIDADO',
+    'PIPELINE_OUTPUT_AGREGADO',
+    'PIPELINE_OUTPUT_SEM_CORRESPONDENCIA',
+    'DEFAULT_PIPELINE_OUTPUTS',
+    'BENCHMARK_SCALES',
+    'BENCHMARK_REPEAT',
+    'BENCHMARK_OPERATORS',
+    'BENCHMARK_QUARTERS',
+    'BENCHMARK_MAX_SLOWDOWN',
+    'BENCHMARK_RESULTS_DIR',
 ]
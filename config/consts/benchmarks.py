@@ -0,0 +1,6 @@
+BENCHMARK_SCALES: list[int] = [10_000, 100_000]
+BENCHMARK_REPEAT: int = 3
+BENCHMARK_OPERATORS: int = 1_000
+BENCHMARK_QUARTERS: int = 3
+BENCHMARK_MAX_SLOWDOWN: float = 1.25
+BENCHMARK_RESULTS_DIR: str = "benchmarks/results"
@@ -6,3 +6,6 @@ TESTE1_OUTPUT_DIR: str = "TESTE1/output"
 TESTE2_INPUT_DIR: str = "TESTE2/data/input"
 TESTE2_CADASTRO_DIR: str = "TESTE2/data/cadastro"
 TESTE2_OUTPUT_DIR: str = "TESTE2/output"
+
+# Relatórios de execução
+RUN_REPORTS_DIR: str = "reports"
@@ -1,3 +1,5 @@
 SUPPORTED_SEPARATORS: list[str] = [";", ",", "\t", "|"]
 SUPPORTED_ENCODINGS: list[str] = ["latin1", "utf-8", "cp1252"]
 SUPPORTED_EXTENSIONS: list[str] = [".csv", ".txt", ".xlsx"]
+OUTPUT_FORMAT_CSV: str = "csv"
+OUTPUT_FORMAT_PARQUET: str = "parquet"
@@ -1,4 +1,16 @@
 CONSOLIDADO_FILENAME: str = "consolidado_despesas.csv"
+CONSOLIDADO_ZIP_FILENAME: str = "consolidado_despesas.zip"
 AGREGADO_FILENAME: str = "despesas_agregadas.csv"
 FINAL_ZIP_NAME: str = "Teste_FranciscoFernando.zip"
 CADASTRO_FILENAME: str = "Relatorio_cadop.csv"
+DIALECT_CACHE_FILENAME: str = "dialect_cache.json"
+PARTIAL_DOWNLOAD_SUFFIX: str = ".part"
+LISTING_CACHE_FILENAME: str = "ans_listing_cache.json"
+MANIFEST_FILENAME: str = "manifest.json"
+PARTITIONS_DIRNAME: str = "partitions"
+CONSOLIDADO_PARQUET_DIRNAME: str = "consolidado_despesas.parquet"
+# Prefixo "_": o pyarrow ignora o arquivo ao ler o dataset
+PARQUET_STATE_FILENAME: str = "_incremental.json"
+AGREGADO_PARQUET_FILENAME: str = "despesas_agregadas.parquet"
+CADASTRO_SNAPSHOT_FILENAME: str = "Relatorio_cadop.snapshot.parquet"
+UNMATCHED_KEYS_FILENAME: str = "cadastro_sem_correspondencia.csv"
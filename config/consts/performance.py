@@ -1,2 +1,3 @@
 DEFAULT_CHUNK_SIZE: int = 10000
 DEFAULT_MAX_WORKERS: int = 4
+DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
@@ -0,0 +1,7 @@
+PIPELINE_OUTPUT_CONSOLIDADO: str = "consolidado"
+PIPELINE_OUTPUT_AGREGADO: str = "agregado"
+PIPELINE_OUTPUT_SEM_CORRESPONDENCIA: str = "sem_correspondencia"
+DEFAULT_PIPELINE_OUTPUTS: list[str] = [
+    PIPELINE_OUTPUT_CONSOLIDADO,
+    PIPELINE_OUTPUT_AGREGADO,
+]
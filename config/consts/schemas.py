@@ -0,0 +1,32 @@
+PARQUET_PARTITION_COLS: list[str] = ["Ano", "Trimestre"]
+
+CONSOLIDADO_DTYPES: dict[str, str] = {
+    "CNPJ": "str",
+    "RazaoSocial": "str",
+    "Trimestre": "int64",
+    "Ano": "int64",
+    "ValorDespesas": "float64",
+}
+
+# ValorDespesas com INTEGER_CENTAVOS=true
+CENTAVOS_DTYPE: str = "int64"
+
+AGREGADO_DTYPES: dict[str, str] = {
+    "RazaoSocial": "str",
+    "UF": "str",
+    "TotalDespesas": "float64",
+    "MediaDespesasTrimestre": "float64",
+    "DesvioPadraoDespesas": "float64",
+}
+
+# Modo compacto: strings repetidas como categorias e inteiros reduzidos
+COMPACT_DTYPES: dict[str, str] = {
+    "REG_ANS": "category",
+    "CNPJ": "category",
+    "RazaoSocial": "category",
+    "RegistroANS": "category",
+    "Modalidade": "category",
+    "UF": "category",
+    "Trimestre": "int8",
+    "Ano": "int16",
+}
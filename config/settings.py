@@ -2,6 +2,7 @@ from pathlib import Path
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 from . import consts
 
@@ -19,11 +20,71 @@ class Settings(BaseSettings):
         default="INFO",
         description="Nível de logging (DEBUG, INFO, WARNING, ERROR)"
     )
+    output_format: Literal["csv", "parquet"] = Field(
+        default=consts.OUTPUT_FORMAT_CSV,
+        description="Formato das saídas intermediárias: csv ou parquet (particionado por Ano/Trimestre)"
+    )
+    compact_dtypes: bool = Field(
+        default=False,
+        description="Usa categorias e inteiros compactos nos DataFrames do TESTE 1 e TESTE 2"
+    )
+    integer_centavos: bool = Field(
+        default=False,
+        description="Mantém ValorDespesas em centavos inteiros (int64) nos DataFrames do TESTE 1 e TESTE 2; os arquivos continuam em reais"
+    )
+    teste1_streaming: bool = Field(
+        default=False,
+        description="Processa os arquivos em blocos, gravando o CSV consolidado incrementalmente"
+    )
+    teste1_read_from_zip: bool = Field(
+        default=False,
+        description="Lê os arquivos trimestrais direto dos ZIPs, sem extraí-los para disco"
+    )
+    teste1_incremental: bool = Field(
+        default=False,
+        description="Reprocessa apenas trimestres novos ou alterados, guiado pelo manifesto"
+    )
+    teste1_parallel: bool = Field(
+        default=False,
+        description="Processa os arquivos trimestrais em paralelo com um pool de processos"
+    )
+    teste1_fused_cleaning: bool = Field(
+        default=False,
+        description="Limpeza em uma única passada: máscaras combinadas e uma só cópia do DataFrame"
+    )
+    teste1_max_workers: int = Field(
+        default=consts.DEFAULT_MAX_WORKERS,
+        description="Número de processos usados no processamento paralelo"
+    )
+
+    teste2_refresh_cadastro: bool = Field(
+        default=False,
+        description="Revalida o Relatorio_cadop.csv no servidor da ANS (GET condicional com ETag/Last-Modified)"
+    )
+
+    teste2_streaming: bool = Field(
+        default=False,
+        description="Valida, enriquece e agrega o consolidado em blocos, com memória proporcional ao número de grupos"
+    )
+
+    pipeline_outputs: list[Literal["consolidado", "agregado", "sem_correspondencia"]] = Field(
+        default=consts.DEFAULT_PIPELINE_OUTPUTS,
+        description="Saídas gravadas pelo pipeline unificado; as demais etapas ficam só em memória"
+    )
+
+    trace_memory: bool = Field(
+        default=False,
+        description="Mede o pico de memória de cada etapa com tracemalloc (mais lento)"
+    )
 
     @property
     def project_root(self) -> Path:
         return Path(__file__).parent.parent
 
+    @property
+    def run_reports_dir(self) -> Path:
+        return self.project_root / consts.RUN_REPORTS_DIR
+
     # TESTE 1
     @property
     def teste1_raw_dir(self) -> Path:
@@ -33,6 +94,22 @@ class Settings(BaseSettings):
     def teste1_extracted_dir(self) -> Path:
         return self.project_root / consts.TESTE1_DATA_DIR / "extracted"
 
+    @property
+    def teste1_listing_cache_file(self) -> Path:
+        return self.project_root / consts.TESTE1_DATA_DIR / consts.LISTING_CACHE_FILENAME
+
+    @property
+    def teste1_dialect_cache_file(self) -> Path:
+        return self.project_root / consts.TESTE1_DATA_DIR / consts.DIALECT_CACHE_FILENAME
+
+    @property
+    def teste1_manifest_file(self) -> Path:
+        return self.project_root / consts.TESTE1_DATA_DIR / consts.MANIFEST_FILENAME
+
+    @property
+    def teste1_partitions_dir(self) -> Path:
+        return self.project_root / consts.TESTE1_DATA_DIR / consts.PARTITIONS_DIRNAME
+
     @property
     def teste1_output_path(self) -> Path:
         return self.project_root / consts.TESTE1_OUTPUT_DIR
@@ -41,6 +118,10 @@ class Settings(BaseSettings):
     def teste1_consolidated_file(self) -> Path:
         return self.teste1_output_path / consts.CONSOLIDADO_FILENAME
 
+    @property
+    def teste1_consolidated_parquet_dir(self) -> Path:
+        return self.teste1_output_path / consts.CONSOLIDADO_PARQUET_DIRNAME
+
     # TESTE 2
     @property
     def teste2_input_path(self) -> Path:
@@ -62,6 +143,14 @@ class Settings(BaseSettings):
     def teste2_aggregated_file(self) -> Path:
         return self.teste2_output_path / consts.AGREGADO_FILENAME
 
+    @property
+    def teste2_aggregated_parquet_file(self) -> Path:
+        return self.teste2_output_path / consts.AGREGADO_PARQUET_FILENAME
+
+    @property
+    def teste2_unmatched_keys_file(self) -> Path:
+        return self.teste2_output_path / consts.UNMATCHED_KEYS_FILENAME
+
     model_config = SettingsConfigDict(
         env_file='.env',
         env_file_encoding='utf-8',
@@ -0,0 +1,27 @@
+# O runner não é importado aqui: ele altera o sys.path para ver o TESTE1 e o
+# TESTE2, e os módulos dos testes importam apenas a instrumentação
+from .instrumentation import (
+    RunInstrumentation,
+    StageMetrics,
+    StageProbe,
+    active_run,
+    call_measured,
+    init_worker,
+    instrumented,
+    instrumented_chunks,
+    stage,
+    start_run
+)
+
+__all__ = [
+    'RunInstrumentation',
+    'StageMetrics',
+    'StageProbe',
+    'active_run',
+    'call_measured',
+    'init_worker',
+    'instrumented',
+    'instrumented_chunks',
+    'stage',
+    'start_run',
+]
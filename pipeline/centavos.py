@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+CENTAVOS_POR_REAL = 100
+
+
+def to_centavos(reais: pd.Series) -> pd.Series:
+    # Valores lidos dos arquivos (duas casas decimais) voltam exatos ao arredondar
+    if pd.api.types.is_integer_dtype(reais.dtype):
+        return reais
+
+    values = reais.to_numpy(dtype=np.float64, na_value=np.nan)
+    missing = np.isnan(values)
+    centavos = np.rint(np.where(missing, 0.0, values) * CENTAVOS_POR_REAL).astype(np.int64)
+
+    # Valores ausentes continuam ausentes; sem eles, int64 comum
+    if missing.any():
+        return pd.Series(
+            pd.arrays.IntegerArray(centavos, missing), index=reais.index, name=reais.name)
+
+    return pd.Series(centavos, index=reais.index, name=reais.name)
+
+
+def to_reais(centavos: pd.Series) -> pd.Series:
+    return centavos.astype(np.float64) / CENTAVOS_POR_REAL
+
+
+def format_centavos(centavos: pd.Series) -> pd.Series:
+    # Mesmo texto de float_format='%.2f', calculado sem passar por float
+    missing = centavos.isna().to_numpy()
+    values = centavos.to_numpy(dtype=np.int64, na_value=0)
+    reais, resto = np.divmod(np.abs(values), CENTAVOS_POR_REAL)
+
+    formatted = (
+        pd.Series(np.where(values < 0, '-', ''), index=centavos.index, dtype=str)
+        + pd.Series(reais, index=centavos.index).astype(str)
+        + '.'
+        + pd.Series(resto, index=centavos.index).astype(str).str.zfill(2)
+    )
+    formatted[missing] = None
+
+    return formatted.rename(centavos.name)
+
+
+def format_brl_centavos(centavos: int) -> str:
+    reais, resto = divmod(abs(int(centavos)), CENTAVOS_POR_REAL)
+    sign = '-' if centavos < 0 else ''
+    return f"R$ {sign}{reais:,}.{resto:02d}".translate(str.maketrans(",.", ".,"))
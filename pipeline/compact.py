@@ -0,0 +1,41 @@
+from functools import reduce
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+from config import consts
+
+
+def compact_dtypes(columns: Iterable[str]) -> Dict[str, str]:
+    columns = set(columns)
+    return {
+        col: dtype for col, dtype in consts.COMPACT_DTYPES.items()
+        if col in columns
+    }
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype(compact_dtypes(df.columns))
+
+
+def concat_compact(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    # pd.concat de categorias diferentes volta para object; com as categorias
+    # unificadas antes, o resultado já nasce compacto, sem o pico de memória
+    categorical = [
+        col for col, dtype in frames[0].dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    ]
+
+    for col in categorical:
+        # union ordena como o astype('category') sobre o frame concatenado
+        categories = reduce(
+            lambda left, right: left.union(right),
+            (frame[col].cat.categories for frame in frames[1:]),
+            frames[0][col].cat.categories
+        )
+        frames = [
+            frame.assign(**{col: frame[col].cat.set_categories(categories)})
+            for frame in frames
+        ]
+
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,285 @@
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import closing, contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypedDict
+
+try:
+    import resource
+except ImportError:
+    # Indisponível no Windows: o pico de RSS fica sem registro
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class StageMetrics(TypedDict):
+    name: str
+    calls: int
+    wall_time_s: float
+    cpu_time_s: float
+    rows_in: Optional[int]
+    rows_out: Optional[int]
+    max_rss_mb: Optional[float]
+    peak_traced_mb: Optional[float]
+
+
+class StageProbe:
+    def __init__(self, rows_in: Any = None):
+        self.rows_in = count_rows(rows_in)
+        self.rows_out: Optional[int] = None
+        self.peak_traced = 0
+        self.discarded = False
+
+    def set_rows_in(self, data: Any):
+        self.rows_in = count_rows(data)
+
+    def set_rows_out(self, data: Any):
+        self.rows_out = count_rows(data)
+
+    def discard(self):
+        self.discarded = True
+
+
+class RunInstrumentation:
+    def __init__(self, run_name: str, trace_memory: bool = False, context: Optional[Dict[str, Any]] = None):
+        self.run_name = run_name
+        self.trace_memory = trace_memory
+        self.context = context or {}
+        self.started_at = datetime.now()
+        self.stages: Dict[str, StageMetrics] = {}
+        self._open_probes: List[StageProbe] = []
+        self._wall_start = time.perf_counter()
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Any = None) -> Iterator[StageProbe]:
+        probe = StageProbe(rows_in)
+
+        if self.trace_memory:
+            # O pico do tracemalloc é global: etapas abertas guardam o seu antes do reset
+            self._update_open_peaks()
+            tracemalloc.reset_peak()
+
+        self._open_probes.append(probe)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            yield probe
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+
+            if self.trace_memory:
+                self._update_open_peaks()
+
+            self._open_probes.pop()
+            if not probe.discarded:
+                self._record(name, probe, wall_time, cpu_time)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'run': self.run_name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_time_s': round(time.perf_counter() - self._wall_start, 6),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'trace_memory': self.trace_memory,
+            'context': self.context,
+            'stages': list(self.stages.values())
+        }
+
+    def write_report(self, reports_dir: Path) -> Path:
+        reports_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = self.started_at.strftime('%Y%m%dT%H%M%S')
+        report_file = reports_dir / f"{self.run_name}_{timestamp}.json"
+
+        tmp_file = report_file.with_name(report_file.name + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2, ensure_ascii=False)
+        tmp_file.replace(report_file)
+
+        logger.info(f"  └─ Relatório de execução: {report_file}")
+        return report_file
+
+    def merge_stages(self, stages: List[StageMetrics]):
+        # Etapas medidas em processos do pool: tempos e linhas somados; RSS e
+        # pico do tracemalloc ficam com o maior valor entre os processos
+        for worker_metrics in stages:
+            metrics = self._metrics(worker_metrics['name'])
+            metrics['calls'] += worker_metrics['calls']
+            metrics['wall_time_s'] = round(metrics['wall_time_s'] + worker_metrics['wall_time_s'], 6)
+            metrics['cpu_time_s'] = round(metrics['cpu_time_s'] + worker_metrics['cpu_time_s'], 6)
+            metrics['rows_in'] = self._add_rows(metrics['rows_in'], worker_metrics['rows_in'])
+            metrics['rows_out'] = self._add_rows(metrics['rows_out'], worker_metrics['rows_out'])
+            metrics['max_rss_mb'] = self._max(metrics['max_rss_mb'], worker_metrics['max_rss_mb'])
+            metrics['peak_traced_mb'] = self._max(
+                metrics['peak_traced_mb'], worker_metrics['peak_traced_mb'])
+
+    def _metrics(self, name: str) -> StageMetrics:
+        metrics = self.stages.get(name)
+
+        if metrics is None:
+            metrics = self.stages[name] = {
+                'name': name,
+                'calls': 0,
+                'wall_time_s': 0.0,
+                'cpu_time_s': 0.0,
+                'rows_in': None,
+                'rows_out': None,
+                'max_rss_mb': None,
+                'peak_traced_mb': None
+            }
+
+        return metrics
+
+    def _record(self, name: str, probe: StageProbe, wall_time: float, cpu_time: float):
+        metrics = self._metrics(name)
+
+        # Etapas chamadas várias vezes (um arquivo, um bloco) são acumuladas
+        metrics['calls'] += 1
+        metrics['wall_time_s'] = round(metrics['wall_time_s'] + wall_time, 6)
+        metrics['cpu_time_s'] = round(metrics['cpu_time_s'] + cpu_time, 6)
+        metrics['rows_in'] = self._add_rows(metrics['rows_in'], probe.rows_in)
+        metrics['rows_out'] = self._add_rows(metrics['rows_out'], probe.rows_out)
+        metrics['max_rss_mb'] = self._max(metrics['max_rss_mb'], max_rss_mb())
+
+        if self.trace_memory:
+            peak_mb = round(probe.peak_traced / (1024 * 1024), 3)
+            metrics['peak_traced_mb'] = max(metrics['peak_traced_mb'] or 0.0, peak_mb)
+
+    def _update_open_peaks(self):
+        _, peak = tracemalloc.get_traced_memory()
+        for probe in self._open_probes:
+            probe.peak_traced = max(probe.peak_traced, peak)
+
+    @staticmethod
+    def _add_rows(total: Optional[int], rows: Optional[int]) -> Optional[int]:
+        if rows is None:
+            return total
+        return (total or 0) + rows
+
+    @staticmethod
+    def _max(current: Optional[float], value: Optional[float]) -> Optional[float]:
+        if value is None:
+            return current
+        return max(current or 0.0, value)
+
+
+_active_run: Optional[RunInstrumentation] = None
+
+
+def start_run(run_name: str, trace_memory: bool = False, context: Optional[Dict[str, Any]] = None) -> RunInstrumentation:
+    global _active_run
+    _active_run = RunInstrumentation(run_name, trace_memory, context)
+    return _active_run
+
+
+def active_run() -> Optional[RunInstrumentation]:
+    return _active_run
+
+
+def init_worker():
+    # Initializer do ProcessPoolExecutor: com fork, o processo filho herda a
+    # execução ativa do pai e mediria em uma cópia descartada
+    global _active_run
+    _active_run = None
+
+
+def call_measured(trace_memory: Optional[bool], func: Callable, *args) -> Tuple[Any, List[StageMetrics]]:
+    # Executada no processo do pool: mede a tarefa em uma execução própria e
+    # devolve as etapas com o resultado, para merge_stages no processo principal.
+    # trace_memory=None (pai sem execução ativa) não mede nada
+    global _active_run
+
+    if trace_memory is None:
+        return func(*args), []
+
+    _active_run = RunInstrumentation("worker", trace_memory)
+    try:
+        result = func(*args)
+        return result, list(_active_run.stages.values())
+    finally:
+        _active_run = None
+
+
+@contextmanager
+def stage(name: str, rows_in: Any = None) -> Iterator[StageProbe]:
+    # Sem execução ativa (ex.: uso como biblioteca) nada é medido
+    if _active_run is None:
+        yield StageProbe(rows_in)
+        return
+
+    with _active_run.stage(name, rows_in) as probe:
+        yield probe
+
+
+def instrumented(name: str) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            rows_in = next(
+                (arg for arg in args if count_rows(arg) is not None), None)
+
+            with stage(name, rows_in) as probe:
+                result = func(*args, **kwargs)
+                probe.set_rows_out(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def instrumented_chunks(name: str) -> Callable:
+    # Para geradores: cada bloco produzido conta como uma chamada da etapa,
+    # com as suas linhas; o tempo do consumidor entre os blocos fica de fora
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            chunks = func(*args, **kwargs)
+
+            # Consumidor que para antes do fim fecha o gerador original junto
+            with closing(chunks):
+                while True:
+                    with stage(name) as probe:
+                        chunk = next(chunks, None)
+                        if chunk is None:
+                            probe.discard()
+                        else:
+                            probe.set_rows_out(chunk)
+
+                    if chunk is None:
+                        return
+                    yield chunk
+        return wrapper
+    return decorator
+
+
+def count_rows(data: Any) -> Optional[int]:
+    # DataFrames e arrays contam linhas; listas (arquivos, ZIPs) contam itens
+    shape = getattr(data, 'shape', None)
+    if shape:
+        return int(shape[0])
+
+    if isinstance(data, list):
+        return len(data)
+
+    return None
+
+
+def max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(max_rss / divisor, 3)
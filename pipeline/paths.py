@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def add_source_paths():
+    # TESTE2/src fica antes: os dois projetos têm um pacote `utils`, e só o do
+    # TESTE2 é importado pelos módulos usados fora dos main.py
+    for source_dir in [PROJECT_ROOT / "TESTE1" / "src", PROJECT_ROOT / "TESTE2" / "src", PROJECT_ROOT]:
+        if str(source_dir) not in sys.path:
+            sys.path.insert(0, str(source_dir))
@@ -0,0 +1,259 @@
+import logging
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from pipeline.paths import add_source_paths
+
+add_source_paths()
+
+from config import get_settings, consts  # noqa: E402
+from downloader.ans_downloader import ANSDownloader  # noqa: E402
+from extractor.zip_extractor import ZipExtractor  # noqa: E402
+from manifest import QuarterManifest  # noqa: E402
+from processor.expenses_processor import ExpensesProcessor  # noqa: E402
+from validators.data_validator import DataValidator  # noqa: E402
+from enrichers.data_enricher import DataEnricher  # noqa: E402
+from aggregators.data_aggregator import DataAggregator  # noqa: E402
+from pipeline.centavos import to_centavos  # noqa: E402
+from pipeline.compact import compact_dtypes, to_compact  # noqa: E402
+from pipeline.instrumentation import stage, start_run  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(NamedTuple):
+    name: str
+    func: Callable[..., Any]
+    depends_on: Tuple[str, ...]
+
+
+class PipelineRunner:
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self.enricher: Optional[DataEnricher] = None
+
+        self._register_stages()
+
+    def add_stage(self, name: str, func: Callable[..., Any], depends_on: Tuple[str, ...] = ()):
+        self.stages[name] = Stage(name, func, depends_on)
+
+    def run(self, outputs: Optional[List[str]] = None) -> Dict[str, Any]:
+        outputs = outputs or self.settings.pipeline_outputs
+
+        # Só as etapas de que as saídas pedidas dependem são executadas
+        for output in outputs:
+            self._resolve(f"output_{output}")
+
+        return self.results
+
+    def _resolve(self, name: str) -> Any:
+        if name in self.results:
+            return self.results[name]
+
+        if name not in self.stages:
+            raise ValueError(f"Etapa desconhecida no pipeline: {name}")
+
+        pipeline_stage = self.stages[name]
+        inputs = [self._resolve(dependency)
+                  for dependency in pipeline_stage.depends_on]
+
+        logger.info(f"  └─ Etapa: {name}")
+        with stage(name, inputs[0] if inputs else None) as probe:
+            self.results[name] = pipeline_stage.func(*inputs)
+            probe.set_rows_out(self.results[name])
+
+        return self.results[name]
+
+    def _register_stages(self):
+        self.add_stage("download", self._download)
+        self.add_stage("extract", self._extract, ("download",))
+        self.add_stage("process", self._process, ("download", "extract"))
+        self.add_stage("validate", self._validate, ("process",))
+        self.add_stage("enrich", self._enrich, ("validate",))
+        self.add_stage("aggregate", self._aggregate, ("enrich",))
+
+        self.add_stage(
+            f"output_{consts.PIPELINE_OUTPUT_CONSOLIDADO}",
+            self._write_consolidado, ("process",))
+        self.add_stage(
+            f"output_{consts.PIPELINE_OUTPUT_AGREGADO}",
+            self._write_agregado, ("aggregate",))
+        self.add_stage(
+            f"output_{consts.PIPELINE_OUTPUT_SEM_CORRESPONDENCIA}",
+            self._write_sem_correspondencia, ("enrich",))
+
+    def _download(self) -> List[Path]:
+        downloader = ANSDownloader()
+        return downloader.download_latest_trimesters()
+
+    def _extract(self, zip_files: List[Path]) -> Optional[List[Path]]:
+        # Leitura direta dos ZIPs dispensa a extração para disco
+        if self.settings.teste1_read_from_zip or self.settings.teste1_incremental:
+            return zip_files
+
+        ZipExtractor().extract(zip_files)
+        return None
+
+    def _process(self, zip_files: List[Path], sources: Optional[List[Path]]) -> Optional[pd.DataFrame]:
+        processor = self._create_processor()
+
+        if self.settings.teste1_incremental:
+            # As partições do manifesto são o cache do modo incremental
+            manifest = QuarterManifest(
+                self.settings.teste1_manifest_file, self.settings.teste1_partitions_dir)
+            processor.run_incremental(zip_files, manifest)
+            df = pd.read_csv(
+                self.settings.teste1_consolidated_file, dtype=self._read_dtypes())
+
+            if self.settings.integer_centavos:
+                return df.assign(ValorDespesas=to_centavos(df['ValorDespesas']))
+            return df
+
+        df = processor.build(sources)
+        if df is None or self.settings.compact_dtypes:
+            return df
+
+        # Mesmo contrato de tipos do Parquet, sem inferência do CSV
+        return df.astype(self._consolidado_dtypes())
+
+    def _validate(self, df: Optional[pd.DataFrame]) -> pd.DataFrame:
+        if df is None:
+            raise ValueError("Nenhum dado consolidado pelo TESTE 1")
+
+        validator = DataValidator()
+        df_validated = validator.validate(df)
+        df_valid = validator.get_valid_records(df_validated)
+        validator.print_validation_report()
+
+        return df_valid
+
+    def _enrich(self, df_valid: pd.DataFrame) -> pd.DataFrame:
+        self.enricher = DataEnricher(
+            self.settings.teste2_cadastro_path,
+            self.settings.ans_cadastro_url,
+            self.settings.teste2_refresh_cadastro
+        )
+
+        if not self.enricher.load_cadastro():
+            logger.error("Falha ao carregar cadastro")
+            self.enricher = None
+            return df_valid
+
+        return self._apply_compact_dtypes(self.enricher.enrich(df_valid))
+
+    def _aggregate(self, df_enriched: pd.DataFrame) -> Tuple[DataAggregator, pd.DataFrame]:
+        aggregator = DataAggregator(centavos=self.settings.integer_centavos)
+        return aggregator, aggregator.aggregate(df_enriched)
+
+    def _write_consolidado(self, df: Optional[pd.DataFrame]):
+        if df is None:
+            return
+
+        # No modo incremental o consolidado já foi gravado a partir das partições
+        if not self.settings.teste1_incremental:
+            self._create_processor().export(df)
+
+        self._zip_file(
+            self.settings.teste1_consolidated_file,
+            self.settings.teste1_output_path / consts.CONSOLIDADO_ZIP_FILENAME
+        )
+
+    def _write_agregado(self, aggregation: Tuple[DataAggregator, pd.DataFrame]):
+        aggregator, df_aggregated = aggregation
+        output_file = self.settings.teste2_aggregated_file
+
+        aggregator.export(df_aggregated, output_file)
+
+        if self.settings.output_format == consts.OUTPUT_FORMAT_PARQUET:
+            aggregator.export(
+                df_aggregated, self.settings.teste2_aggregated_parquet_file)
+
+        self._zip_file(
+            output_file, self.settings.teste2_output_path / consts.FINAL_ZIP_NAME)
+
+    def _write_sem_correspondencia(self, df_enriched: pd.DataFrame):
+        if self.enricher is not None:
+            self.enricher.export_unmatched_keys(
+                self.settings.teste2_unmatched_keys_file)
+
+    def _create_processor(self) -> ExpensesProcessor:
+        return ExpensesProcessor(
+            extracted_dir=self.settings.teste1_extracted_dir,
+            output_file=self.settings.teste1_consolidated_file,
+            streaming=self.settings.teste1_streaming,
+            chunk_size=consts.DEFAULT_CHUNK_SIZE,
+            max_workers=self.settings.teste1_max_workers if self.settings.teste1_parallel else 1,
+            dialect_cache_file=self.settings.teste1_dialect_cache_file,
+            parquet_dir=(
+                self.settings.teste1_consolidated_parquet_dir
+                if self.settings.output_format == consts.OUTPUT_FORMAT_PARQUET else None
+            ),
+            compact_dtypes=self.settings.compact_dtypes,
+            centavos=self.settings.integer_centavos,
+            fused_cleaning=self.settings.teste1_fused_cleaning
+        )
+
+    def _consolidado_dtypes(self) -> Dict[str, str]:
+        if not self.settings.integer_centavos:
+            return consts.CONSOLIDADO_DTYPES
+
+        return {**consts.CONSOLIDADO_DTYPES, 'ValorDespesas': consts.CENTAVOS_DTYPE}
+
+    def _apply_compact_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not self.settings.compact_dtypes:
+            return df
+
+        return to_compact(df)
+
+    def _read_dtypes(self) -> Dict[str, str]:
+        if not self.settings.compact_dtypes:
+            return consts.CONSOLIDADO_DTYPES
+
+        return {**consts.CONSOLIDADO_DTYPES, **compact_dtypes(consts.CONSOLIDADO_DTYPES)}
+
+    def _zip_file(self, file_path: Path, zip_path: Path):
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            zipf.write(file_path, arcname=file_path.name)
+
+
+def main():
+    settings = get_settings()
+
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level),
+        format=consts.DEFAULT_LOG_FORMAT
+    )
+
+    logging.info("PIPELINE UNIFICADO - TESTE 1 E TESTE 2")
+
+    run = start_run(
+        "pipeline",
+        trace_memory=settings.trace_memory,
+        context=settings.model_dump(mode='json')
+    )
+
+    try:
+        for directory in [
+            settings.teste1_raw_dir,
+            settings.teste1_extracted_dir,
+            settings.teste1_output_path,
+            settings.teste2_cadastro_path,
+            settings.teste2_output_path
+        ]:
+            directory.mkdir(parents=True, exist_ok=True)
+
+        PipelineRunner(settings).run()
+
+        logging.info("PIPELINE FINALIZADO COM SUCESSO")
+
+    except Exception:
+        logging.exception("Erro durante a execução do pipeline")
+        raise
+
+    finally:
+        run.write_report(settings.run_reports_dir)
@@ -0,0 +1,30 @@
+import sys
+import zipfile
+from pathlib import Path
+from typing import List
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline.paths import add_source_paths
+
+add_source_paths()
+
+from benchmarks.generator import DatasetSpec, generate_demonstracoes
+
+
+@pytest.fixture
+def quarter_zips(tmp_path: Path) -> List[Path]:
+    # Trimestres sintéticos no formato da ANS, um ZIP por trimestre
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    zips = []
+
+    for csv_file in generate_demonstracoes(tmp_path / "extracted", DatasetSpec(rows=3000, quarters=2)):
+        zip_path = raw_dir / f"{csv_file.stem}.zip"
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.write(csv_file, arcname=csv_file.name)
+        zips.append(zip_path)
+
+    return zips
@@ -0,0 +1,277 @@
+import hashlib
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+import requests
+
+from config import consts
+from downloader.ans_downloader import ANSDownloader
+
+YEAR = "2025"
+OLDER_YEAR = "2024"
+LAST_MODIFIED = "Wed, 01 Oct 2025 12:00:00 GMT"
+QUARTERS = [f"{quarter}.zip" for quarter in consts.TRIMESTRES_TO_PROCESS]
+INTERRUPTED = QUARTERS[0]
+
+
+class FakeANS(ThreadingHTTPServer):
+    # Servidor de arquivos mínimo: índices por ano (com ETag/Last-Modified e
+    # 304), HEAD, Range/If-Range e ETag nos ZIPs
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeANSHandler)
+        self.files: Dict[str, Tuple[bytes, str]] = {}
+        self.years: Dict[str, Dict[str, Tuple[bytes, str]]] = {YEAR: self.files}
+        self.head_sizes: Dict[str, int] = {}
+        self.interrupt_after: Dict[str, int] = {}
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []
+        self.not_modified: List[str] = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def ranges(self, filename: str) -> List[Optional[str]]:
+        return [
+            headers.get("Range") for method, path, headers in self.requests
+            if method == "GET" and path == f"/{YEAR}/{filename}"
+        ]
+
+    def listing_requests(self, path: str) -> List[Dict[str, str]]:
+        return [headers for method, request_path, headers in self.requests
+                if method == "GET" and request_path == path]
+
+
+class FakeANSHandler(BaseHTTPRequestHandler):
+    server: FakeANS
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body: bool):
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+        years = self.server.years
+
+        if self.path == "/":
+            return self._send_listing(
+                "".join(f'<a href="{year}/">{year}/</a>' for year in sorted(years)), send_body)
+
+        year, _, filename = self.path.strip("/").partition("/")
+        if year in years and not filename:
+            return self._send_listing(
+                "".join(f'<a href="{name}">{name}</a>' for name in years[year]), send_body)
+
+        if filename not in years.get(year, {}):
+            return self.send_error(404)
+
+        body, etag = years[year][filename]
+        start = 0
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+
+        if range_header and (if_range is None or if_range == etag):
+            start = int(range_header.removeprefix("bytes=").rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+
+        length = self.server.head_sizes.get(filename, len(body)) if not send_body else len(body)
+        self.send_header("Content-Length", str(length - start))
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+        if not send_body:
+            return
+
+        payload = body[start:]
+        limit = self.server.interrupt_after.pop(filename, None)
+        if limit is not None:
+            # Conexão cai no meio do corpo, depois de anunciar o tamanho inteiro
+            self.wfile.write(payload[:limit])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+
+        self.wfile.write(payload)
+
+    def _send_listing(self, links: str, send_body: bool):
+        body = f"<html><body>{links}</body></html>".encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+        # If-None-Match tem precedência; sem ele vale o If-Modified-Since
+        if_none_match = self.headers.get("If-None-Match")
+        if (if_none_match == etag if if_none_match is not None
+                else self.headers.get("If-Modified-Since") == LAST_MODIFIED):
+            self.server.not_modified.append(self.path)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def payload(seed: int, size: int) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+
+@pytest.fixture
+def server():
+    server = FakeANS()
+    for seed, name in enumerate(QUARTERS):
+        server.files[name] = (payload(seed, 1000), f'"{name}-v1"')
+
+    # Maior que o bloco de escrita, para que parte do arquivo chegue ao disco antes da queda
+    server.files[INTERRUPTED] = (
+        payload(42, 3 * consts.DOWNLOAD_CHUNK_SIZE + 123), '"grande-v1"')
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_downloader(server: FakeANS, tmp_path: Path) -> ANSDownloader:
+    return ANSDownloader(
+        base_url=server.base_url,
+        output_dir=tmp_path / "raw",
+        max_workers=1,
+        listing_cache_file=tmp_path / "listing_cache.json"
+    )
+
+
+def part_files(output_dir: Path, filename: str) -> Tuple[Path, Path]:
+    part_path = output_dir / (filename + consts.PARTIAL_DOWNLOAD_SUFFIX)
+    return part_path, part_path.with_name(part_path.name + ".etag")
+
+
+def interrupt_first_download(server: FakeANS, tmp_path: Path) -> int:
+    server.interrupt_after[INTERRUPTED] = 2 * consts.DOWNLOAD_CHUNK_SIZE + 10
+
+    with pytest.raises(requests.RequestException):
+        make_downloader(server, tmp_path).download_latest_trimesters()
+
+    part_path, etag_path = part_files(tmp_path / "raw", INTERRUPTED)
+    size = part_path.stat().st_size
+    assert 0 < size < len(server.files[INTERRUPTED][0])
+    assert etag_path.read_text() == server.files[INTERRUPTED][1]
+    assert not (tmp_path / "raw" / INTERRUPTED).exists()
+    return size
+
+
+def test_interrupted_download_resumes_from_partial_file(server, tmp_path):
+    partial_size = interrupt_first_download(server, tmp_path)
+
+    files = make_downloader(server, tmp_path).download_latest_trimesters()
+
+    assert sorted(path.name for path in files) == sorted(QUARTERS)
+    assert server.ranges(INTERRUPTED) == [None, f"bytes={partial_size}-"]
+    assert (tmp_path / "raw" / INTERRUPTED).read_bytes() == server.files[INTERRUPTED][0]
+    assert not any(path.exists() for path in part_files(tmp_path / "raw", INTERRUPTED))
+
+
+def test_etag_change_discards_partial_file(server, tmp_path):
+    interrupt_first_download(server, tmp_path)
+    # Maior que o parcial, para que só o ETag decida o descarte
+    new_body = payload(7, 4 * consts.DOWNLOAD_CHUNK_SIZE + 5)
+    server.files[INTERRUPTED] = (new_body, '"grande-v2"')
+
+    make_downloader(server, tmp_path).download_latest_trimesters()
+
+    # Sem Range: o .part do ETag antigo não é reaproveitado
+    assert server.ranges(INTERRUPTED) == [None, None]
+    assert (tmp_path / "raw" / INTERRUPTED).read_bytes() == new_body
+    assert not any(path.exists() for path in part_files(tmp_path / "raw", INTERRUPTED))
+
+
+def test_existing_file_with_other_size_is_downloaded_again(server, tmp_path):
+    make_downloader(server, tmp_path).download_latest_trimesters()
+    server.requests.clear()
+
+    stale = tmp_path / "raw" / QUARTERS[1]
+    stale.write_bytes(b"truncado")
+
+    make_downloader(server, tmp_path).download_latest_trimesters()
+
+    # Só o arquivo com tamanho diferente volta a ser baixado
+    assert server.ranges(QUARTERS[1]) == [None]
+    assert server.ranges(QUARTERS[2]) == []
+    assert stale.read_bytes() == server.files[QUARTERS[1]][0]
+
+
+def test_size_mismatch_after_download_is_rejected(server, tmp_path):
+    body = server.files[QUARTERS[1]][0]
+    server.head_sizes[QUARTERS[1]] = len(body) + 1
+
+    with pytest.raises(IOError, match="Download incompleto"):
+        make_downloader(server, tmp_path).download_latest_trimesters()
+
+    # O arquivo final não aparece; o parcial fica para a próxima tentativa
+    assert not (tmp_path / "raw" / QUARTERS[1]).exists()
+    assert part_files(tmp_path / "raw", QUARTERS[1])[0].read_bytes() == body
+
+
+def test_discovery_stops_at_the_newest_year_with_enough_zips(server, tmp_path):
+    server.years[OLDER_YEAR] = {
+        f"{quarter}T{OLDER_YEAR}.zip": (payload(10 + quarter, 500), f'"{quarter}T{OLDER_YEAR}"')
+        for quarter in range(1, 5)
+    }
+
+    files = make_downloader(server, tmp_path).download_latest_trimesters()
+
+    # O ano mais recente já tem ZIPs suficientes: o índice de 2024 nem é pedido
+    assert sorted(path.name for path in files) == sorted(QUARTERS)
+    assert server.listing_requests(f"/{YEAR}/")
+    assert server.listing_requests(f"/{OLDER_YEAR}/") == []
+
+    # Com um trimestre a menos no ano corrente, o anterior completa a lista
+    del server.files[QUARTERS[-1]]
+    files = make_downloader(server, tmp_path / "menos").download_latest_trimesters()
+
+    assert len(server.listing_requests(f"/{OLDER_YEAR}/")) == 1
+    assert [path.name for path in files] == [*sorted(QUARTERS[:-1], reverse=True), f"4T{OLDER_YEAR}.zip"]
+
+
+def test_listings_are_revalidated_with_conditional_get(server, tmp_path):
+    first = make_downloader(server, tmp_path).download_latest_trimesters()
+    assert server.not_modified == []
+
+    # Nova instância, mesmo cache em disco: cada índice volta como 304 e o corpo vem do cache
+    server.requests.clear()
+    second = make_downloader(server, tmp_path).download_latest_trimesters()
+
+    assert second == first
+    assert server.not_modified == ["/", f"/{YEAR}/"]
+    for path in ["/", f"/{YEAR}/"]:
+        [headers] = server.listing_requests(path)
+        assert headers["If-Modified-Since"] == LAST_MODIFIED
+        assert headers["If-None-Match"].startswith('"')
+
+    # Índice alterado no servidor: ETag diferente, corpo novo baixado e guardado
+    server.files[f"4T{YEAR}.zip"] = (payload(99, 700), f'"4T{YEAR}"')
+    server.not_modified.clear()
+    third = make_downloader(server, tmp_path).download_latest_trimesters()
+
+    assert server.not_modified == ["/"]
+    assert f"4T{YEAR}.zip" in [path.name for path in third]
+    assert INTERRUPTED not in [path.name for path in third]
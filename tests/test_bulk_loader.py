@@ -0,0 +1,190 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Integração com um PostgreSQL real: cada teste cria e apaga o próprio schema
+DSN = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not DSN, reason="TEST_DATABASE_URL não definido")
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text
+
+ROOT = Path(__file__).resolve().parent.parent
+SCHEMA_SQL = ROOT / "TESTE3" / "sql" / "01_schema.sql"
+
+if str(ROOT / "TESTE4" / "src") not in sys.path:
+    sys.path.append(str(ROOT / "TESTE4" / "src"))
+
+from loader import BulkLoader
+
+CADASTRO = """REGISTRO_OPERADORA;CNPJ;Razao_Social;Modalidade;UF
+300001;11.222.333/0001-81;Operadora Um;Autogestão;SP
+300002;99888777000166;Operadora Dois;Cooperativa Médica;rj
+300002;99888777000166;Operadora Dois Atualizada;Cooperativa Médica;RJ
+12;00000000000000;Registro Curto;Autogestão;SP
+300003;;NÃO INFORMADO;Autogestão;MG
+"""
+
+CONSOLIDADO = """CNPJ,RazaoSocial,Trimestre,Ano,ValorDespesas
+300001,OPERADORA UM,1,2024,100.50
+300001,OPERADORA UM,2,2024,200.00
+300002,OPERADORA DOIS,1,2024,10
+300009,Operadora Fora Do Cadastro,3,2024,5.555
+300001,OPERADORA UM,5,2024,1.00
+300001,OPERADORA UM,1,2024,-1.00
+"""
+
+AGREGADO = """RazaoSocial,UF,TotalDespesas,MediaDespesasTrimestre,DesvioPadraoDespesas
+OPERADORA UM,SP,300.50,150.25,70.36
+OPERADORA DOIS,RJ,10.00,10.00,0.00
+OPERADORA UM,SP,301.00,150.50,70.00
+SEM UF,XX1,1.00,1.00,0.00
+"""
+
+
+def write(directory: Path, name: str, content: str, encoding: str = "utf-8") -> Path:
+    path = directory / name
+    path.write_text(content, encoding=encoding)
+    return path
+
+
+@pytest.fixture
+def engine():
+    schema = f"bulk_loader_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(DSN)
+    with admin.begin() as connection:
+        connection.execute(text(f"CREATE SCHEMA {schema}"))
+
+    engine = create_engine(DSN, connect_args={"options": f"-csearch_path={schema}"})
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(SCHEMA_SQL.read_text(encoding="utf-8"))
+        cursor.close()
+        raw.commit()
+    finally:
+        raw.close()
+
+    yield engine
+
+    engine.dispose()
+    with admin.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+    admin.dispose()
+
+
+@pytest.fixture
+def sources(tmp_path: Path):
+    return {
+        "cadastro_file": write(tmp_path, "Relatorio_cadop.csv", CADASTRO, encoding="latin1"),
+        "consolidado_file": write(tmp_path, "consolidado_despesas.csv", CONSOLIDADO),
+        "agregado_file": write(tmp_path, "despesas_agregadas.csv", AGREGADO)
+    }
+
+
+def rows(engine, sql: str):
+    with engine.connect() as connection:
+        return connection.execute(text(sql)).all()
+
+
+def index_definitions(engine):
+    return sorted(rows(engine, """
+        SELECT indexdef FROM pg_indexes
+        WHERE schemaname = current_schema()
+          AND tablename IN ('operadoras', 'despesas_consolidadas', 'despesas_agregadas')
+    """))
+
+
+def snapshot(engine):
+    return {
+        "operadoras": rows(engine, """
+            SELECT registro_ans, cnpj, razao_social, modalidade, uf
+            FROM operadoras ORDER BY registro_ans"""),
+        "despesas_consolidadas": rows(engine, """
+            SELECT id, registro_ans, razao_social, trimestre, ano, valor_despesas::text
+            FROM despesas_consolidadas ORDER BY id"""),
+        "despesas_agregadas": rows(engine, """
+            SELECT razao_social, uf, total_despesas::text,
+                   media_despesas_trimestre::text, desvio_padrao_despesas::text
+            FROM despesas_agregadas ORDER BY razao_social, uf""")
+    }
+
+
+def test_load_copies_upserts_and_recreates_secondary_indexes(engine, sources, caplog):
+    # Nome que exige aspas, para o DROP INDEX montado a partir do catálogo
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE INDEX "Idx Operadoras Razao" ON operadoras (razao_social)'))
+    indexes = index_definitions(engine)
+    loader = BulkLoader(engine)
+
+    with caplog.at_level("INFO"):
+        loaded = loader.load(**sources)
+
+    assert loaded == {"operadoras": 2, "despesas_consolidadas": 4, "despesas_agregadas": 2}
+    assert loader.skipped == {"operadoras": 2, "despesas_consolidadas": 2, "despesas_agregadas": 1}
+
+    # 12 índices secundários; PK e UNIQUE do ON CONFLICT ficam durante a carga
+    assert "12 índices secundários removidos" in caplog.text
+    assert "12 índices secundários recriados" in caplog.text
+    assert index_definitions(engine) == indexes
+
+    data = snapshot(engine)
+    assert data["operadoras"] == [
+        ("300001", "11222333000181", "OPERADORA UM", "Autogestão", "SP"),
+        ("300002", "99888777000166", "OPERADORA DOIS ATUALIZADA", "Cooperativa Médica", "RJ"),
+        ("300009", None, "OPERADORA FORA DO CADASTRO", None, None)
+    ]
+    assert data["despesas_consolidadas"] == [
+        (1, "300001", "OPERADORA UM", 1, 2024, "100.50"),
+        (2, "300001", "OPERADORA UM", 2, 2024, "200.00"),
+        (3, "300002", "OPERADORA DOIS", 1, 2024, "10.00"),
+        (4, "300009", "OPERADORA FORA DO CADASTRO", 3, 2024, "5.56")
+    ]
+    assert data["despesas_agregadas"] == [
+        ("OPERADORA DOIS", "RJ", "10.00", "10.00", "0.00"),
+        ("OPERADORA UM", "SP", "301.00", "150.50", "70.00")
+    ]
+
+
+def test_reload_updates_on_conflict_and_truncate_replaces_despesas(engine, sources, tmp_path):
+    BulkLoader(engine).load(**sources)
+
+    write(tmp_path, "Relatorio_cadop.csv",
+          CADASTRO.replace("Operadora Um", "Operadora Um Renomeada"), encoding="latin1")
+    write(tmp_path, "despesas_agregadas.csv",
+          AGREGADO.replace("OPERADORA DOIS,RJ,10.00", "OPERADORA DOIS,RJ,12.00"))
+
+    # Sem truncate as despesas acumulam; com truncate o id recomeça
+    BulkLoader(engine).load(consolidado_file=sources["consolidado_file"])
+    assert rows(engine, "SELECT count(*) FROM despesas_consolidadas") == [(8,)]
+
+    BulkLoader(engine, truncate=True).load(**sources)
+    data = snapshot(engine)
+
+    assert [row[0] for row in data["despesas_consolidadas"]] == [1, 2, 3, 4]
+    assert data["operadoras"][0][2] == "OPERADORA UM RENOMEADA"
+    assert data["despesas_agregadas"][0][2] == "12.00"
+    assert len(data["despesas_agregadas"]) == 2
+
+
+@pytest.mark.parametrize("drop_indexes", [True, False])
+def test_bad_row_rolls_back_truncate_copy_and_indexes(engine, sources, tmp_path, drop_indexes):
+    BulkLoader(engine).load(**sources)
+    before = snapshot(engine)
+    indexes = index_definitions(engine)
+
+    # Razão social acima do VARCHAR(255): o COPY falha depois do truncate e da remoção dos índices
+    write(tmp_path, "despesas_agregadas.csv",
+          AGREGADO + f"{'X' * 300},SP,1.00,1.00,0.00\n")
+
+    with pytest.raises(engine.dialect.dbapi.Error):
+        BulkLoader(engine, truncate=True, drop_indexes=drop_indexes).load(**sources)
+
+    assert snapshot(engine) == before
+    assert index_definitions(engine) == indexes
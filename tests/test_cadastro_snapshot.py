@@ -0,0 +1,83 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+from config import consts
+from enrichers.cadastro_index import CadastroIndex
+from enrichers.data_enricher import DataEnricher
+
+CADASTRO = """REGISTRO_OPERADORA;CNPJ;Razao_Social;Modalidade;UF
+300001;11.222.333/0001-81;OPERADORA UM;Autogestão;SP
+300002;;OPERADORA DOIS;Cooperativa Médica;
+300002;99888777000166;OPERADORA DOIS BIS;Autogestão;RJ
+ 300003 ;44555666000199;;Filantropia;MG
+300004;123;OPERADORA QUATRO;;BA
+"""
+
+
+def make_enricher(cadastro_dir: Path) -> DataEnricher:
+    enricher = DataEnricher(cadastro_dir, "http://localhost.invalid/")
+    assert enricher.load_cadastro()
+    return enricher
+
+
+def enrich(enricher: DataEnricher) -> pd.DataFrame:
+    df = pd.DataFrame({
+        'CNPJ': ['300001', '300002', '300003', '11222333000181', '44555666000199', '999999', '123'],
+        'RazaoSocial': ['', 'X', 'NÃO INFORMADO', None, '', 'Y', 'Z'],
+        'ValorDespesas': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+    })
+    return enricher.enrich(df)
+
+
+@pytest.fixture
+def cadastro_dir(tmp_path: Path) -> Path:
+    cadastro_dir = tmp_path / "cadastro"
+    cadastro_dir.mkdir()
+    (cadastro_dir / consts.CADASTRO_FILENAME).write_text(CADASTRO, encoding='latin1')
+    return cadastro_dir
+
+
+def test_snapshot_loads_index_without_rebuilding(cadastro_dir, monkeypatch):
+    parsed = make_enricher(cadastro_dir)
+    assert (cadastro_dir / consts.CADASTRO_SNAPSHOT_FILENAME).exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("índice reconstruído")
+
+    monkeypatch.setattr(CadastroIndex, "__init__", fail)
+    monkeypatch.setattr(pd, "read_csv", fail)
+    cached = make_enricher(cadastro_dir)
+
+    assert cached.cadastro_df is None
+    tm.assert_frame_equal(enrich(cached), enrich(parsed))
+    assert cached.enrichment_stats == parsed.enrichment_stats
+    assert cached.enrichment_stats['multiple_matches'] == 1
+    tm.assert_series_equal(cached.unmatched_counts, parsed.unmatched_counts)
+
+
+def test_snapshot_survives_mtime_change_and_rebuilds_on_content_change(cadastro_dir):
+    make_enricher(cadastro_dir)
+    cadastro_file = cadastro_dir / consts.CADASTRO_FILENAME
+    stat = cadastro_file.stat()
+
+    # Mesmo conteúdo com outro mtime: o snapshot continua válido
+    os.utime(cadastro_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert make_enricher(cadastro_dir).snapshot.load(cadastro_file) is not None
+
+    cadastro_file.write_text(
+        CADASTRO.replace("OPERADORA UM", "OPERADORA 1"), encoding='latin1')
+    enricher = DataEnricher(cadastro_dir, "http://localhost.invalid/")
+    assert enricher.snapshot.load(cadastro_file) is None
+    assert enricher.load_cadastro()
+    assert enrich(enricher)['RazaoSocial'].iloc[0] == "OPERADORA 1"
+
+
+def test_corrupt_snapshot_is_ignored(cadastro_dir):
+    expected = enrich(make_enricher(cadastro_dir))
+    (cadastro_dir / consts.CADASTRO_SNAPSHOT_FILENAME).write_bytes(b"not parquet")
+
+    tm.assert_frame_equal(enrich(make_enricher(cadastro_dir)), expected)
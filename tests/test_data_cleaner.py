@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+from cleaners import DataCleaner
+from pipeline.compact import to_compact
+
+
+def expenses(rows: int = 5000, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    cnpj = rng.integers(300000, 300080, rows).astype(str)
+    razao = np.where(rng.random(rows) < 0.05, 'OUTRA RAZAO', np.char.add('OPERADORA ', cnpj))
+
+    return pd.DataFrame({
+        'REG_ANS': cnpj,
+        'CNPJ': cnpj,
+        'RazaoSocial': razao,
+        'Trimestre': rng.choice([1, 2, 3, 4, 5, 0], rows, p=[0.3, 0.3, 0.2, 0.1, 0.05, 0.05]),
+        'Ano': 2025,
+        'ValorDespesas': rng.integers(-20, 200, rows) / 4
+    })
+
+
+def clean(df: pd.DataFrame, fused: bool):
+    cleaner = DataCleaner(fused=fused)
+    return cleaner.clean(df), cleaner.get_cleaning_report()
+
+
+@pytest.mark.parametrize("variant", ["numerico", "texto", "compacto", "sem_trimestre", "sem_razao"])
+def test_fused_matches_staged(variant):
+    df = expenses()
+
+    if variant == "texto":
+        df['Trimestre'] = df['Trimestre'].astype(str).where(df.index % 97 != 0, 'x')
+    elif variant == "compacto":
+        df = to_compact(df)
+    elif variant == "sem_trimestre":
+        df = df.drop(columns='Trimestre')
+    elif variant == "sem_razao":
+        df = df.drop(columns='RazaoSocial')
+
+    staged, staged_report = clean(df, fused=False)
+    fused, fused_report = clean(df, fused=True)
+
+    tm.assert_frame_equal(fused, staged)
+    assert fused_report == staged_report
+    assert staged_report['total_inconsistencies'] > 0
+
+
+def test_fused_does_not_modify_input():
+    df = expenses()
+    original = df.copy()
+
+    clean(df, fused=True)
+
+    tm.assert_frame_equal(df, original)
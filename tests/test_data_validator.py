@@ -0,0 +1,54 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+from config import consts
+from validators.data_validator import DataValidator
+
+CSV = """CNPJ,RazaoSocial,Trimestre,Ano,ValorDespesas
+300016,OPERADORA A,1,2025,1234.56
+300030,OPERADORA B,1,2025,99.90
+11222333000181,OPERADORA C,2,2025,10.00
+11222333000182,OPERADORA D,2,2025,20.00
+1234,OPERADORA E,3,2025,-5.00
+300016,OPERADORA A,3,2025,7.00
+"""
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({
+        col: dtype for col, dtype in consts.COMPACT_DTYPES.items()
+        if col in df.columns
+    })
+
+
+def validate(df: pd.DataFrame) -> pd.DataFrame:
+    validated = DataValidator().validate(df)
+    return validated[['VALIDO', 'MOTIVO_INVALIDACAO']]
+
+
+def test_compact_matches_default_on_int_inferred_identifiers():
+    df = pd.read_csv(io.StringIO(CSV))
+    assert df['CNPJ'].dtype == np.int64
+
+    expected = validate(df)
+    tm.assert_frame_equal(validate(compact(df)), expected)
+    assert expected['VALIDO'].tolist() == [True, True, True, False, False, True]
+
+
+def test_compact_null_identifier_is_format_error():
+    df = pd.read_csv(io.StringIO(CSV), dtype={'CNPJ': str})
+    df.loc[1, 'CNPJ'] = None
+
+    expected = validate(df)
+    tm.assert_frame_equal(validate(compact(df)), expected)
+    assert not expected.loc[1, 'VALIDO']
+
+
+def test_compact_all_null_identifiers():
+    df = pd.read_csv(io.StringIO(CSV), dtype={'CNPJ': str})
+    df['CNPJ'] = None
+
+    tm.assert_frame_equal(validate(compact(df)), validate(df))
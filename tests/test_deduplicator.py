@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from cleaners import DataCleaner
+from cleaners.deduplicator import RowDeduplicator
+
+
+def test_matches_pandas_duplicated_across_chunks():
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        'CNPJ': rng.integers(0, 50, 20000).astype(str),
+        'ValorDespesas': rng.integers(0, 40, 20000) / 4
+    })
+    deduplicator = RowDeduplicator()
+
+    # Blocos de tamanhos variados forçam a fusão dos blocos ordenados
+    bounds = np.cumsum([0, 1, 7, 300, 2500, 40, 17152])
+    masks = [
+        deduplicator.duplicated(RowDeduplicator.hash_rows(df.iloc[start:end]))
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+    np.testing.assert_array_equal(np.concatenate(masks), df.duplicated().to_numpy())
+    assert len(deduplicator) == int((~df.duplicated()).sum())
+
+
+def test_empty_chunks_are_ignored():
+    deduplicator = RowDeduplicator()
+    empty = np.empty(0, dtype=np.uint64)
+
+    assert len(deduplicator.duplicated(empty)) == 0
+    assert not deduplicator.duplicated(np.array([1, 2], dtype=np.uint64)).any()
+    assert len(deduplicator.duplicated(empty)) == 0
+    assert deduplicator.duplicated(np.array([2, 3], dtype=np.uint64)).tolist() == [True, False]
+
+
+def test_seen_rows_do_not_leak_between_stream_runs():
+    cleaner = DataCleaner()
+    chunk = pd.DataFrame({'CNPJ': ['1', '2'], 'ValorDespesas': [1.0, 2.0]})
+
+    assert len(cleaner.clean_chunk(chunk)) == 2
+    assert len(cleaner.clean_chunk(chunk)) == 0
+    cleaner.finish_stream()
+
+    assert len(cleaner.clean_chunk(chunk)) == 2
@@ -0,0 +1,156 @@
+import zipfile
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+import pandas.testing as tm
+
+from config import consts
+from manifest import QuarterManifest
+from processor.expenses_processor import ExpensesProcessor
+
+
+def make_processor(tmp_path: Path, name: str, **kwargs) -> ExpensesProcessor:
+    output_dir = tmp_path / name
+    return ExpensesProcessor(
+        extracted_dir=tmp_path / "extracted",
+        output_file=output_dir / consts.CONSOLIDADO_FILENAME,
+        parquet_dir=output_dir / "consolidado.parquet",
+        **kwargs
+    )
+
+
+def run_incremental(tmp_path: Path, name: str, zips: List[Path], **kwargs) -> ExpensesProcessor:
+    processor = make_processor(tmp_path, name, **kwargs)
+    manifest = QuarterManifest(tmp_path / name / "manifest.json", tmp_path / name / "partitions")
+    processor.run_incremental(zips, manifest)
+    return processor
+
+
+def read_parquet(processor: ExpensesProcessor) -> pd.DataFrame:
+    df = pd.read_parquet(processor.parquet_dir, engine='pyarrow')
+    df = df[list(consts.CONSOLIDADO_DTYPES)].astype(consts.CONSOLIDADO_DTYPES)
+    return df.sort_values(['Ano', 'Trimestre', 'CNPJ', 'ValorDespesas']).reset_index(drop=True)
+
+
+def test_incremental_parquet_with_centavos_stays_in_reais(tmp_path, quarter_zips):
+    reais = run_incremental(tmp_path, "reais", quarter_zips)
+    centavos = run_incremental(tmp_path, "centavos", quarter_zips, centavos=True)
+
+    expected = read_parquet(reais)
+    assert expected['ValorDespesas'].abs().max() > 100
+
+    tm.assert_frame_equal(read_parquet(centavos), expected)
+    assert centavos.output_file.read_bytes() == reais.output_file.read_bytes()
+
+
+def parquet_files(processor: ExpensesProcessor) -> dict:
+    return {
+        path.relative_to(processor.parquet_dir): path.stat().st_mtime_ns
+        for path in processor.parquet_dir.rglob("*.parquet")
+    }
+
+
+def test_incremental_parquet_rewrites_only_changed_quarters(tmp_path, quarter_zips, monkeypatch):
+    first = run_incremental(tmp_path, "parquet", quarter_zips)
+    before = parquet_files(first)
+    changed, unchanged = sorted(quarter_zips)
+
+    # Um arquivo a mais no ZIP muda o hash sem mudar os dados: só esse trimestre é reprocessado
+    with zipfile.ZipFile(changed, 'a') as archive:
+        archive.writestr("LEIAME.txt", "sem dados")
+
+    partitions = []
+    read_csv = pd.read_csv
+
+    def spy(source, *args, **kwargs):
+        if isinstance(source, Path) and source.parent.name == "partitions":
+            partitions.append(source.stem)
+        return read_csv(source, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", spy)
+
+    second = run_incremental(tmp_path, "parquet", quarter_zips)
+    after = parquet_files(second)
+
+    # Só a partição reprocessada é relida para o Parquet
+    assert partitions == [changed.stem]
+    unchanged_dir = Path("Ano=2024") / "Trimestre=2"
+    assert unchanged.stem == "2T2024"
+    assert {k: v for k, v in after.items() if unchanged_dir in k.parents} == \
+        {k: v for k, v in before.items() if unchanged_dir in k.parents}
+    tm.assert_frame_equal(read_parquet(second), read_parquet(first))
+
+    # Trimestre que saiu do histórico some do dataset
+    third = run_incremental(tmp_path, "parquet", [unchanged])
+    assert {k.parent.parent.name for k in parquet_files(third)} == {"Ano=2024"}
+    assert {k.parent.name for k in parquet_files(third)} == {"Trimestre=2"}
+    assert len(read_parquet(third)) == (read_parquet(first)['Trimestre'] == 2).sum()
+
+
+def test_incremental_parquet_rebuilds_dataset_from_another_run(tmp_path, quarter_zips):
+    run_incremental(tmp_path, "parquet", quarter_zips)
+    expected = read_parquet(make_processor(tmp_path, "parquet"))
+
+    # O modo completo regrava o dataset sem o estado incremental
+    full = make_processor(tmp_path, "parquet")
+    full.run(quarter_zips[:1])
+
+    processor = run_incremental(tmp_path, "parquet", quarter_zips)
+    tm.assert_frame_equal(read_parquet(processor), expected)
+
+
+def run_full(tmp_path: Path, name: str, zips: List[Path], **kwargs) -> bytes:
+    processor = make_processor(tmp_path, name, **kwargs)
+    processor.parquet_dir = None
+    processor.run(zips)
+    return processor.output_file.read_bytes()
+
+
+def test_compact_dtypes_produce_the_same_csv(tmp_path, quarter_zips):
+    expected = run_full(tmp_path, "default", quarter_zips)
+
+    assert run_full(tmp_path, "compact", quarter_zips, compact_dtypes=True) == expected
+    assert run_full(
+        tmp_path, "compact_streaming", quarter_zips,
+        compact_dtypes=True, streaming=True, chunk_size=500
+    ) == run_full(tmp_path, "streaming", quarter_zips, streaming=True, chunk_size=500)
+
+
+def test_compact_files_are_concatenated_as_categories(tmp_path, quarter_zips):
+    processor = make_processor(tmp_path, "compact", compact_dtypes=True)
+    df = processor.build(quarter_zips)
+
+    assert isinstance(df['CNPJ'].dtype, pd.CategoricalDtype)
+    assert isinstance(df['RazaoSocial'].dtype, pd.CategoricalDtype)
+
+
+def test_fused_cleaning_produces_the_same_csv(tmp_path, quarter_zips):
+    expected = run_full(tmp_path, "staged", quarter_zips)
+
+    assert run_full(tmp_path, "fused", quarter_zips, fused_cleaning=True) == expected
+
+
+def test_run_without_rows_replaces_previous_output(tmp_path, quarter_zips):
+    header = "CNPJ,RazaoSocial,Trimestre,Ano,ValorDespesas\n"
+
+    # Nenhuma linha passa pelo filtro de conta nem pelas palavras-chave
+    unmatched = tmp_path / "sem_despesas" / "1T2025.zip"
+    unmatched.parent.mkdir()
+    with zipfile.ZipFile(unmatched, 'w') as archive:
+        archive.writestr(
+            "1T2025.csv",
+            "REG_ANS;CD_CONTA_CONTABIL;DESCRICAO;VL_SALDO_FINAL\n300001;999;APLICAÇÕES;1,00\n")
+
+    for streaming in [True, False]:
+        name = f"vazio_{streaming}"
+        previous = make_processor(tmp_path, name, streaming=streaming)
+        previous.run(quarter_zips)
+        assert previous.output_file.read_text(encoding="utf-8") != header
+        assert previous.parquet_dir.exists()
+
+        processor = make_processor(tmp_path, name, streaming=streaming)
+        processor.run([unmatched])
+
+        assert processor.output_file.read_text(encoding="utf-8") == header
+        assert not processor.parquet_dir.exists()
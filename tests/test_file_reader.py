@@ -0,0 +1,49 @@
+import zipfile
+
+import pandas as pd
+import pytest
+import pandas.testing as tm
+
+from readers import FileReader, ZipMember
+
+HEADER = "REG_ANS;CD_CONTA_CONTABIL;DESCRICAO;VL_SALDO_FINAL\n"
+
+
+def write_source(tmp_path, tail: bytes):
+    # Início em UTF-8 maior que a amostra do detector, byte latin1 só depois dela
+    head = HEADER + "300001;411;INTERNAÇÃO;1.234,56\n" * 4000
+    assert len(head.encode("utf-8")) > FileReader.SNIFF_SAMPLE_BYTES
+
+    data = head.encode("utf-8") + tail
+    path = tmp_path / "1T2025.csv"
+    path.write_bytes(data)
+
+    zip_path = tmp_path / "1T2025.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.writestr("1T2025.csv", data)
+
+    return path, ZipMember(zip_path, "1T2025.csv")
+
+
+def test_invalid_byte_after_sniff_window(tmp_path):
+    sources = write_source(tmp_path, "300002;411;CONSULTA M".encode() + b"\xc9DICA;10,00\n")
+    reader = FileReader()
+
+    for source in sources:
+        full = reader.read(source)
+        chunked = pd.concat(reader.read_chunks(source, 1000), ignore_index=True)
+
+        tm.assert_frame_equal(chunked, full)
+        assert full['DESCRICAO'].iloc[0] == "INTERNAÇÃO"
+        assert full['DESCRICAO'].iloc[-1] == "CONSULTA MÉDICA"
+        assert len(full) == 4001
+
+
+def test_undetectable_file_raises_in_chunked_mode(tmp_path):
+    path = tmp_path / "binario.csv"
+    path.write_bytes(b"\x00" * 64)
+    reader = FileReader()
+
+    assert reader.read(path) is None
+    with pytest.raises(ValueError):
+        list(reader.read_chunks(path, 10))
@@ -0,0 +1,96 @@
+import json
+import logging
+import zipfile
+from pathlib import Path
+
+from manifest import QuarterManifest
+from processor.expenses_processor import ExpensesProcessor
+
+
+def run(tmp_path: Path, zips, **kwargs) -> ExpensesProcessor:
+    processor = ExpensesProcessor(
+        extracted_dir=tmp_path / "extracted",
+        output_file=tmp_path / "output" / "consolidado.csv",
+        **kwargs
+    )
+    manifest = QuarterManifest(tmp_path / "manifest.json", tmp_path / "partitions")
+    processor.run_incremental(zips, manifest)
+    return processor
+
+
+def manifest_entries(tmp_path: Path) -> dict:
+    return json.loads((tmp_path / "manifest.json").read_text(encoding="utf-8"))
+
+
+def reused(caplog) -> int:
+    return sum("partição reaproveitada" in record.getMessage() for record in caplog.records)
+
+
+def test_unchanged_quarters_are_reused(tmp_path, quarter_zips, caplog):
+    first = run(tmp_path, quarter_zips).output_file.read_bytes()
+
+    with caplog.at_level(logging.INFO):
+        second = run(tmp_path, quarter_zips).output_file.read_bytes()
+
+    assert reused(caplog) == len(quarter_zips)
+    assert second == first
+
+
+def test_processing_options_are_part_of_the_key(tmp_path, quarter_zips, caplog):
+    run(tmp_path, quarter_zips)
+    keys = {entry['processing_key'] for entry in manifest_entries(tmp_path).values()}
+
+    with caplog.at_level(logging.INFO):
+        run(tmp_path, quarter_zips, centavos=True)
+
+    assert reused(caplog) == 0
+    new_keys = {entry['processing_key'] for entry in manifest_entries(tmp_path).values()}
+    assert new_keys.isdisjoint(keys)
+    assert all(json.loads(key)['centavos'] for key in new_keys)
+
+
+def test_options_that_keep_the_csv_reuse_partitions(tmp_path, quarter_zips, caplog):
+    first = run(tmp_path, quarter_zips).output_file.read_bytes()
+
+    # Mesmo CSV nas partições: trocar o modo de execução não reprocessa o histórico
+    with caplog.at_level(logging.INFO):
+        processor = run(
+            tmp_path, quarter_zips, streaming=True, compact_dtypes=True,
+            fused_cleaning=True, parquet_dir=tmp_path / "output" / "consolidado.parquet")
+
+    assert reused(caplog) == len(quarter_zips)
+    assert processor.output_file.read_bytes() == first
+
+
+def test_manifest_without_processing_key_is_stale(tmp_path, quarter_zips, caplog):
+    run(tmp_path, quarter_zips)
+    entries = manifest_entries(tmp_path)
+    for entry in entries.values():
+        entry['processor_version'] = entry.pop('processing_key')
+    (tmp_path / "manifest.json").write_text(json.dumps(entries), encoding="utf-8")
+
+    with caplog.at_level(logging.INFO):
+        run(tmp_path, quarter_zips)
+
+    assert reused(caplog) == 0
+
+
+def test_failed_and_empty_quarters_are_retried(tmp_path, quarter_zips):
+    broken = tmp_path / "raw" / "3T2024.zip"
+    with zipfile.ZipFile(broken, 'w') as archive:
+        archive.writestr("3T2024.csv", b"\x00" * 128)
+
+    empty = tmp_path / "raw" / "4T2024.zip"
+    with zipfile.ZipFile(empty, 'w') as archive:
+        archive.writestr("4T2024.csv", "REG_ANS;CD_CONTA_CONTABIL;VL_SALDO_FINAL\n300001;999;1,00\n")
+
+    processor = run(tmp_path, quarter_zips + [broken, empty])
+
+    entries = manifest_entries(tmp_path)
+    assert set(entries) == {zip_path.stem for zip_path in quarter_zips}
+
+    # Os trimestres válidos continuam no consolidado, com um único cabeçalho
+    lines = processor.output_file.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "CNPJ,RazaoSocial,Trimestre,Ano,ValorDespesas"
+    assert sum(line.startswith("CNPJ") for line in lines) == 1
+    assert sum(entry['row_count'] for entry in entries.values()) == len(lines) - 1
@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pipeline import instrumentation
+from pipeline.instrumentation import instrumented_chunks, start_run
+from processor.expenses_processor import ExpensesProcessor
+
+
+@pytest.fixture(autouse=True)
+def no_active_run(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_active_run", None)
+
+
+def stages(run) -> dict:
+    return {metrics['name']: metrics for metrics in run.report()['stages']}
+
+
+def test_chunk_generator_records_one_call_per_chunk():
+    closed = []
+
+    @instrumented_chunks("reader")
+    def chunks():
+        try:
+            for size in [3, 2, 4]:
+                yield pd.DataFrame({'a': range(size)})
+        finally:
+            closed.append(True)
+
+    run = start_run("chunks")
+    assert [len(chunk) for chunk in chunks()] == [3, 2, 4]
+
+    reader = stages(run)['reader']
+    assert (reader['calls'], reader['rows_out']) == (3, 9)
+
+    # Consumidor que para no primeiro bloco fecha o gerador original
+    closed.clear()
+    generator = chunks()
+    next(generator)
+    generator.close()
+    assert closed == [True]
+
+
+def test_streaming_run_records_reader_per_chunk(tmp_path: Path, quarter_zips):
+    run = start_run("streaming")
+    ExpensesProcessor(
+        extracted_dir=tmp_path / "extracted",
+        output_file=tmp_path / "output" / "consolidado.csv",
+        streaming=True,
+        chunk_size=500
+    ).run(quarter_zips)
+
+    recorded = stages(run)
+    assert recorded['reader']['calls'] == 2 * 3000 // 500
+    assert recorded['reader']['rows_out'] == 2 * 3000
+    assert recorded['filter']['rows_in'] == 2 * 3000
+
+
+def test_parallel_run_merges_worker_stages(tmp_path: Path, quarter_zips):
+    processor = ExpensesProcessor(
+        extracted_dir=tmp_path / "extracted",
+        output_file=tmp_path / "output" / "consolidado.csv",
+        max_workers=2
+    )
+
+    run = start_run("paralelo")
+    processor.run(quarter_zips)
+    recorded = stages(run)
+
+    # Um arquivo por trimestre, lido e filtrado nos processos do pool
+    assert recorded['reader']['calls'] == len(quarter_zips)
+    assert recorded['reader']['rows_out'] == 2 * 3000
+    assert recorded['filter']['rows_in'] == 2 * 3000
+    assert recorded['reader']['max_rss_mb'] is not None
+
+
+def test_pool_workers_do_not_measure_into_the_inherited_run():
+    run = start_run("pai")
+
+    instrumentation.init_worker()
+    assert instrumentation.active_run() is None
+
+    # Sem execução no pai, a tarefa roda sem medição
+    result, worker_stages = instrumentation.call_measured(None, len, [1, 2])
+    assert (result, worker_stages) == (2, [])
+
+    result, worker_stages = instrumentation.call_measured(
+        False, instrumentation.instrumented("filter")(len), [1, 2])
+    assert result == 2
+    assert [metrics['name'] for metrics in worker_stages] == ["filter"]
+    assert instrumentation.active_run() is None
+    assert run.stages == {}